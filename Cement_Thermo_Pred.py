@@ -106,10 +106,10 @@ moles_TiO2 = mass_TiO2/ Components({'TiO2':1.0}).totalMass()
 moles_CaSO4 = mass_CaSO4/Components({'CaSO4':1.0}).totalMass()
 
 ###Gaseous phases considered , Missing F and Cl containg Gases
-phases=[IdealGasPhase(DryAir*Air_molar_flow_rate, T=298.15, P=1e5) + IdealGasPhase({'CO2':0.0}, T=298.15, P=1e5) +IdealGasPhase({'H2O':0.0}, T=298.15, P=1e5) + IdealGasPhase({'CO':0.0}, T=298.15, P=1e5) + IdealGasPhase({'SO3':0.0}, T=298.15, P=1e5) + IdealGasPhase({'SO2':SO2_molar_flow_rate }, T=298.15, P=1e5) +  IdealGasPhase({'OH':0.0}, T=298.15, P=1e5) +IdealGasPhase({'NaOH':0.0}, T=298.15, P=1e5) +IdealGasPhase({'Na':0.0}, T=298.15, P=1e5)+IdealGasPhase({'KOH':0.0}, T=298.15, P=1e5)+IdealGasPhase({'K':0.0}, T=298.15, P=1e5) + IdealGasPhase({'Na2SO4':0.0}, T=298.15, P=1e5)   + IdealGasPhase({'K2SO4':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'H2SO4':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'COS':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'S2O':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'C3OS':0.0}, T=298.15, P=1e5) + IdealGasPhase({'H':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'O':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'H2':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'NO':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'HCO':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'CH3':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'C2H4':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'HCN':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'NH3':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'CH2':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'N':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'N2O':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'NH':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'NH2':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'C2':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'HO2':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'CN':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'CH':0.0}, T=298.15, P=1e5) ]
+phases=[mixPhases([IdealGasPhase(DryAir*Air_molar_flow_rate, T=298.15, P=1e5), IdealGasPhase({'CO2':0.0}, T=298.15, P=1e5), IdealGasPhase({'H2O':0.0}, T=298.15, P=1e5), IdealGasPhase({'CO':0.0}, T=298.15, P=1e5), IdealGasPhase({'SO3':0.0}, T=298.15, P=1e5), IdealGasPhase({'SO2':SO2_molar_flow_rate }, T=298.15, P=1e5), IdealGasPhase({'OH':0.0}, T=298.15, P=1e5), IdealGasPhase({'NaOH':0.0}, T=298.15, P=1e5), IdealGasPhase({'Na':0.0}, T=298.15, P=1e5), IdealGasPhase({'KOH':0.0}, T=298.15, P=1e5), IdealGasPhase({'K':0.0}, T=298.15, P=1e5), IdealGasPhase({'Na2SO4':0.0}, T=298.15, P=1e5), IdealGasPhase({'K2SO4':0.0}, T=298.15, P=1e5), IdealGasPhase({'H2SO4':0.0}, T=298.15, P=1e5), IdealGasPhase({'COS':0.0}, T=298.15, P=1e5), IdealGasPhase({'S2O':0.0}, T=298.15, P=1e5), IdealGasPhase({'C3OS':0.0}, T=298.15, P=1e5), IdealGasPhase({'H':0.0}, T=298.15, P=1e5), IdealGasPhase({'O':0.0}, T=298.15, P=1e5), IdealGasPhase({'H2':0.0}, T=298.15, P=1e5), IdealGasPhase({'NO':0.0}, T=298.15, P=1e5), IdealGasPhase({'HCO':0.0}, T=298.15, P=1e5), IdealGasPhase({'CH3':0.0}, T=298.15, P=1e5), IdealGasPhase({'C2H4':0.0}, T=298.15, P=1e5), IdealGasPhase({'HCN':0.0}, T=298.15, P=1e5), IdealGasPhase({'NH3':0.0}, T=298.15, P=1e5), IdealGasPhase({'CH2':0.0}, T=298.15, P=1e5), IdealGasPhase({'N':0.0}, T=298.15, P=1e5), IdealGasPhase({'N2O':0.0}, T=298.15, P=1e5), IdealGasPhase({'NH':0.0}, T=298.15, P=1e5), IdealGasPhase({'NH2':0.0}, T=298.15, P=1e5), IdealGasPhase({'C2':0.0}, T=298.15, P=1e5), IdealGasPhase({'HO2':0.0}, T=298.15, P=1e5), IdealGasPhase({'CN':0.0}, T=298.15, P=1e5), IdealGasPhase({'CH':0.0}, T=298.15, P=1e5)])]
 
 if Include_Radicals:
-    phases[0]+= IdealGasPhase({'e-':0.0}, T=298.15, P=1e5) + IdealGasPhase({'CO2+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'NO+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'H3O+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'NO3-':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'NO2-':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'OH+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'HCO+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'OH-':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'CaOH+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'O2+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'Al2O+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'SO-':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'H2O+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'Al2O2+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'CO+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'TiO+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'AlO2-':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'SO2-':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'O2-':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'Na2O+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'CH2OH+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'O+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'MgOH+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'CaO+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'AlO-':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'N2O+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'NaOH+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'AlO+':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'HO2-':0.0}, T=298.15, P=1e5)+ IdealGasPhase({'K2O+':0.0}, T=298.15, P=1e5)
+    phases[0] = mixPhases([phases[0], IdealGasPhase({'e-':0.0}, T=298.15, P=1e5), IdealGasPhase({'CO2+':0.0}, T=298.15, P=1e5), IdealGasPhase({'NO+':0.0}, T=298.15, P=1e5), IdealGasPhase({'H3O+':0.0}, T=298.15, P=1e5), IdealGasPhase({'NO3-':0.0}, T=298.15, P=1e5), IdealGasPhase({'NO2-':0.0}, T=298.15, P=1e5), IdealGasPhase({'OH+':0.0}, T=298.15, P=1e5), IdealGasPhase({'HCO+':0.0}, T=298.15, P=1e5), IdealGasPhase({'OH-':0.0}, T=298.15, P=1e5), IdealGasPhase({'CaOH+':0.0}, T=298.15, P=1e5), IdealGasPhase({'O2+':0.0}, T=298.15, P=1e5), IdealGasPhase({'Al2O+':0.0}, T=298.15, P=1e5), IdealGasPhase({'SO-':0.0}, T=298.15, P=1e5), IdealGasPhase({'H2O+':0.0}, T=298.15, P=1e5), IdealGasPhase({'Al2O2+':0.0}, T=298.15, P=1e5), IdealGasPhase({'CO+':0.0}, T=298.15, P=1e5), IdealGasPhase({'TiO+':0.0}, T=298.15, P=1e5), IdealGasPhase({'AlO2-':0.0}, T=298.15, P=1e5), IdealGasPhase({'SO2-':0.0}, T=298.15, P=1e5), IdealGasPhase({'O2-':0.0}, T=298.15, P=1e5), IdealGasPhase({'Na2O+':0.0}, T=298.15, P=1e5), IdealGasPhase({'CH2OH+':0.0}, T=298.15, P=1e5), IdealGasPhase({'O+':0.0}, T=298.15, P=1e5), IdealGasPhase({'MgOH+':0.0}, T=298.15, P=1e5), IdealGasPhase({'CaO+':0.0}, T=298.15, P=1e5), IdealGasPhase({'AlO-':0.0}, T=298.15, P=1e5), IdealGasPhase({'N2O+':0.0}, T=298.15, P=1e5), IdealGasPhase({'NaOH+':0.0}, T=298.15, P=1e5), IdealGasPhase({'AlO+':0.0}, T=298.15, P=1e5), IdealGasPhase({'HO2-':0.0}, T=298.15, P=1e5), IdealGasPhase({'K2O+':0.0}, T=298.15, P=1e5)])
 
 names=["Gas"]
 
@@ -271,7 +271,7 @@ for index in sorted(indexes, reverse=True):
 
 ### Add Incompressible Phases to Phase List	    
 for species,phase,amount in Incompressiblephases:
-    phases.append(IncompressiblePhase({species:amount}, T=298.15, P=1e5, phaseID=phase))
+    phases.append(PureCondensedPhase({species:amount}, T=298.15, P=1e5, phaseID=phase))
     names.append(species+':'+phase)
 
 ### Make Dictionaries to store Data
@@ -327,16 +327,19 @@ def updatePlot():
     plt.draw()
     plt.pause(0.0001)
 
-def solveAtT(T):
-    T_solved.append(T)
+def phasesAtT(T):
     currentphases=[]
     currentnames=[]
     for phase,name in zip(phases,names):
         if speciesData[phase.components.keys()[0]].inDataRange(T, phase.phase) == False:
             continue
-        currentphases.append(phase)
+        currentphases.append(phase.copy())
         currentnames.append(name)
     currentphases[0].T = T
+    return currentphases, currentnames
+
+def solveAtT(T):
+    currentphases, currentnames = phasesAtT(T)
     try:
         result = findEquilibrium(currentphases, constP=True, constT=True, elemental = True,iterations=300, xtol=1e-6) 
     except Exception as e:
@@ -347,12 +350,26 @@ def solveAtT(T):
     except Exception as e: 
         print "Did not converge for T=",T,'\n', e
         return 
+    storeResult(T, currentnames, result)
+
+def sweepT(temperatures):
+    ### Each temperature starts from the solutions at the previous ones (extrapolated), falling back to the cold solve of solveAtT where that fails
+    feeds = [phasesAtT(T) for T in temperatures]
+    sweep = equilibriumSweep([], [currentphases for currentphases, currentnames in feeds], 'feed', predictor=True, positions=temperatures, constP=True, constT=True, elemental = True,iterations=300, xtol=1e-8)
+    for T, (currentphases, currentnames), point in zip(temperatures, feeds, sweep):
+        if point.error is not None:
+            solveAtT(T)
+        else:
+            storeResult(T, currentnames, point.phases)
+
+def storeResult(T, currentnames, result):
+    T_solved.append(T)
     for comp,amnt in result[0].components.iteritems():
         if amnt/result[0].components.total() > 0.00000499:
             Ts_gas[comp].append(T-273.15)
             pp_gas[comp].append(math.log10(amnt/result[0].components.total()))	
 
-    for phase,name,datum in zip(currentphases, currentnames, result):
+    for name,datum in zip(currentnames, result):
         Ts[name].append(T - 273.15)
         Moles[name].append(datum.components.total())
         Mass[name].append(datum.components.totalMass())
@@ -448,8 +465,7 @@ while ((deltaT / denom) > T_step):
 	T_vals.append(T_Finish - i * deltaT / denom)
     denom = denom * 2
 
-for T in map(lambda T : T+273.15, T_vals):
-    solveAtT(T)
+sweepT(map(lambda T : T+273.15, sorted(set(T_vals))))
 
 
 if AutoRefinement:
@@ -161,6 +161,42 @@ validate(normComp["H2O"], 0.190045)
 validate(normComp["N2"], 0.706787)
 validate(normComp["Ar"], 0.0081448)
 
+#The analytic gradients must find an equilibrium at least as good as
+#finite differences. The trace species are only compared through the
+#objective, as finite differences do not resolve them at the default
+#tolerance.
+for constants, objective in [({'constT':True, 'constP':True}, lambda phase: phase.gibbsFreeEnergy()), ({'constH':True, 'constP':True}, lambda phase: -phase.entropy()), ({'constU':True, 'constV':True}, lambda phase: -phase.entropy())]:
+    InGas = IdealGasPhase({"CH4":1, "O2":2, "H2O":0, "CO2":0, "CO":0, "H2":0, "OH":0, "H":0, "O":0}, T=1500, P=1e5)
+    finite = findEquilibrium([InGas], elemental=True, analyticGradients=False, **constants)[0]
+    analytic = findEquilibrium([InGas], elemental=True, analyticGradients=True, **constants)[0]
+    if objective(analytic) > objective(finite) + 1e-6 * abs(objective(finite)):
+        raise Exception("The analytic gradients found a worse equilibrium than finite differences for "+str(constants))
+    validate(analytic.T, finite.T, 1e-4)
+    validate(analytic.P, finite.P, 1e-4)
+    for species in ["H2O", "CO2"]:
+        validate(analytic.components[species], finite.components[species], 0.01)
+
+#Isentropic equilibria, with the temperature rising as the products
+#form. These once stopped at the feed and reported success (the
+#temperature is only resolved to ~0.1K at the default tolerance).
+for constants, T in [({'constS':True, 'constP':True}, 1515.56), ({'constS':True, 'constV':True}, 1519.68)]:
+    InGas = IdealGasPhase({"CH4":1, "O2":2, "N2":7, "H2O":0, "CO2":0, "CO":0, "H2":0, "OH":0, "H":0, "O":0, "NO":0}, T=1500, P=1e5)
+    reference = findEquilibrium([InGas], elemental=True, method='ElementPotential', **constants)[0]
+    output = findEquilibrium([InGas], elemental=True, **constants)[0]
+    validate(reference.T, T, 1e-5)
+    validate(output.T, reference.T, 1e-3)
+    validate(output.entropy(), InGas.entropy(), 1e-6)
+    validate(output.components["CO2"], reference.components["CO2"], 0.01)
+
+#The scipy SLSQP backend, with either gradient. The finite differences
+#once used too small a step, and stopped at CO = NO = 0.97 when the
+#trace species were allowed close to zero.
+for analyticGradients, traceAmount in [(False, 1e-10), (False, 1e-8), (True, 1e-8)]:
+    InGas = IdealGasPhase({"CH4":1, "O2":2, "N2":7, "H2O":0, "CO2":0, "CO":0, "H2":0, "OH":0, "H":0, "O":0, "NO":0}, T=1500, P=1e5)
+    output = findEquilibrium([InGas], elemental=True, constT=True, constP=True, backend='scipy-SLSQP', analyticGradients=analyticGradients, traceAmount=traceAmount)[0]
+    validate(output.gibbsFreeEnergy(), -4.28025e6, 1e-5)
+    validate(output.components["CO2"], 1.0, 1e-3)
+
 import chemeng.cementdata
 
 #Check species where we have altered constants from the source
@@ -172,6 +208,59 @@ validate(speciesData["Ca2Al3Si3O12(OH)"].S0(1000, 'Zoisite'), 849.575)
 validate(speciesData["HAlO2"].Cp0(500, 'Diaspore'), 74.159)
 validate(speciesData["HAlO2"].S0(500, 'Diaspore'), 68.412)
 
+##################################################################
+# Element potential solver
+##################################################################
+#Lime and silica with the calcium silicates. At equilibrium the pure
+#phases present have the chemical potentials given by the element
+#potentials, and no absent phase may have a lower one. (Metastable
+#assemblages, such as CaO + CaSiO3, were once returned here)
+from chemeng.elementpotential import ElementPotentialFinder
+for T in [1303.15, 1403.15, 1603.15]:
+    phases = [IdealGasPhase({'N2':1.0, 'O2':0.1, 'CO2':0.0}, T=T, P=1e5), PureCondensedPhase({'CaCO3':3.0}, '1cr', T, 1e5), PureCondensedPhase({'SiO2':1.0}, 'beta', T, 1e5)]
+    for species, phase in [('CaO', 'Lime'), ('CaSiO3', 'Wollastonite'), ('CaSiO3', 'Cyclowollastonite'), ('Ca2SiO4', 'alphaprime'), ('Ca3SiO5', 'Crystal'), ('Ca3Si2O7', 'Rankinite')]:
+        phases.append(PureCondensedPhase({species:0.0}, phase, T, 1e5))
+    solver = ElementPotentialFinder(phases, constT=True, constP=True, elemental=True)
+    for output in solver.outputPhases[1:]:
+        species = output.components.keys()[0]
+        if not speciesData[species].inDataRange(T, output.phase):
+            continue
+        potential = sum([amount * solver.elementPotentials[element] for element, amount in Components({species:1}).elementalComposition().iteritems()])
+        affinity = potential - PureCondensedPhase({species:1.0}, output.phase, T, 1e5).chemicalPotentials()[species]
+        if output.components.total() > 0:
+            validate(affinity, 0, 1.0)
+        elif affinity > 1.0:
+            raise Exception("The absent "+output.phase+" phase of "+species+" is more stable than the solution at "+str(T)+"K")
+    if T == 1403.15:
+        validate(solver.outputPhases[3].components['CaO'], 1.0)
+        validate(solver.outputPhases[6].components['Ca2SiO4'], 1.0)
+        validate(solver.outputPhases[5].components['CaSiO3'], 0)
+
+    #The same solids held in a CondensedSpeciesBlock
+    block = CondensedSpeciesBlock([(output.components.keys()[0], output.phase, 0.0) for output in phases[1:]], T, 1e5)
+    block.amounts = [3.0, 1.0] + [0.0] * (len(block) - 2)
+    validate(block.enthalpy(), sum([output.enthalpy() for output in phases[1:]]), 1e-12)
+    blockSolver = ElementPotentialFinder([phases[0], block], constT=True, constP=True, elemental=True)
+    for output, amount in zip(solver.outputPhases[1:], blockSolver.outputPhases[1].amounts):
+        validate(amount, output.components.total(), 1e-9)
+
+#A temperature sweep started from the previous solutions must find the
+#same equilibria as cold solves, in fewer Newton iterations
+from chemeng.entropymaximiser import equilibriumSolver
+InGas = IdealGasPhase({"CH4":1, "O2":2, "N2":7, "H2O":0, "CO2":0, "CO":0, "H2":0, "OH":0, "H":0, "O":0, "NO":0}, T=1500, P=1e5)
+for predictor in [False, True]:
+    warm = cold = 0
+    for point in equilibriumSweep([InGas], [1500 + 100 * i for i in range(16)], 'T', predictor=predictor, constT=True, constP=True, elemental=True, method='ElementPotential'):
+        ColdGas = InGas.copy()
+        ColdGas.T = point.value
+        coldSolver = equilibriumSolver([ColdGas], constT=True, constP=True, elemental=True, method='ElementPotential')
+        for species, amount in coldSolver.outputPhases[0].components.iteritems():
+            validate(point.phases[0].components[species], amount, 1e-6)
+        warm += point.solver.iterations
+        cold += coldSolver.iterations
+    if warm >= cold:
+        raise Exception("The warm started sweep took "+str(warm)+" iterations against "+str(cold)+" cold")
+
 #Check the reference values given in the data set
 import chemeng.config
 import os
@@ -3,18 +3,24 @@ from distutils.core import setup, Extension
 from Cython.Build import cythonize
 from Cython.Distutils import build_ext
 
-ext_modules = [Extension('chemeng.elementdata', ['src/chemeng/elementdata.pyx'], language='c++', include_dirs=['.']),
+ext_modules = [Extension('chemeng.datacache', ['src/chemeng/datacache.pyx'], language='c++', include_dirs=['.']),
+               Extension('chemeng.elementdata', ['src/chemeng/elementdata.pyx'], language='c++', include_dirs=['.']),
                Extension('chemeng.NASAdata', ['src/chemeng/NASAdata.pyx'], language='c++', include_dirs=['.']),
                Extension('chemeng.cementdata', ['src/chemeng/cementdata.pyx'], language='c++', include_dirs=['.']),
                Extension('chemeng.chemkindata', ['src/chemeng/chemkindata.pyx'], language='c++', include_dirs=['.']),
                Extension('chemeng.speciesdata', ['src/chemeng/speciesdata.pyx'], language='c++', include_dirs=['.']),
+               Extension('chemeng.loadreport', ['src/chemeng/loadreport.pyx'], language='c++', include_dirs=['.']),
+               Extension('chemeng.dataloader', ['src/chemeng/dataloader.pyx'], language='c++', include_dirs=['.']),
                Extension('chemeng.antoinedata', ['src/chemeng/antoinedata.pyx'], language='c++', include_dirs=['.']),
                Extension('chemeng.transportdata', ['src/chemeng/transportdata.pyx'], language='c++', include_dirs=['.']),
                Extension('chemeng.components', ['src/chemeng/components.pyx'], language='c++', include_dirs=['.']),
                Extension('chemeng.ponchonsavarit', ['src/chemeng/PonchonSavarit.pyx'], language='c++', include_dirs=['.']),
                Extension('chemeng.phase', ['src/chemeng/phase.pyx'], language='c++', include_dirs=['.']),
+               Extension('chemeng.phasebatch', ['src/chemeng/phasebatch.pyx'], language='c++', include_dirs=['.']),
                Extension('chemeng.standarddefinitions', ['src/chemeng/standarddefinitions.pyx'], language='c++', include_dirs=['.']),
+               Extension('chemeng.optimisers', ['src/chemeng/optimisers.pyx'], language='c++', include_dirs=['.']),
                Extension('chemeng.entropymaximiser', ['src/chemeng/entropymaximiser.pyx'], language='c++', include_dirs=['.']),
+               Extension('chemeng.elementpotential', ['src/chemeng/elementpotential.pyx'], language='c++', include_dirs=['.']),
                ]
 
 setup(
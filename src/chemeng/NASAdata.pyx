@@ -3,8 +3,10 @@ import math
 #Ensure that the elemental database has been loaded first
 import chemeng.elementdata
 from chemeng.components import Components
-from chemeng.speciesdata import speciesData, registerSpecies, relativeError
-from chemeng.speciesdata cimport SpeciesDataType,ThermoConstantsType
+from chemeng.speciesdata import speciesData, registerSpecies, registerLazySpecies, relativeError, defaultLoadFilter
+from chemeng.speciesdata cimport SpeciesDataType,ThermoConstantsType,StoredThermoConstants
+from chemeng.datacache import loadCache, storeCache
+from chemeng.loadreport import loadReport
 
 ####################################################################
 # Physical constants
@@ -15,38 +17,26 @@ cdef public double R = 8.31451
 T0 = 273.15 + 25.0
 P0 = 1.0e5
 
-from cpython cimport array as c_array
-from array import array
-
-cdef class NASAPolynomial(ThermoConstantsType):
-    cdef public c_array.array a
-    cdef public c_array.array b
-
+cdef class NASAPolynomial(StoredThermoConstants):
+    """A NASA Glenn 9 term polynomial for a temperature interval. The
+    coefficients are held in the shared coefficient store (see
+    chemeng.speciesdata.CoefficientStore)."""
     def __init__(NASAPolynomial self, double Tmin, double Tmax, a, b, comments):
-        ThermoConstantsType.__init__(self, Tmin, Tmax, comments)
-        self.a = array('d', a)
-        self.b = array('d', b)
+        StoredThermoConstants.__init__(self, Tmin, Tmax, a, b, comments)
 
     def __str__(self):
+        a = self.a
+        b = self.b
         retval = "NASAPolynomial{Tmin="+str(self.Tmin)+", Tmax="+str(self.Tmax)+", notes='"+self.comments+"', a=["
         for i in range(7):
-            retval+=str(self.a[i])+", "
+            retval+=str(a[i])+", "
         retval = retval[:-2] + "], b=["
         for i in range(2):
-            retval+=str(self.b[i])+", "
+            retval+=str(b[i])+", "
         return retval[:-2]+"]}"
 
     def __repr__(self):
         return self.__str__()
-    
-    cpdef double Cp0(self, double T):
-        return R * (self.a[0] * T ** (-2) + self.a[1] / T + self.a[2] + self.a[3] * T + self.a[4] * T**2 + self.a[5] * T**3 + self.a[6] * T**4)
-
-    cpdef double Hf0(self, double T):
-        return R * (-self.a[0] / T + self.a[1] * math.log(T) + self.a[2] * T + self.a[3] * T**2 / 2 + self.a[4] * T**3 / 3 + self.a[5] * T**4 / 4 + self.a[6] * T**5 / 5 + self.b[0])
-
-    cpdef double S0(self, double T):
-        return R * (-self.a[0] * T ** (-2) / 2 - self.a[1] / T + self.a[2] * math.log(T) + self.a[3] * T + self.a[4] * T**2 / 2 + self.a[5] * T**3 / 3 + self.a[6] * T**4 / 4 + self.b[1])
 
 
 ####################################################################
@@ -58,6 +48,10 @@ MWMaxError=0.0003 #0.03% error
 ####################################################################
 # NASA Glenn Thermodynamic Database
 ####################################################################
+import re
+#Matches a species name with a trailing phase qualifier, e.g., "H2O(L)"
+phaseQualifier = re.compile('(?P<species>.*?)\((?P<phase>[^)]*?)\)($|,(?P<extra>.*?)$)')
+
 cpdef parseFortanFloat(string):
     #First, try to parse the exponentiated formats
     data = string.split('D')
@@ -70,8 +64,13 @@ cpdef parseFortanFloat(string):
     #Try to parse it as a standard number
     return float(string.strip())
 
-cpdef parseNASADataFile(filename, quiet=True):
-    cdef SpeciesDataType sp
+cpdef list parseNASARecords(filename, quiet=True):
+    """Parses a NASA CEA formatted database into a list of plain
+    records, one per species and phase, of the form (species,
+    phasename, formula, comments, HfRef, linecount, intervals). The
+    formula is a dict of element counts, and each interval is a tuple
+    of (Tmin, Tmax, a, HConst, SConst). No species are registered."""
+    cdef list records = []
     file = open(filename, "r")
     lineit = iter(file)
     linecount=0
@@ -108,7 +107,7 @@ cpdef parseNASADataFile(filename, quiet=True):
             MW=parseFortanFloat(line[52:65])#g/mol
             HfRef=parseFortanFloat(line[65:80])# @298.15K , in J/mol
             coeffs = []
-            MolecularFormula = Components({})
+            MolecularFormula = {}
             for offset in range(5):
                 shift = 8 * offset
                 atom = line[10+shift:12+shift].strip()
@@ -165,7 +164,7 @@ cpdef parseNASADataFile(filename, quiet=True):
 
                 HConst = parseFortanFloat(line[48:48 + 16])
                 SConst = parseFortanFloat(line[64:64 + 16])
-                coeffs.append(NASAPolynomial(Tmin, Tmax, C, [HConst, SConst], comments))
+                coeffs.append((Tmin, Tmax, C, HConst, SConst))
             
             ##Apply fixes for NASA naming Cl->CL and Al->AL
             if "Cl" in MolecularFormula:
@@ -177,8 +176,7 @@ cpdef parseNASADataFile(filename, quiet=True):
             phasename = "Gas"
             if (species[-1] == ")") or (")," in species):
                 #This has a phase qualifier at the end in parentheses, grab it
-                import re
-                m = re.match('(?P<species>.*?)\((?P<phase>[^)]*?)\)($|,(?P<extra>.*?)$)', species)
+                m = phaseQualifier.match(species)
                 species = m.group('species')
                 phasename = m.group('phase')
                 extra= m.group('extra')
@@ -206,32 +204,138 @@ cpdef parseNASADataFile(filename, quiet=True):
             if phasename != "Gas" and phase == 0:
                 raise Exception("Error, parsing phase number "+str(phase)+"==0 not as a Gas")
 
-            registerSpecies(species, MolecularFormula)
-            sp = speciesData[species]
-            sp.registerPhase(phasename)
-            
-            for C in coeffs:
-                sp.registerPhaseCoeffs(C, phasename)
-                    
-            if sp.inDataRange(T0, phasename):
-                HfCalc = sp.Hf0(T0, phasename)
-                error = relativeError(HfCalc, HfRef)
-                if error > HfMaxError:
-                    print "Warning: Species \""+species+"\" and phase "+phasename+" in file:"+filename+" at line "+str(linecount)+" has a Hf of "+str(HfRef)+" but a calculated value of "+str(HfCalc)+" a relative error of "+str(error)+" for Hf at "+str(T0)
-
+            records.append((species, phasename, MolecularFormula, comments, HfRef, linecount, coeffs))
         except Exception as e:
             import traceback
             print traceback.print_exc()
             print "Error parsing record for",species,"in file:",filename,"at line",linecount
             print "   ",e.message
             raise
+    return records
 
-def initDataDir(directory):
+cpdef list indexNASARecords(records):
+    """Returns the index of a list of NASA records, holding the
+    (species, formula, phasename, comments) of each record."""
+    return [(species, formula, phasename, comments) for species, phasename, formula, comments, HfRef, linecount, coeffs in records]
+
+cpdef validateNASARecords(list records, filename, loadFilter=None):
+    """Checks the polynomials of each record (selected by loadFilter,
+    if given) against its reference heat of formation, warning if they
+    disagree."""
+    cdef NASAPolynomial poly
+    for species, phasename, formula, comments, HfRef, linecount, coeffs in records:
+        if loadFilter is not None and not loadFilter.allows(species, formula):
+            continue
+        for Tmin, Tmax, C, HConst, SConst in coeffs:
+            if T0 >= Tmin and T0 <= Tmax:
+                poly = NASAPolynomial(Tmin, Tmax, C, [HConst, SConst], comments)
+                HfCalc = poly.Hf0(T0)
+                error = relativeError(HfCalc, HfRef)
+                if error > HfMaxError:
+                    print "Warning: Species \""+species+"\" and phase "+phasename+" in file:"+filename+" at line "+str(linecount)+" has a Hf of "+str(HfRef)+" but a calculated value of "+str(HfCalc)+" a relative error of "+str(error)+" for Hf at "+str(T0)
+                break
+
+def registerNASARecord(SpeciesDataType sp, record):
+    """Creates the phase and polynomials of a NASA record in sp"""
+    species, phasename, formula, comments, HfRef, linecount, coeffs = record
+    sp.registerPhase(phasename)
+    for Tmin, Tmax, C, HConst, SConst in coeffs:
+        sp.registerPhaseCoeffs(NASAPolynomial(Tmin, Tmax, C, [HConst, SConst], comments), phasename)
+
+cpdef registerNASARecords(records, list index, loadFilter=None):
+    """Registers the records of a NASA database with speciesData. The
+    records may be a list or a CachedRecords, and are only accessed
+    when their species is first used. Only the records selected by
+    loadFilter (if given) are registered."""
+    cdef Py_ssize_t slot
+    for slot in range(len(index)):
+        species, formula, phasename, comments = index[slot]
+        if loadFilter is not None and not loadFilter.select(species, formula):
+            continue
+        registerLazySpecies(species, formula, phasename, comments, records, slot, registerNASARecord)
+
+cpdef parseNASADataFile(filename, quiet=True, loadFilter=None):
+    source = loadReport.source('NASA', filename)
+    with source.parsing():
+        records = parseNASARecords(filename, quiet)
+        source.records += len(records)
+    with source.validating():
+        validateNASARecords(records, filename, loadFilter)
+    with source.registering():
+        registerNASARecords(records, indexNASARecords(records), loadFilter)
+
+def buildNASADataFile(filename, loadFilter=None):
+    """Parses a NASA CEA database, validates the records selected by
+    loadFilter, and rebuilds its compiled cache. Returns the records
+    and their index."""
+    source = loadReport.source('NASA', filename)
+    with source.parsing():
+        records = parseNASARecords(filename)
+        source.records += len(records)
+    with source.validating():
+        validateNASARecords(records, filename, loadFilter)
+    with source.parsing():
+        index = indexNASARecords(records)
+        storeCache(filename, 'NASA', records, index)
+    return records, index
+
+def loadNASADataFile(filename, loadFilter=None):
+    """Registers the contents of a NASA CEA database, using the
+    compiled cache of the file if it is up to date. The file is only
+    parsed (and its data validated) when the cache is rebuilt. Only
+    the species selected by loadFilter (a LoadFilter, by default the
+    one set up in chemeng.config) are registered. The cache always
+    holds the whole file, so it is shared between filters."""
+    if loadFilter is None:
+        loadFilter = defaultLoadFilter()
+    source = loadReport.source('NASA', filename)
+    with source.parsing():
+        records = loadCache(filename, 'NASA')
+    if records is not None:
+        source.cached = True
+        source.records += len(records)
+        with source.registering():
+            registerNASARecords(records, records.index, loadFilter)
+        return
+    records, index = buildNASADataFile(filename, loadFilter)
+    with source.registering():
+        registerNASARecords(records, index, loadFilter)
+
+####################################################################
+# Data directory loading
+####################################################################
+#readDataDir only creates plain records and may run in another
+#process (see chemeng.dataloader), while registerDataDir adds them to
+#speciesData. initDataDir does both.
+def readDataDir(directory, loadFilter=None):
+    """Returns the parsed records and index of the NASA database, or
+    None if its compiled cache is up to date."""
+    import os
+    filename = os.path.join(directory, 'NASA_CEA.inp')
+    if loadCache(filename, 'NASA') is not None:
+        return None
+    return buildNASADataFile(filename, loadFilter)
+
+def registerDataDir(directory, parsed, loadFilter=None):
     import os
-    parseNASADataFile(os.path.join(directory, 'NASA_CEA.inp'))
+    filename = os.path.join(directory, 'NASA_CEA.inp')
+    if parsed is None:
+        loadNASADataFile(filename, loadFilter)
+    else:
+        records, index = parsed
+        if loadFilter is None:
+            loadFilter = defaultLoadFilter()
+        with loadReport.source('NASA', filename).registering():
+            registerNASARecords(records, index, loadFilter)
     print "Loaded NASA dataset (database at",len(speciesData),"species)"
     #parseNASADataFile(os.path.join(directory, 'NEWNASA.TXT'), quiet=False)
     #print "Loaded NEW_NASA dataset (database at",len(speciesData),"species)"
 
+def initDataDir(directory, loadFilter=None):
+    import os
+    loadNASADataFile(os.path.join(directory, 'NASA_CEA.inp'), loadFilter)
+    print "Loaded NASA dataset (database at",len(speciesData),"species)"
+
 import chemeng.config
-initDataDir(chemeng.config.datadir)
+if chemeng.config.autoload:
+    initDataDir(chemeng.config.datadir)
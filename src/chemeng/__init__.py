@@ -2,5 +2,6 @@
 from chemeng.elementdata import elements
 from chemeng.components import Components
 from chemeng.speciesdata import speciesData,findSpeciesData,ThermoConstantsType,registerSpecies
-from chemeng.phase import IdealGasPhase, IncompressiblePhase
-from chemeng.entropymaximiser import findEquilibrium
+from chemeng.phase import IdealGasPhase, IncompressiblePhase, PureCondensedPhase, CondensedSpeciesBlock, mixPhases
+from chemeng.phasebatch import IdealGasPhaseBatch, IncompressiblePhaseBatch
+from chemeng.entropymaximiser import findEquilibrium, equilibriumSweep
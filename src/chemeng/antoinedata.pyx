@@ -6,6 +6,7 @@ from chemeng.speciesdata cimport SpeciesDataType,AntioneConstants
 from chemeng.speciesdata import speciesData
 from chemeng.components import Components
 import chemeng.NASAdata
+from chemeng.loadreport import loadReport
 
 ####################################################################
 # Antoine polynomials
@@ -53,13 +54,23 @@ cdef class Antoine10CmmHgPolynomial(AntioneConstants):
 ####################################################################
 # Datafile loading
 ####################################################################
+#The polynomial class of each fit function name used in the data file
+antoineFits = {
+    "Antoine" : AntionePolynomial,
+    "AntoineCnR" : AntioneCnRPolynomial,
+    "Antoine10CmmHg" : Antoine10CmmHgPolynomial,
+}
+
 def parseTemperature(string):
     if string[-1] == 'C':
         return float(string[:-1])+273.15
     return float(string)
 
-def initDataDir(directory):
-    datafile = open(os.path.join(directory, 'antoine.inp'), 'r')
+cpdef list parseAntoineRecords(filename):
+    """Parses an Antoine database into a list of plain records of the
+    form (species, Tmin, Tmax, fitFunction, constants)."""
+    cdef list records = []
+    datafile = open(filename, 'r')
     for line in datafile:
         datafields = line.split()
     
@@ -71,16 +82,37 @@ def initDataDir(directory):
         Tmax = parseTemperature(datafields[2])
         fitFunction = datafields[3]
         constants = map(float, datafields[4:])
-        speciesData[datafields[0]].registerPhase("Liquid")
+        if fitFunction not in antoineFits:
+            raise Exception("Unrecognised Antione polynomial type"+fitFunction)
+        records.append((datafields[0], Tmin, Tmax, fitFunction, constants))
+    return records
+
+cpdef registerAntoineRecords(list records):
+    for species, Tmin, Tmax, fitFunction, constants in records:
+        #Skip species excluded from the databases by a LoadFilter
+        if speciesData.isExcluded(species):
+            continue
+        speciesData[species].registerPhase("Liquid")
+        speciesData[species].registerAntoineCoeffs(antoineFits[fitFunction](Tmin, Tmax, constants, "antione.inp"), "Liquid")
+
+####################################################################
+# Data directory loading
+####################################################################
+#See NASAdata for the readDataDir/registerDataDir split
+def readDataDir(directory, loadFilter=None):
+    filename = os.path.join(directory, 'antoine.inp')
+    with loadReport.source('antoine', filename).parsing() as source:
+        records = parseAntoineRecords(filename)
+        source.records += len(records)
+    return records
+
+def registerDataDir(directory, parsed, loadFilter=None):
+    with loadReport.source('antoine', os.path.join(directory, 'antoine.inp')).registering():
+        registerAntoineRecords(parsed)
 
-        if datafields[3] == "Antoine":
-            speciesData[datafields[0]].registerAntoineCoeffs(AntionePolynomial(Tmin, Tmax, constants, "antione.inp"), "Liquid")
-        elif datafields[3] == "AntoineCnR":
-            speciesData[datafields[0]].registerAntoineCoeffs(AntioneCnRPolynomial(Tmin, Tmax, constants, "antione.inp"), "Liquid")
-        elif datafields[3] == "Antoine10CmmHg":
-            speciesData[datafields[0]].registerAntoineCoeffs(Antoine10CmmHgPolynomial(Tmin, Tmax, constants, "antione.inp"), "Liquid")
-        else:
-            raise Exception("Unrecognised Antione polynomial type"+datafields[3])
+def initDataDir(directory, loadFilter=None):
+    registerDataDir(directory, readDataDir(directory, loadFilter), loadFilter)
 
 import chemeng.config
-initDataDir(chemeng.config.datadir)
+if chemeng.config.autoload:
+    initDataDir(chemeng.config.datadir)
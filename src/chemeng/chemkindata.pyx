@@ -3,8 +3,9 @@ import math
 #Ensure that the elemental database has been loaded first
 import chemeng.elementdata
 from chemeng.components import Components
-from chemeng.speciesdata import speciesData, registerSpecies, relativeError
-from chemeng.speciesdata cimport SpeciesDataType,ThermoConstantsType
+from chemeng.speciesdata import speciesData, registerSpecies, relativeError, defaultLoadFilter
+from chemeng.speciesdata cimport SpeciesDataType,ThermoConstantsType,StoredThermoConstants
+from chemeng.loadreport import loadReport
 
 ####################################################################
 # Physical constants
@@ -13,28 +14,20 @@ cdef public double R = 8.31451
 T0 = 273.15 + 25.0
 P0 = 1.0e5
 
-cdef class ChemKinPolynomial(ThermoConstantsType):
-    cdef double a[7]
+cdef class ChemKinPolynomial(StoredThermoConstants):
+    """A CHEMKIN 7 term polynomial for a temperature interval. This is
+    a special case of the NASA 9 term polynomial (with a0 = a1 = 0),
+    so it is held in the shared coefficient store in that form."""
     def __init__(ChemKinPolynomial self, double Tmin, double Tmax, a, comments):
-        ThermoConstantsType.__init__(self, Tmin, Tmax, comments)
-        cdef int i
-        for i in range(7):
-            self.a[i] = a[i]
+        StoredThermoConstants.__init__(self, Tmin, Tmax, [0.0, 0.0, a[0], a[1], a[2], a[3], a[4]], [a[5], a[6]], comments)
 
     def __str__(self):
+        a = self.a
+        b = self.b
         retval = "ChemKinPolynomial{Tmin="+str(self.Tmin)+", Tmax="+str(self.Tmax)+", "
-        for i in range(7):
-            retval+=str(self.a[i])+", "
+        for coeff in list(a[2:]) + list(b):
+            retval+=str(coeff)+", "
         return retval[:-2]+", notes='"+self.comments+"'}"
-    
-    cpdef double Cp0(self, double T):
-        return R * (self.self.a[0] + self.a[1] * T + self.a[2] * T**2 + self.a[3] * T**3 + self.a[4] * T**4)
-
-    cpdef double Hf0(self, double T):
-        return R * (self.a[5] + T * (self.a[0] + self.a[1] * T / 2 + self.a[2] * T**2 / 3 + self.a[3] * T**3 / 4 + self.a[4] * T**4 / 5))
-
-    cpdef double S0(self, double T):
-        return R * (self.self.a[0] * math.log(T) + self.a[1] * T + self.a[2] * T**2 / 2 + self.a[3] * T**3 / 3 + self.a[4] * T**4 / 4 + self.a[6])
 
 cpdef parseFortanFloat(string):
     #First, try to parse the exponentiated formats
@@ -48,8 +41,11 @@ cpdef parseFortanFloat(string):
     #Try to parse it as a standard number
     return float(string.strip())
 
-cpdef parseCHEMKINDataFile(filename, quiet=True):
-    cdef SpeciesDataType sp
+cpdef list parseCHEMKINRecords(filename, quiet=True):
+    """Parses a CHEMKIN database into a list of plain records, one
+    per species, of the form (species, phasename, elementalComposition
+    (a dict), comments, [(Tmin, Tmax, a), ...])."""
+    cdef list records = []
     file = open(filename, "r")
     lineit = iter(file)
 
@@ -142,22 +138,65 @@ cpdef parseCHEMKINDataFile(filename, quiet=True):
             for i in range(4):
                 C.append(parseFortanFloat(line[i*15:(i+1)*15]))
             
-            registerSpecies(species, MolecularFormula)
-            sp = speciesData[species]
-            sp.registerPhase(phase)
-            sp.registerPhaseCoeffs(ChemKinPolynomial(lowT, midT, C[:7], comments), phase)
-            sp.registerPhaseCoeffs(ChemKinPolynomial(midT, highT, C[7:14], comments), phase)
+            records.append((species, phase, dict(MolecularFormula.iteritems()), comments, [(lowT, midT, C[:7]), (midT, highT, C[7:14])]))
         except Exception as e:
             import traceback
             print traceback.print_exc()
             print "Error parsing record for",species,"in file:",filename,"at line",linecount
             print "   ",e.message
             raise
+    return records
+
+cpdef registerCHEMKINRecords(list records, loadFilter=None):
+    """Registers the records of a CHEMKIN database with speciesData.
+    Only the species selected by loadFilter (if given) are
+    registered."""
+    cdef SpeciesDataType sp
+    for species, phase, formula, comments, coeffs in records:
+        if loadFilter is not None and not loadFilter.select(species, formula):
+            continue
+        registerSpecies(species, Components(formula))
+        sp = speciesData[species]
+        sp.registerPhase(phase)
+        for Tmin, Tmax, a in coeffs:
+            sp.registerPhaseCoeffs(ChemKinPolynomial(Tmin, Tmax, a, comments), phase)
+
+cpdef parseCHEMKINDataFile(filename, quiet=True, loadFilter=None):
+    """Registers the species of a CHEMKIN database. Only the species
+    selected by loadFilter (a LoadFilter, by default the one set up in
+    chemeng.config) are registered."""
+    if loadFilter is None:
+        loadFilter = defaultLoadFilter()
+    source = loadReport.source('CHEMKIN', filename)
+    with source.parsing():
+        records = parseCHEMKINRecords(filename, quiet)
+        source.records += len(records)
+    with source.registering():
+        registerCHEMKINRecords(records, loadFilter)
 
-def initDataDir(directory):
+####################################################################
+# Data directory loading
+####################################################################
+#See NASAdata for the readDataDir/registerDataDir split
+def readDataDir(directory, loadFilter=None):
     import os
-    parseCHEMKINDataFile(os.path.join(directory, 'BurcatCHEMKIN.DAT'), quiet=False)
+    filename = os.path.join(directory, 'BurcatCHEMKIN.DAT')
+    with loadReport.source('CHEMKIN', filename).parsing() as source:
+        records = parseCHEMKINRecords(filename, quiet=False)
+        source.records += len(records)
+    return records
+
+def registerDataDir(directory, parsed, loadFilter=None):
+    import os
+    if loadFilter is None:
+        loadFilter = defaultLoadFilter()
+    with loadReport.source('CHEMKIN', os.path.join(directory, 'BurcatCHEMKIN.DAT')).registering():
+        registerCHEMKINRecords(parsed, loadFilter)
     print "Loaded Burcat ChemKin dataset (database at",len(speciesData),"species)"
 
+def initDataDir(directory, loadFilter=None):
+    registerDataDir(directory, readDataDir(directory, loadFilter), loadFilter)
+
 import chemeng.config
-initDataDir(chemeng.config.datadir)
+if chemeng.config.autoload:
+    initDataDir(chemeng.config.datadir)
@@ -1,13 +1,37 @@
 #!/usr/bin/env python
 #distutils: language = c++
 
-from libcpp.map cimport map
-from libcpp.string cimport string
+from libcpp.vector cimport vector
+
+cdef class SpeciesRegistry:
+   cdef dict index
+   cdef public list names
+   cdef list species
+   cpdef Py_ssize_t id(SpeciesRegistry, name) except -1
+   cdef object lookup(SpeciesRegistry, Py_ssize_t id)
+
+cdef class FormulaMatrix:
+   cdef public list species
+   cdef public list elements
+   cdef vector[Py_ssize_t] speciesIds
+   cdef vector[Py_ssize_t] elementIds
+   cdef vector[double] matrix
+   cdef vector[double] masses
 
 cdef class Components:
-   cdef map[string, double] _list
+   cdef vector[Py_ssize_t] ids
+   cdef vector[double] amounts
+   cdef readonly unsigned long version
+   cdef void touch(Components)
+   cdef Py_ssize_t position(Components, Py_ssize_t id)
+   cdef Py_ssize_t find(Components, Py_ssize_t id)
+   cdef int set(Components, Py_ssize_t id, double value) except -1
+   cdef int add(Components, Py_ssize_t id, double value) except -1
+   cdef object name(Components, size_t pos)
+   cdef list order(Components)
    cpdef Components copy(Components)
    cpdef Components mix(Components, Components)
+   cpdef Components addScaled(Components, Components, double)
    cpdef double totalMass(Components)
    cpdef double avgMolarMass(Components)
    cpdef Components elementalComposition(Components)
@@ -2,41 +2,285 @@
 # distutils: language = c++
 # cython: profile=True
 
-from libcpp.string cimport string
-from libcpp.map cimport map
+from libcpp.vector cimport vector
 
+import struct
 from chemeng.elementdata import elements
 from chemeng.speciesdata import speciesData
-   
+
+####################################################################
+# Species registry
+####################################################################
+#Every species name used in a Components is given a permanent integer
+#id by the registry, which also holds the species data of each id
+#once it has been looked up in speciesData. Components then only
+#store ids, so the property calculations never hash a name.
+cdef class SpeciesRegistry:
+   def __init__(self):
+       self.index = {}
+       self.names = []
+       self.species = []
+
+   cpdef Py_ssize_t id(SpeciesRegistry self, name) except -1:
+       """Returns the id of a species name, assigning one if needed"""
+       found = self.index.get(name)
+       if found is not None:
+           return found
+       cdef Py_ssize_t newid = len(self.names)
+       self.index[name] = newid
+       self.names.append(name)
+       self.species.append(None)
+       return newid
+
+   cdef object lookup(SpeciesRegistry self, Py_ssize_t id):
+       """Returns the species data of an id"""
+       sp = self.species[id]
+       if sp is None:
+           sp = speciesData[self.names[id]]
+           self.species[id] = sp
+       return sp
+
+   def speciesData(self, name):
+       return self.lookup(self.id(name))
+
+   def forget(self, name):
+       """Drops the species data held for a name, so that it is looked
+       up in speciesData again (e.g., after it has been replaced)"""
+       found = self.index.get(name)
+       if found is not None:
+           self.species[found] = None
+           formulaCache.clear()
+
+   def __len__(self):
+       return len(self.names)
+
+speciesRegistry = SpeciesRegistry()
+cdef SpeciesRegistry registry = speciesRegistry
+
+####################################################################
+# Formula matrix
+####################################################################
+#The elemental composition and molar mass of a set of species, as an
+#element x species matrix (the elements in the order of their ids)
+#and a vector of masses. The matrix of each set of species used by a
+#Components is cached, so elementalComposition and totalMass are a
+#single matrix-vector product.
+cdef class FormulaMatrix:
+   def __init__(self, species):
+       self.species = list(species)
+       for name in self.species:
+           self.speciesIds.push_back(registry.id(name))
+       cdef size_t i, j, S = self.speciesIds.size()
+       cdef Components formula
+       cdef dict elementPositions = {}
+       for j in range(S):
+           formula = registry.lookup(self.speciesIds[j]).elementalComposition
+           for i in range(formula.ids.size()):
+               elementPositions[formula.ids[i]] = None
+       for id in sorted(elementPositions):
+           elementPositions[id] = self.elementIds.size()
+           self.elementIds.push_back(id)
+       self.elements = [registry.names[id] for id in sorted(elementPositions)]
+
+       self.matrix.resize(self.elementIds.size() * S, 0.0)
+       for j in range(S):
+           sp = registry.lookup(self.speciesIds[j])
+           self.masses.push_back(sp.mass)
+           formula = sp.elementalComposition
+           for i in range(formula.ids.size()):
+               self.matrix[<Py_ssize_t>elementPositions[formula.ids[i]] * S + j] = formula.amounts[i]
+
+   def matrixArray(self):
+       """The formula matrix as an elements x species numpy array"""
+       import numpy
+       cdef size_t i, S = self.speciesIds.size()
+       retval = numpy.empty((self.elementIds.size(), S))
+       for i in range(self.matrix.size()):
+           retval[i // S, i % S] = self.matrix[i]
+       return retval
+
+   def massArray(self):
+       """The molar masses of the species as a numpy array"""
+       import numpy
+       return numpy.array([self.masses[j] for j in range(self.masses.size())], dtype=numpy.float64)
+
+#Formula matrices of the sets of species used by Components, keyed by
+#the tuple of the species ids. The cache is simply emptied when it
+#grows too large.
+cdef dict formulaCache = {}
+cdef Py_ssize_t formulaCacheSize = 1024
+
+def formulaMatrix(species):
+   """Returns the (cached) FormulaMatrix of a list of species names"""
+   cdef tuple key = tuple([registry.id(name) for name in species])
+   cdef FormulaMatrix matrix = formulaCache.get(key)
+   if matrix is None:
+       matrix = FormulaMatrix(species)
+       if len(formulaCache) >= formulaCacheSize:
+           formulaCache.clear()
+       formulaCache[key] = matrix
+   return matrix
+
+cdef FormulaMatrix componentsFormula(Components components):
+   cdef size_t i
+   cdef tuple key = tuple([components.ids[i] for i in range(components.ids.size())])
+   cdef FormulaMatrix matrix = formulaCache.get(key)
+   if matrix is None:
+       matrix = FormulaMatrix([components.name(i) for i in range(components.ids.size())])
+       if len(formulaCache) >= formulaCacheSize:
+           formulaCache.clear()
+       formulaCache[key] = matrix
+   return matrix
+
+####################################################################
+# Components
+####################################################################
+#A sparse vector of the amounts of each species, held as the species
+#ids (in increasing order) and their amounts. Entries are only
+#removed by replacing the Components, so a species set to zero is
+#still "in" the Components, as before.
+#
+#Every change to the amounts gives the Components a new version
+#number, unique across all Components (copies share the version of
+#their original until either is changed), so that the properties
+#calculated from them can be cached.
+cdef unsigned long lastVersion = 0
+
 cdef class Components:
    def __init__(self, dict data):
        for key, entry in data.iteritems():
-           self._list[key] = entry
-       
+           self.set(registry.id(key), entry)
+
+   cdef void touch(Components self):
+       global lastVersion
+       lastVersion += 1
+       self.version = lastVersion
+
+   cdef Py_ssize_t position(Components self, Py_ssize_t id):
+       """The index of the first entry with an id not less than id"""
+       cdef Py_ssize_t lo = 0, hi = self.ids.size(), mid
+       while lo < hi:
+           mid = (lo + hi) // 2
+           if self.ids[mid] < id:
+               lo = mid + 1
+           else:
+               hi = mid
+       return lo
+
+   cdef Py_ssize_t find(Components self, Py_ssize_t id):
+       """The index of the entry of id, or -1"""
+       cdef Py_ssize_t pos = self.position(id)
+       if pos < <Py_ssize_t>self.ids.size() and self.ids[pos] == id:
+           return pos
+       return -1
+
+   cdef int set(Components self, Py_ssize_t id, double value) except -1:
+       cdef Py_ssize_t pos = self.position(id)
+       self.touch()
+       if pos < <Py_ssize_t>self.ids.size() and self.ids[pos] == id:
+           self.amounts[pos] = value
+       else:
+           self.ids.insert(self.ids.begin() + pos, id)
+           self.amounts.insert(self.amounts.begin() + pos, value)
+       return 0
+
+   cdef int add(Components self, Py_ssize_t id, double value) except -1:
+       cdef Py_ssize_t pos = self.position(id)
+       self.touch()
+       if pos < <Py_ssize_t>self.ids.size() and self.ids[pos] == id:
+           self.amounts[pos] += value
+       else:
+           self.ids.insert(self.ids.begin() + pos, id)
+           self.amounts.insert(self.amounts.begin() + pos, value)
+       return 0
+
+   cdef object name(Components self, size_t pos):
+       cdef Py_ssize_t id = self.ids[pos]
+       return registry.names[id]
+
+   cdef list order(Components self):
+       """The indices of the entries, in order of the species names"""
+       cdef Py_ssize_t i
+       return [i for name, i in sorted([(self.name(i), i) for i in range(self.ids.size())])]
+
    cpdef Components copy(Components self):
        cdef Components retval = Components.__new__(Components)
-       retval._list = self._list.copy()
+       retval.ids = self.ids
+       retval.amounts = self.amounts
+       retval.version = self.version
        return retval
 
    cpdef Components mix(self, Components other):
-       for entry in other._list:
-           it = self._list.find(entry.first)
-           if it == self._list.end():
-               self._list.insert(entry)
+       self.addScaled(other, 1.0)
+
+   cpdef Components addScaled(self, Components other, double factor):
+       """Adds factor times other to the components in place (as the
+       BLAS axpy does), returning self"""
+       cdef size_t i = 0, j = 0, missing = 0
+       #Count the species of other which are not already present
+       while j < other.ids.size():
+           if i == self.ids.size() or other.ids[j] < self.ids[i]:
+               missing += 1
+               j += 1
+           elif self.ids[i] < other.ids[j]:
+               i += 1
            else:
-               self._list[entry.first] += entry.second
+               i += 1
+               j += 1
+
+       if missing == 0:
+           #Every species is present, so the amounts are updated where
+           #they are
+           i = 0
+           for j in range(other.ids.size()):
+               while self.ids[i] < other.ids[j]:
+                   i += 1
+               self.amounts[i] += factor * other.amounts[j]
+           self.touch()
+           return self
+
+       #Merge the two sorted id lists
+       cdef vector[Py_ssize_t] ids
+       cdef vector[double] amounts
+       ids.reserve(self.ids.size() + missing)
+       amounts.reserve(self.ids.size() + missing)
+       i = 0
+       j = 0
+       while i < self.ids.size() and j < other.ids.size():
+           if self.ids[i] < other.ids[j]:
+               ids.push_back(self.ids[i])
+               amounts.push_back(self.amounts[i])
+               i += 1
+           elif other.ids[j] < self.ids[i]:
+               ids.push_back(other.ids[j])
+               amounts.push_back(factor * other.amounts[j])
+               j += 1
+           else:
+               ids.push_back(self.ids[i])
+               amounts.push_back(self.amounts[i] + factor * other.amounts[j])
+               i += 1
+               j += 1
+       while i < self.ids.size():
+           ids.push_back(self.ids[i])
+           amounts.push_back(self.amounts[i])
+           i += 1
+       while j < other.ids.size():
+           ids.push_back(other.ids[j])
+           amounts.push_back(factor * other.amounts[j])
+           j += 1
+       self.ids.swap(ids)
+       self.amounts.swap(amounts)
+       self.touch()
+       return self
 
    cpdef values(Components self):
-      return self._list.values()
+      return [self.amounts[i] for i in self.order()]
 
    cpdef keys(Components self):
-      return self._list.keys()
+      return [self.name(i) for i in self.order()]
 
    cpdef iteritems(Components self):
-      return self._list.iteritems()
-
-   def __contains__(Components self, string key):
-       return self._list.count(key) != 0
+      return iter([(self.name(i), self.amounts[i]) for i in self.order()])
 
    def __add__(self, Components other):
        cdef Components copy = self.copy()
@@ -51,38 +295,77 @@ cdef class Components:
    def __div__(self, double factor):
        return self * (1.0 / factor)
 
+   def __truediv__(self, double factor):
+       return self * (1.0 / factor)
+
    def __neg__(self):
        return self * (-1.0)
-   
+
    def __sub__(self, Components other):
-       return self + (-other)
+       cdef Components copy = self.copy()
+       copy.addScaled(other, -1.0)
+       return copy
+
+   #The in place operators change the Components itself, rather than
+   #making a new one
+   def __iadd__(self, Components other):
+       self.addScaled(other, 1.0)
+       return self
+
+   def __isub__(self, Components other):
+       self.addScaled(other, -1.0)
+       return self
+
+   def __imul__(self, double factor):
+       self.scale(factor)
+       return self
+
+   def __idiv__(self, double factor):
+       self.scale(1.0 / factor)
+       return self
+
+   def __itruediv__(self, double factor):
+       self.scale(1.0 / factor)
+       return self
 
    cpdef double totalMass(self):
+       cdef FormulaMatrix formula = componentsFormula(self)
        cdef double sum = 0.0
-       for entry in self._list:
-           sum += entry.second * speciesData[entry.first].mass
+       cdef size_t i
+       for i in range(self.ids.size()):
+           sum += self.amounts[i] * formula.masses[i]
        return sum
 
    cpdef double avgMolarMass(self): #g / mol
        return self.totalMass() / self.total()
 
    cpdef Components elementalComposition(Components self): #mol
+       cdef FormulaMatrix formula = componentsFormula(self)
        cdef Components retval = Components.__new__(Components)
-       for entry in self._list:
-           retval.mix(speciesData[entry.first].elementalComposition * entry.second)
+       retval.ids = formula.elementIds
+       retval.amounts.resize(formula.elementIds.size(), 0.0)
+       cdef size_t i, j, S = self.ids.size()
+       for i in range(formula.elementIds.size()):
+           for j in range(S):
+               if formula.matrix[i * S + j] != 0:
+                   retval.amounts[i] += formula.matrix[i * S + j] * self.amounts[j]
+       retval.touch()
        return retval
 
    cpdef Components scale(Components self, double factor):
        """A * operator to allow scaling of components (e.g. Components * 2)"""
-       for entry in self._list:
-           self._list[entry.first] *= factor
+       cdef size_t i
+       for i in range(self.amounts.size()):
+           self.amounts[i] *= factor
+       self.touch()
        return self
 
    cpdef double total(self):#mol
        """Returns the total molar flow of all the components"""
        cdef double total = 0
-       for entry in self._list:
-           total += entry.second
+       cdef size_t i
+       for i in range(self.amounts.size()):
+           total += self.amounts[i]
        return total
 
    cpdef Components normalised(self):
@@ -93,25 +376,65 @@ cdef class Components:
 
    def __str__(self):
        output="C{"
-       for entry in self._list:
-           output += "\'%s\':%g, " % (entry.first, entry.second)
+       for i in self.order():
+           output += "\'%s\':%g, " % (self.name(i), self.amounts[i])
        return output[:-2]+"}"
-   
+
    def __len__(self):
-       return self._list.size()
+       return self.ids.size()
 
-   def __getitem__(self, string key):
-       cdef map[string, double].iterator it
-       it = self._list.find(key)
-       if it == self._list.end():
+   def __getitem__(self, key):
+       found = registry.index.get(key)
+       if found is None:
+           return 0.0
+       cdef Py_ssize_t pos = self.find(found)
+       if pos == -1:
            return 0.0
-       cimport cython.operator.dereference
-       return cython.operator.dereference(it).second
+       return self.amounts[pos]
+
+   def __setitem__(self, key, double value):
+       self.set(registry.id(key), value)
+
+   def __contains__(self, key):
+       found = registry.index.get(key)
+       return found is not None and self.find(found) != -1
+
+   def toBuffer(self):
+       """Packs the components into a compact binary string (see
+       componentsFromBuffer). The species are stored by name, as the
+       species ids differ between processes."""
+       cdef size_t i, n = self.ids.size()
+       cdef list parts = [countFormat.pack(n)]
+       for i in range(n):
+           name = self.name(i)
+           parts.append(nameLengthFormat.pack(len(name)))
+           parts.append(name)
+       parts.append(struct.pack('<%dd' % n, *[self.amounts[i] for i in range(n)]))
+       return ''.join(parts)
+
+   def __reduce__(self):
+       return (componentsFromBuffer, (self.toBuffer(),))
 
-   def __setitem__(self, string key, double value):
-       self._list[key] = value
+#The binary format of Components.toBuffer is the number of species,
+#the name of each species prefixed by its length, then the amount of
+#each species as a double (all little endian).
+cdef object countFormat = struct.Struct('<I')
+cdef object nameLengthFormat = struct.Struct('<H')
 
-   def __contains__(self, string key):
-       cdef map[string, double].iterator it
-       it = self._list.find(key)
-       return it != self._list.end()
+def componentsFromBuffer(buffer):
+   """Creates a Components from the binary string of toBuffer"""
+   cdef Py_ssize_t offset = countFormat.size, length
+   cdef size_t i, n = countFormat.unpack_from(buffer, 0)[0]
+   cdef list ids = []
+   for i in range(n):
+       length = nameLengthFormat.unpack_from(buffer, offset)[0]
+       offset += nameLengthFormat.size
+       ids.append(registry.id(buffer[offset:offset + length]))
+       offset += length
+   amounts = struct.unpack_from('<%dd' % n, buffer, offset)
+   cdef Components retval = Components.__new__(Components)
+   for id, amount in sorted(zip(ids, amounts)):
+       retval.ids.push_back(id)
+       retval.amounts.push_back(amount)
+   retval.touch()
+   return retval
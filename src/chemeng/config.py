@@ -2,4 +2,21 @@
 import os
 datadir=os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data')
 
+#Compiled forms of the databases in datadir are stored here, so that
+#they only need to be parsed once. Set to None to disable the cache.
+cachedir=os.environ.get('CHEMENG_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'chemeng'))
 
+#Restricts the species loaded from the databases on import to those
+#made up of the elements in loadElements and named in loadSpecies
+#(see chemeng.speciesdata.LoadFilter). None allows anything.
+loadElements=None
+loadSpecies=None
+
+#The data modules (NASAdata, cementdata, ...) load their databases
+#when first imported. chemeng.dataloader turns this off while it
+#imports them, as it loads the databases itself.
+autoload=True
+
+#If set, chemeng.loadreport writes its report on the loading of the
+#databases to this file (as JSON) when the interpreter exits.
+loadReportFile=os.environ.get('CHEMENG_LOAD_REPORT')
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+import os
+import mmap
+import struct
+import hashlib
+import cPickle
+
+import chemeng.config
+
+####################################################################
+# Compiled database cache
+####################################################################
+#The data files are parsed into plain records (tuples, lists and
+#floats) which are pickled into chemeng.config.cachedir. Each cache
+#file starts with a small header holding the cache format version and
+#a hash of the source file, so a stale cache is detected without
+#unpickling the records. This is followed by an index (a small
+#summary of each record, such as its species name) and the offsets
+#of the individually pickled records, so that records can be
+#unpickled one at a time as they are needed. Each section is
+#prefixed by its length. Bump CACHE_VERSION whenever the layout of
+#the file or of the records changes.
+CACHE_VERSION = 2
+
+cdef object lengthPrefix = struct.Struct('<Q')
+
+def fileHash(filename):
+    """Returns the SHA1 hex digest of the contents of filename"""
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        while True:
+            block = f.read(1 << 16)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+def cacheFilename(filename, tag):
+    """Returns the path of the cache file for the records generated
+    from filename by the parser identified by tag."""
+    if chemeng.config.cachedir is None:
+        return None
+    return os.path.join(chemeng.config.cachedir, os.path.basename(filename)+'.'+tag+'.cache')
+
+cdef class CachedRecords:
+    """A read-only sequence of the records stored in a cache file.
+    The file is memory mapped and each record is only unpickled when
+    it is accessed. The index of the records is available as the
+    index member."""
+    cdef public list index
+    cdef list offsets
+    cdef object data
+
+    def __init__(self, list index, list offsets, data):
+        self.index = index
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, Py_ssize_t slot):
+        return cPickle.loads(self.data[self.offsets[slot]:self.offsets[slot+1]])
+
+cdef tuple readSection(data, Py_ssize_t start):
+    """Unpickles the length prefixed section of data at start,
+    returning it and the offset of the following section."""
+    cdef Py_ssize_t length = lengthPrefix.unpack_from(data, start)[0]
+    start += lengthPrefix.size
+    return cPickle.loads(data[start:start + length]), start + length
+
+def loadCache(filename, tag):
+    """Returns the cached records for filename as a CachedRecords
+    object, or None if there is no cache, or the cache is out of date
+    or unreadable."""
+    cachefile = cacheFilename(filename, tag)
+    if cachefile is None or not os.path.exists(cachefile):
+        return None
+    try:
+        with open(cachefile, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header, start = readSection(data, 0)
+        if header != (CACHE_VERSION, tag, fileHash(filename)):
+            return None
+        (index, offsets), start = readSection(data, start)
+        return CachedRecords(index, [start + offset for offset in offsets], data)
+    except Exception:
+        #A corrupt or partially written cache is simply rebuilt
+        return None
+
+cdef writeSection(f, obj):
+    cdef bytes blob = cPickle.dumps(obj, cPickle.HIGHEST_PROTOCOL)
+    f.write(lengthPrefix.pack(len(blob)))
+    f.write(blob)
+
+def storeCache(filename, tag, records, list index):
+    """Writes the records parsed from filename to the cache, along
+    with their index (a list holding a summary of each record).
+    Failures (e.g., a read-only cache directory) are silently ignored,
+    as the cache is only an optimisation."""
+    cachefile = cacheFilename(filename, tag)
+    if cachefile is None:
+        return
+    tmpfile = cachefile+'.'+str(os.getpid())
+    cdef list blobs = [cPickle.dumps(record, cPickle.HIGHEST_PROTOCOL) for record in records]
+    cdef list offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    try:
+        if not os.path.isdir(chemeng.config.cachedir):
+            os.makedirs(chemeng.config.cachedir)
+        with open(tmpfile, 'wb') as f:
+            writeSection(f, (CACHE_VERSION, tag, fileHash(filename)))
+            writeSection(f, (index, offsets))
+            for blob in blobs:
+                f.write(blob)
+        #Rename is atomic, so concurrent processes never see a partial cache
+        os.rename(tmpfile, cachefile)
+    except (IOError, OSError):
+        if os.path.exists(tmpfile):
+            os.remove(tmpfile)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+import sys
+import importlib
+import multiprocessing
+
+import chemeng.config
+from chemeng.speciesdata import defaultLoadFilter
+from chemeng.loadreport import loadReport
+
+####################################################################
+# Parallel database loading
+####################################################################
+#Each database is loaded by a data module providing readDataDir,
+#which parses its source files into plain records (lists, tuples and
+#floats) and so can run in a worker process, and registerDataDir,
+#which adds those records to speciesData in this process.
+databaseModules = {
+    'NASA' : 'chemeng.NASAdata',
+    'CHEMKIN' : 'chemeng.chemkindata',
+    'cement' : 'chemeng.cementdata',
+    'antoine' : 'chemeng.antoinedata',
+}
+
+#The databases loaded by default, in order of priority. Where two
+#databases hold data for the same species, phase and temperature, the
+#one registered first is used, so the databases are always registered
+#in this order, whichever finishes parsing first. The cement and
+#Antoine data add phases to the NASA species, so they must follow it.
+defaultDatabases = ['NASA', 'cement', 'antoine']
+
+def readDatabase(modulename, directory, loadFilter):
+    """Parses a database, in a worker process. Returns the parsed
+    records and the load report of the parsing."""
+    loadReport.sources = []
+    return importlib.import_module(modulename).readDataDir(directory, loadFilter), loadReport.sources
+
+def loadDatabases(databases=None, directory=None, loadFilter=None, processes=None):
+    """Loads the listed databases (by default defaultDatabases) from
+    directory (by default chemeng.config.datadir), registering them in
+    the order of the list. The source files are parsed concurrently
+    in a pool of processes (by default one per database, up to the
+    number of CPUs), so the load takes as long as the slowest file
+    rather than all of them. Only species selected by loadFilter (by
+    default the one set up in chemeng.config) are loaded.
+
+    This replaces importing the data modules. Databases whose module
+    has already been imported were loaded at the time, so they are
+    skipped. Data modules imported by the listed ones (e.g., NASAdata
+    by cementdata) are not loaded unless they are listed too.
+
+    Returns the list of the databases loaded."""
+    if databases is None:
+        databases = defaultDatabases
+    if directory is None:
+        directory = chemeng.config.datadir
+    if loadFilter is None:
+        loadFilter = defaultLoadFilter()
+    for name in databases:
+        if name not in databaseModules:
+            raise Exception("Unknown database "+str(name))
+
+    cdef list loading = [name for name in databases if databaseModules[name] not in sys.modules]
+    cdef list modules = []
+    autoload = chemeng.config.autoload
+    chemeng.config.autoload = False
+    try:
+        for name in loading:
+            modules.append(importlib.import_module(databaseModules[name]))
+    finally:
+        chemeng.config.autoload = autoload
+
+    if processes is None:
+        processes = min(len(loading), multiprocessing.cpu_count())
+    if processes <= 1 or len(loading) <= 1:
+        for module in modules:
+            module.initDataDir(directory, loadFilter)
+        return loading
+
+    #The modules are already imported, so the forked workers do not
+    #load anything on import
+    pool = multiprocessing.Pool(processes)
+    try:
+        results = [pool.apply_async(readDatabase, (databaseModules[name], directory, loadFilter)) for name in loading]
+        pool.close()
+        for module, result in zip(modules, results):
+            parsed, sources = result.get()
+            for source in sources:
+                loadReport.source(source.database, source.filename).merge(source)
+            module.registerDataDir(directory, parsed, loadFilter)
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return loading
@@ -35,14 +35,24 @@ cdef class ElementData:
     cdef public int N
     cdef public double mass
     cdef public str name
-    cdef public dict isotopes
-
+    #None until the isotope database has been loaded
+    cdef dict _isotopes
     
     def __init__(self, name, Z, mass=0):
         self.name = name
         self.Z = Z
         self.mass = mass
-        self.isotopes = {}
+        self._isotopes = {}
+
+    property isotopes:
+        """The known isotopes of the element, indexed by neutron
+        number. The isotope database is loaded on first access."""
+        def __get__(self):
+            if self._isotopes is None:
+                elements.loadIsotopes()
+            return self._isotopes
+        def __set__(self, dict isotopes):
+            self._isotopes = isotopes
 
     def __str__(self):
         output="Element{"+self.name+", Z="+str(self.Z)+", AW="+str(self.mass)
@@ -73,10 +83,63 @@ cdef class ElementDatabaseType:
     ElementDatabaseType[('H',1)]
 
     The data returned is of sub type ElementData.
+
+    Only the average atomic mass and proton count of each element are
+    loaded initially (from elementTable). The isotope data files are
+    parsed on the first access to an isotope (see loadIsotopes).
     """
     
     cdef public dict nameIndex #A way to look up the proton number (Z) from an element name
     cdef public dict data
+    cdef public str isotopeDir #The directory holding the isotope data files
+    cdef public bint isotopesLoaded
+
+    def __init__(self):
+        self.data = {}
+        self.nameIndex = {}
+        self.isotopeDir = None
+        self.isotopesLoaded = False
+
+    cdef dict isotopeDict(self, int Z):
+        """Returns the isotope dictionary of element Z without
+        triggering the loading of the isotope database."""
+        cdef ElementData elementdata = self.data[Z]
+        if elementdata._isotopes is None:
+            elementdata._isotopes = {}
+        return elementdata._isotopes
+
+    def loadElementTable(self, table):
+        """Initialises the elements from a sequence of (Z, symbol,
+        mass) tuples. The isotopes of these elements are loaded
+        on demand from isotopeDir."""
+        cdef ElementData elementdata
+        for Z, name, mass in table:
+            elementdata = ElementData(name=name, Z=Z, mass=mass)
+            elementdata._isotopes = None
+            self.data[Z] = elementdata
+            self.nameIndex[name] = Z
+
+    def loadIsotopes(self):
+        """Parses the isotope data files in isotopeDir, if this has
+        not been done already."""
+        if self.isotopesLoaded:
+            return
+        #Mark as loaded first, as the parsers access the elements
+        self.isotopesLoaded = True
+        import os
+        self.ParseTableData(os.path.join(self.isotopeDir, 'mass.mas03round.txt'))
+        self.ParseIsotopicCompositionsFile(os.path.join(self.isotopeDir, 'isotopicCompositions.inp'))
+        ####Add some special cases
+        self.isotopeDict(1)[1].name = "D"
+        self.isotopeDict(1)[2].name = "T"
+        #Any elements without isotope data have no known isotopes
+        for Z in self.data:
+            self.isotopeDict(Z)
+
+    def massTable(self):
+        """Returns a tuple of (Z, symbol, mass) for every element with
+        Z >= 0. This is used to generate elementTable below."""
+        return tuple((Z, self.data[Z].name, self.data[Z].mass) for Z in sorted(self.data) if Z >= 0)
 
     def __getitem__(self, key):
         if type(key) is tuple:
@@ -111,8 +174,6 @@ cdef class ElementDatabaseType:
         data and isotopes member variables). This file contains no
         information on abundances which must be obtained from another
         file."""
-        self.data = {}
-        self.nameIndex = {}
         file = open(filename, "r")
         lineit = iter(file)
         try:
@@ -157,7 +218,7 @@ cdef class ElementDatabaseType:
                     self.data[Z] = ElementData(name=element, Z=Z)
                     self.nameIndex[element] = Z
 
-                self[Z].isotopes[N] = IsotopeData(name=element, N=N, Z=Z, mass=mass_int + mass_frac * 1e-6, mass_uncertainty=mass_unc * 1e-6)
+                self.isotopeDict(Z)[N] = IsotopeData(name=element, N=N, Z=Z, mass=mass_int + mass_frac * 1e-6, mass_uncertainty=mass_unc * 1e-6)
         except StopIteration:
             pass
 
@@ -187,7 +248,7 @@ cdef class ElementDatabaseType:
 
                 #We use information in this file to set abundance information
                 if abundance != "":
-                    self[Z].isotopes[N].abundance = float(abundance.split('(')[0])
+                    self.isotopeDict(Z)[N].abundance = float(abundance.split('(')[0])
 
                 if AW[0] == '[':
                     AW = AW[1:-1]
@@ -202,15 +263,59 @@ cdef class ElementDatabaseType:
 ####################################################################
 #elements is a dictionary of elements and their masses and proton counts (including electrons)
 
+#The atomic number, symbol, and standard atomic weight of every
+#element in mass.mas03round.txt and isotopicCompositions.inp. This is
+#the result of parsing both files and is regenerated using
+#elements.massTable() (after elements.loadIsotopes()) if they change.
+elementTable = (
+    (0, 'n', 0.0), (1, 'H', 1.00794), (2, 'He', 4.002602), (3, 'Li', 6.941),
+    (4, 'Be', 9.012182), (5, 'B', 10.811), (6, 'C', 12.0107),
+    (7, 'N', 14.0067), (8, 'O', 15.9994), (9, 'F', 18.9984032),
+    (10, 'Ne', 20.1797), (11, 'Na', 22.98976928), (12, 'Mg', 24.305),
+    (13, 'Al', 26.9815386), (14, 'Si', 28.0855), (15, 'P', 30.973762),
+    (16, 'S', 32.065), (17, 'Cl', 35.453), (18, 'Ar', 39.948),
+    (19, 'K', 39.0983), (20, 'Ca', 40.078), (21, 'Sc', 44.955912),
+    (22, 'Ti', 47.867), (23, 'V', 50.9415), (24, 'Cr', 51.9961),
+    (25, 'Mn', 54.938045), (26, 'Fe', 55.845), (27, 'Co', 58.933195),
+    (28, 'Ni', 58.6934), (29, 'Cu', 63.546), (30, 'Zn', 65.38),
+    (31, 'Ga', 69.723), (32, 'Ge', 72.64), (33, 'As', 74.9216),
+    (34, 'Se', 78.96), (35, 'Br', 79.904), (36, 'Kr', 83.798),
+    (37, 'Rb', 85.4678), (38, 'Sr', 87.62), (39, 'Y', 88.90585),
+    (40, 'Zr', 91.224), (41, 'Nb', 92.90638), (42, 'Mo', 95.96),
+    (43, 'Tc', 98.0), (44, 'Ru', 101.07), (45, 'Rh', 102.9055),
+    (46, 'Pd', 106.42), (47, 'Ag', 107.8682), (48, 'Cd', 112.411),
+    (49, 'In', 114.818), (50, 'Sn', 118.71), (51, 'Sb', 121.76),
+    (52, 'Te', 127.6), (53, 'I', 126.90447), (54, 'Xe', 131.293),
+    (55, 'Cs', 132.9054519), (56, 'Ba', 137.327), (57, 'La', 138.90547),
+    (58, 'Ce', 140.116), (59, 'Pr', 140.90765), (60, 'Nd', 144.242),
+    (61, 'Pm', 145.0), (62, 'Sm', 150.36), (63, 'Eu', 151.964),
+    (64, 'Gd', 157.25), (65, 'Tb', 158.92535), (66, 'Dy', 162.5),
+    (67, 'Ho', 164.93032), (68, 'Er', 167.259), (69, 'Tm', 168.93421),
+    (70, 'Yb', 173.054), (71, 'Lu', 174.9668), (72, 'Hf', 178.49),
+    (73, 'Ta', 180.94788), (74, 'W', 183.84), (75, 'Re', 186.207),
+    (76, 'Os', 190.23), (77, 'Ir', 192.217), (78, 'Pt', 195.084),
+    (79, 'Au', 196.966569), (80, 'Hg', 200.59), (81, 'Tl', 204.3833),
+    (82, 'Pb', 207.2), (83, 'Bi', 208.9804), (84, 'Po', 209.0),
+    (85, 'At', 210.0), (86, 'Rn', 222.0), (87, 'Fr', 223.0),
+    (88, 'Ra', 226.0), (89, 'Ac', 227.0), (90, 'Th', 232.03806),
+    (91, 'Pa', 231.03588), (92, 'U', 238.02891), (93, 'Np', 237.0),
+    (94, 'Pu', 244.0), (95, 'Am', 243.0), (96, 'Cm', 247.0),
+    (97, 'Bk', 247.0), (98, 'Cf', 251.0), (99, 'Es', 252.0),
+    (100, 'Fm', 257.0), (101, 'Md', 258.0), (102, 'No', 259.0),
+    (103, 'Lr', 262.0), (104, 'Rf', 265.0), (105, 'Db', 268.0),
+    (106, 'Sg', 271.0), (107, 'Bh', 272.0), (108, 'Hs', 270.0),
+    (109, 'Mt', 276.0), (110, 'Ea', 281.0), (111, 'Eb', 280.0),
+    (112, 'Ec', 285.0), (113, 'Ed', 284.0), (114, 'Ee', 289.0),
+    (115, 'Ef', 288.0), (116, 'Eg', 293.0), (117, 'Eh', 292.0),
+    (118, 'Ei', 294.0),
+)
+
 elements = ElementDatabaseType()
 def initDataDir(directory):
-    import os
-    elements.ParseTableData(os.path.join(directory, 'mass.mas03round.txt'))
-    elements.ParseIsotopicCompositionsFile(os.path.join(directory, 'isotopicCompositions.inp'))
+    elements.loadElementTable(elementTable)
+    elements.isotopeDir = directory
 
     ####Add some special cases
-    elements['H'].isotopes[1].name = "D"
-    elements['H'].isotopes[2].name = "T"
     elements.nameIndex["D"] = (1,1)
     elements.nameIndex["T"] = (1,2)
     ####Also add a special entry for electrons (using Z=-1 as Z=0 is taken
@@ -0,0 +1,756 @@
+#!/usr/bin/env python
+# distutils: language = c++
+# cython: profile=True
+
+from libc.math cimport log, exp, fabs
+from chemeng.phase cimport Phase, PhaseDerivatives, CondensedSpeciesBlock
+from chemeng.phase import IdealGasPhase
+from chemeng.components cimport Components
+from chemeng.components import formulaMatrix
+from chemeng.entropymaximiser import loadInitialPhases
+
+#The gas constant used by chemeng.phase
+cdef double R = 8.31451
+
+#The mole fraction below which a species is treated as a trace
+#species when limiting the Newton steps (as in NASA CEA)
+cdef double traceLogFraction = -18.420681
+#The amount (relative to the total) below which a mixture phase is
+#removed from the solution
+cdef double phaseRemovalFraction = 1e-12
+#The amount (relative to the total) of a mixture phase when it is
+#added to the solution
+cdef double phaseInclusionFraction = 1e-6
+
+####################################################################
+# Element potential equilibrium solver
+####################################################################
+#The Gibbs minimisation method of NASA CEA (Gordon and McBride, NASA
+#RP-1311), itself a form of the RAND method. At equilibrium the
+#chemical potential of every species present is a sum of the
+#potentials of its elements,
+#
+#  mu_j / RT = sum_i a_ij pi_i
+#
+#Newton's method is applied to these conditions and to the element
+#balances. The corrections to the amounts of the species of each
+#mixture phase are eliminated, leaving a linear system of one
+#equation per element, mixture phase and pure condensed phase, plus
+#one per conserved property (H, U, V or S) if T and/or P are free. The
+#size of the system is therefore set by the number of elements and
+#phases rather than the number of species.
+#
+#Phases of a single condensed species (e.g., PureCondensedPhase) are
+#pure phases, all other phases are ideal mixtures. The species of a
+#CondensedSpeciesBlock are also pure phases, and the properties of
+#those of a block are evaluated together. Phases are removed
+#from the solution when their amount falls to zero, and once
+#converged, the phase which is most supersaturated (if any) is added
+#and the solution continued, until every absent phase is stable.
+#
+#The system is singular if the pure phases present are not
+#independent (more condensed phases than the phase rule allows), in
+#which case they are reacted, lowering the Gibbs free energy, until
+#one of them runs out and is removed (a pivot of the simplex method),
+#or if the phases present cannot hold the elements in their
+#proportions, in which case a phase which can is added.
+cdef class ElementPotentialFinder:
+    cdef public list inputPhases
+    cdef public list outputPhases
+    cdef public bint constT
+    cdef public bint constP
+    cdef public bint constV
+    cdef public bint constH
+    cdef public bint constU
+    cdef public bint constS
+    cdef public bint elemental
+    #The conserved elements (or species) and their amounts
+    cdef public list constraintKeys
+    cdef public object constraintTargets
+    #The conserved properties other than T and P, and their values
+    cdef public list properties
+    cdef public list propertyTargets
+    #Which of the output phases are present in the solution
+    cdef public list active
+    #The number of Newton iterations taken
+    cdef public int iterations
+    #The potentials of the conserved elements (or species) at
+    #equilibrium (J/mol)
+    cdef public Components elementPotentials
+    cdef public double Tmin
+    cdef public double Tmax
+    cdef public double xtol
+    cdef public bint debug
+    #The phases of the solution are the output phases, with each
+    #species of a CondensedSpeciesBlock as a separate pure phase. For
+    #each of these, the output phase and the position in its block (or
+    #-1), the phase ID, the species, whether it is a phase of a single
+    #condensed species, the species which may be present (containing
+    #only the conserved elements), the constraint x species matrix and
+    #the amounts of the species
+    cdef list sources
+    cdef list phaseIDs
+    cdef list keys
+    cdef list pure
+    cdef list allowed
+    cdef list matrices
+    cdef list amounts
+    cdef list ranges
+    #The temperature and pressure of the solution
+    cdef double T
+    cdef double P
+
+    def __init__(ElementPotentialFinder self, list inputPhases, bint constT = False, bint constP = False, bint constH = False, bint constV = False, bint constU = False, bint constS = False, bint elemental = False, double Tmin = 200.00001, double Tmax = 20000, double xtol = 1e-9, int iterations = 200, bint debug = False, initialPhases = None):
+        '''Sets up and solves for the equilibrium of the phases,
+        starting from the input phases, or from initialPhases if given
+        (see loadInitialPhases). The phases may include
+        CondensedSpeciesBlock objects.'''
+        import numpy
+        if (constT + constP + constH + constV + constU + constS) != 2:
+            raise Exception("ElementPotentialFinder requires exactly 2 constant state variables from T, P, H, V, U, and S.")
+        if not (constT or constP) and not (constU and constV) and not (constS and constV):
+            raise Exception("Error, unanticipated combination of constant state variables")
+        self.constT = constT
+        self.constP = constP
+        self.constH = constH
+        self.constV = constV
+        self.constU = constU
+        self.constS = constS
+        self.elemental = elemental
+        self.inputPhases = inputPhases
+        self.Tmin = Tmin
+        self.Tmax = Tmax
+        self.xtol = xtol
+        self.debug = debug
+
+        #As in EquilibriumFinder, the output phases start as copies of
+        #the input phases at the temperature and pressure of the first
+        cdef Components inputSpecies = Components({})
+        self.outputPhases = []
+        for phase in inputPhases:
+            newphase = phase.copy()
+            newphase.T = inputPhases[0].T
+            newphase.P = inputPhases[0].P
+            self.outputPhases.append(newphase)
+            if isinstance(newphase, CondensedSpeciesBlock):
+                inputSpecies += newphase.totalSpecies()
+            else:
+                inputSpecies += newphase.components
+        self.T = inputPhases[0].T
+        self.P = inputPhases[0].P
+
+        #The conserved quantities, skipping those which are absent
+        cdef Components conserved
+        if elemental:
+            conserved = inputSpecies.elementalComposition()
+        else:
+            conserved = inputSpecies
+        self.constraintKeys = [key for key, amount in conserved.iteritems() if amount > 0]
+        self.constraintTargets = numpy.array([conserved[key] for key in self.constraintKeys])
+
+        self.properties = []
+        self.propertyTargets = []
+        for prop, const, func in [('H', constH, 'enthalpy'), ('U', constU, 'internalEnergy'), ('V', constV, 'volume'), ('S', constS, 'entropy')]:
+            if const:
+                self.properties.append(prop)
+                self.propertyTargets.append(sum([getattr(phase, func)() for phase in self.outputPhases]))
+
+        if initialPhases is not None:
+            loadInitialPhases(self.outputPhases, initialPhases, 1.0, constT, constP)
+            self.T = self.outputPhases[0].T
+            self.P = self.outputPhases[0].P
+
+        self.setupPhases()
+        self.solve(iterations)
+
+    cdef setupPhases(ElementPotentialFinder self):
+        '''Builds the constraint matrix of each phase and its starting
+        amounts'''
+        import numpy
+        cdef dict rows = {}
+        cdef int i, j, E = len(self.constraintKeys)
+        for i in range(E):
+            rows[self.constraintKeys[i]] = i
+        self.sources = []
+        self.phaseIDs = []
+        self.keys = []
+        self.pure = []
+        self.allowed = []
+        self.matrices = []
+        self.amounts = []
+        self.ranges = []
+        self.active = []
+        cdef Phase phase
+        cdef CondensedSpeciesBlock block
+        cdef double lo, hi
+        for source in range(len(self.outputPhases)):
+            if isinstance(self.outputPhases[source], CondensedSpeciesBlock):
+                block = self.outputPhases[source]
+                A, allowed = self.constraintMatrix(block.species, rows)
+                ranges = block.validRanges()
+                for j in range(len(block.species)):
+                    n = block.amounts[j:j + 1].copy()
+                    n[~allowed[j:j + 1]] = 0
+                    self.addPhase(source, j, block.phaseIDs[j], [block.species[j]], True, allowed[j:j + 1], A[:, j:j + 1], n, ranges[j])
+                continue
+            phase = self.outputPhases[source]
+            keys = phase.components.keys()
+            A, allowed = self.constraintMatrix(keys, rows)
+            n = numpy.array(phase.components.values(), dtype=numpy.float64)
+            n[~allowed] = 0
+            phase.validRange(&lo, &hi)
+            self.addPhase(source, -1, phase.phase, keys, len(keys) == 1 and not isinstance(phase, IdealGasPhase), allowed, A, n, (lo, hi))
+
+        #The absent species of the mixtures are given a small amount,
+        #as their amounts are solved for as logarithms
+        cdef int p
+        for p in range(len(self.keys)):
+            n = self.amounts[p]
+            if self.active[p] and not self.pure[p]:
+                n[self.allowed[p] & (n <= 0)] = phaseInclusionFraction * n.sum() / len(n)
+
+    cdef tuple constraintMatrix(ElementPotentialFinder self, list keys, dict rows):
+        '''Returns the constraint x species matrix of the species keys,
+        and which of them may be present'''
+        import numpy
+        cdef int i, j
+        A = numpy.zeros((len(self.constraintKeys), len(keys)))
+        allowed = numpy.ones(len(keys), dtype=bool)
+        if self.elemental:
+            matrix = formulaMatrix(keys)
+            coefficients = matrix.matrixArray()
+            for i, element in enumerate(matrix.elements):
+                for j in range(len(keys)):
+                    if coefficients[i, j] != 0:
+                        if element in rows:
+                            A[rows[element], j] = coefficients[i, j]
+                        else:
+                            allowed[j] = False
+        else:
+            for j, key in enumerate(keys):
+                if key in rows:
+                    A[rows[key], j] = 1.0
+                else:
+                    allowed[j] = False
+        return A, allowed
+
+    cdef addPhase(ElementPotentialFinder self, int source, int position, str phaseID, list keys, bint pure, allowed, A, n, tuple validRange):
+        self.sources.append((source, position))
+        self.phaseIDs.append(phaseID)
+        self.keys.append(keys)
+        self.pure.append(pure)
+        self.allowed.append(allowed)
+        self.matrices.append(A)
+        self.amounts.append(n)
+        self.ranges.append(validRange)
+        self.active.append(bool(n.sum() > 0) and validRange[0] <= self.T <= validRange[1])
+
+    cdef tuple evaluate(ElementPotentialFinder self, int p):
+        '''Returns the derivatives of the phase p at the current
+        state (per mole for pure phases), along with its
+        (dimensionless) chemical potentials, partial molar enthalpies
+        and partial molar volumes.'''
+        import numpy
+        cdef Phase phase = self.outputPhases[self.sources[p][0]]
+        phase.T = self.T
+        phase.P = self.P
+        keys = self.keys[p]
+        n = self.amounts[p]
+        if self.pure[p]:
+            #Pure phases are evaluated for one mole, so that they have
+            #no mixing entropy even when absent
+            phase.components[keys[0]] = 1.0
+        else:
+            for j in range(len(keys)):
+                phase.components[keys[j]] = n[j]
+        cdef PhaseDerivatives d = phase.derivatives()
+        cdef double RT = R * self.T
+        return (d, numpy.array(d.chemicalPotentials.values()) / RT,
+                numpy.array(d.partialEnthalpies.values()) / RT,
+                numpy.array(d.partialVolumes.values()) * self.P / RT)
+
+    cdef tuple evaluatePures(ElementPotentialFinder self, list pures):
+        '''Returns the constraint matrix of the pure phases listed (a
+        column for each), their (dimensionless) chemical potentials,
+        molar enthalpies and molar volumes at the current state, and
+        the molar values of the conserved properties with their
+        derivatives with respect to T and P (as an array of 3 x
+        properties x phases). The species of each
+        CondensedSpeciesBlock are evaluated together.'''
+        import numpy
+        cdef int i, k, p, source, position, K = len(pures)
+        cdef double RT = R * self.T
+        cdef CondensedSpeciesBlock block
+        A = numpy.empty((len(self.constraintKeys), K))
+        mu = numpy.empty(K)
+        h = numpy.empty(K)
+        pv = numpy.empty(K)
+        props = numpy.empty((3, len(self.properties), K))
+        cdef dict blocks = {}
+        for k in range(K):
+            p = pures[k]
+            A[:, k] = self.matrices[p][:, 0]
+            source, position = self.sources[p]
+            if position >= 0:
+                blocks.setdefault(source, []).append((k, position))
+                continue
+            d, phasemu, phaseh, phasepv = self.evaluate(p)
+            mu[k] = phasemu[0]
+            h[k] = phaseh[0]
+            pv[k] = phasepv[0]
+            #A pure phase is evaluated for one mole, so its partial
+            #molar properties are also its molar properties
+            for i, prop in enumerate(self.properties):
+                partial, dT, dP = d.propertyDerivatives(prop)
+                props[:, i, k] = [partial.values()[0], dT, dP]
+        for source, entries in blocks.iteritems():
+            block = self.outputPhases[source]
+            block.T = self.T
+            block.P = self.P
+            columns = [k for k, position in entries]
+            positions = [position for k, position in entries]
+            mu[columns] = block.propertyDerivatives('G')[0][positions] / RT
+            h[columns] = block.propertyDerivatives('H')[0][positions] / RT
+            pv[columns] = block.molarvolumes[positions] * self.P / RT
+            for i, prop in enumerate(self.properties):
+                for j, values in enumerate(block.propertyDerivatives(prop)):
+                    props[j, i, columns] = values[positions]
+        return A, mu, h, pv, props
+
+    cdef double propertyScale(ElementPotentialFinder self, str prop):
+        '''The factor making a conserved property dimensionless'''
+        if prop == 'S':
+            return 1.0 / R
+        if prop == 'V':
+            return self.P / (R * self.T)
+        return 1.0 / (R * self.T)
+
+    cdef solve(ElementPotentialFinder self, int maxiterations):
+        '''Carries out the Newton iterations, adding and removing
+        phases, until the solution has converged with every absent
+        phase stable.'''
+        import numpy
+        cdef int E = len(self.constraintKeys)
+        cdef int nphases = len(self.keys)
+        cdef int p, i, iteration, row, size, colT, colP, leaving
+        cdef double RT, err, big, lam, Ntot, scale, residual
+        cdef double dlnT = 0, dlnP = 0
+        cdef PhaseDerivatives d
+        cdef bint removed
+        b = self.constraintTargets
+        pi = numpy.zeros(E)
+        self.iterations = 0
+        for iteration in range(1, maxiterations + 1):
+            self.iterations = iteration
+            self.checkRanges()
+            mixtures = [p for p in range(nphases) if self.active[p] and not self.pure[p]]
+            pures = [p for p in range(nphases) if self.active[p] and self.pure[p]]
+            if not mixtures and not pures:
+                raise Exception("findEquilibrium error: no phases remain in the solution")
+
+            #Layout of the unknowns: the element potentials, the
+            #change in the log of the amount of each mixture phase,
+            #the change in the amount of each pure phase, then the
+            #changes in ln(T) and ln(P) if they are free
+            size = E + len(mixtures) + len(pures)
+            colT = colP = -1
+            if not self.constT:
+                colT = size
+                size += 1
+            if not self.constP:
+                colP = size
+                size += 1
+            M = numpy.zeros((size, size))
+            rhs = numpy.zeros(size)
+            rhs[:E] = b
+            propertyRows = E + len(mixtures) + len(pures)
+            propertyValues = [0.0] * len(self.properties)
+            propertyTdT = [0.0] * len(self.properties)
+            propertyPdP = [0.0] * len(self.properties)
+            RT = R * self.T
+
+            evaluated = {}
+            for p in mixtures:
+                evaluated[p] = self.evaluate(p)
+
+            for row, p in enumerate(mixtures):
+                d, mu, h, pv = evaluated[p]
+                mask = self.allowed[p]
+                A = self.matrices[p][:, mask]
+                n = self.amounts[p][mask]
+                c = - mu[mask]
+                h = h[mask]
+                pv = pv[mask]
+                N = n.sum()
+                x = n / N
+                An = A * n
+                col = E + row
+                #Element balances
+                rhs[:E] -= A.dot(n) + An.dot(c)
+                M[:E, :E] += An.dot(A.T)
+                M[:E, col] += An.sum(axis=1)
+                #The sum of the species amounts is the phase amount
+                M[col, :E] = A.dot(x)
+                M[col, col] = x.sum() - 1.0
+                rhs[col] = - x.dot(c)
+                if colT >= 0:
+                    M[:E, colT] += An.dot(h)
+                    M[col, colT] = x.dot(h)
+                if colP >= 0:
+                    M[:E, colP] -= An.dot(pv)
+                    M[col, colP] = - x.dot(pv)
+                for i, prop in enumerate(self.properties):
+                    partial, dT, dP = d.propertyDerivatives(prop)
+                    scale = self.propertyScale(prop)
+                    w = numpy.array(partial.values())[mask] * n * scale
+                    M[propertyRows + i, :E] += A.dot(w)
+                    M[propertyRows + i, col] += w.sum()
+                    rhs[propertyRows + i] -= w.dot(c)
+                    if colT >= 0:
+                        M[propertyRows + i, colT] += w.dot(h)
+                    if colP >= 0:
+                        M[propertyRows + i, colP] -= w.dot(pv)
+                    propertyTdT[i] += dT
+                    propertyPdP[i] += dP
+                    propertyValues[i] += self.propertyValue(d, prop)
+
+            #The pure phases are evaluated together
+            A, mu, h, pv, props = self.evaluatePures(pures)
+            n = numpy.array([self.amounts[p][0] for p in pures])
+            cols = numpy.arange(E + len(mixtures), E + len(mixtures) + len(pures))
+            rhs[:E] -= A.dot(n)
+            M[:E, cols] += A
+            #The chemical potential of each is the sum of the element
+            #potentials
+            M[cols, :E] = A.T
+            rhs[cols] = mu
+            if colT >= 0:
+                M[cols, colT] = h
+            if colP >= 0:
+                M[cols, colP] = - pv
+            for i, prop in enumerate(self.properties):
+                M[propertyRows + i, cols] += props[0, i] * self.propertyScale(prop)
+                propertyValues[i] += props[0, i].dot(n)
+                propertyTdT[i] += props[1, i].dot(n)
+                propertyPdP[i] += props[2, i].dot(n)
+
+            for i, prop in enumerate(self.properties):
+                scale = self.propertyScale(prop)
+                rhs[propertyRows + i] += (self.propertyTargets[i] - propertyValues[i]) * scale
+                if colT >= 0:
+                    M[propertyRows + i, colT] += self.T * propertyTdT[i] * scale
+                if colP >= 0:
+                    M[propertyRows + i, colP] += self.P * propertyPdP[i] * scale
+
+            #Remove the causes of a singular system before solving it
+            if self.removeDependentPhase(pures, A, mu, h, pv, colT >= 0, colP >= 0):
+                continue
+            if self.includeSpanningPhase(mixtures + pures):
+                continue
+            try:
+                solution = numpy.linalg.solve(M, rhs)
+            except numpy.linalg.LinAlgError:
+                solution = numpy.linalg.lstsq(M, rhs, rcond=None)[0]
+            #A least squares solution is never taken as converged
+            residual = numpy.abs(M.dot(solution) - rhs).max()
+            pi = solution[:E]
+            dlnT = solution[colT] if colT >= 0 else 0.0
+            dlnP = solution[colP] if colP >= 0 else 0.0
+
+            #The corrections to the amounts of each species, the
+            #convergence error and the step limit
+            Ntot = sum([self.amounts[p].sum() for p in mixtures + pures])
+            err = max(fabs(dlnT), fabs(dlnP))
+            big = max(5 * fabs(dlnT), 5 * fabs(dlnP))
+            lam = 1.0
+            corrections = {}
+            for row, p in enumerate(mixtures):
+                d, mu, h, pv = evaluated[p]
+                mask = self.allowed[p]
+                n = self.amounts[p][mask]
+                N = n.sum()
+                dlnN = solution[E + row]
+                dlnn = - mu[mask] + self.matrices[p][:, mask].T.dot(pi) + dlnN + h[mask] * dlnT - pv[mask] * dlnP
+                corrections[p] = dlnn
+                err = max(err, fabs(dlnN) * N / Ntot, numpy.abs(n * dlnn).sum() / Ntot)
+                big = max(big, fabs(dlnN))
+                major = numpy.log(n / N) > traceLogFraction
+                if major.any():
+                    big = max(big, numpy.abs(dlnn[major]).max())
+                #Trace species may not grow past a mole fraction of
+                #1e-4 in a single step
+                for lnx, step in zip(numpy.log(n / N)[~major], dlnn[~major]):
+                    if step - dlnN > 0:
+                        lam = min(lam, fabs((-lnx - 9.2103404) / (step - dlnN)))
+            for row, p in enumerate(pures):
+                corrections[p] = solution[E + len(mixtures) + row]
+                err = max(err, fabs(corrections[p]) / Ntot)
+            if big > 2:
+                lam = min(lam, 2 / big)
+            #The step ends where the first pure phase runs out, and
+            #that phase is removed
+            leaving = -1
+            for p in pures:
+                if corrections[p] < 0 and self.amounts[p][0] + lam * corrections[p] <= 0:
+                    lam = self.amounts[p][0] / - corrections[p]
+                    leaving = p
+
+            if self.debug:
+                print "Iteration", iteration, "error", err, "step", lam, "T", self.T, "P", self.P, "phases", mixtures + pures
+
+            #Apply the step
+            removed = False
+            for p in mixtures:
+                mask = self.allowed[p]
+                n = self.amounts[p]
+                lnn = numpy.log(n[mask]) + lam * corrections[p]
+                lnn = numpy.maximum(lnn, numpy.log(numpy.exp(lnn).sum()) - 690)
+                n[mask] = numpy.exp(lnn)
+                if n.sum() < phaseRemovalFraction * Ntot:
+                    n[:] = 0
+                    self.active[p] = False
+                    removed = True
+            for p in pures:
+                n = self.amounts[p]
+                n[0] = max(n[0] + lam * corrections[p], 0.0)
+                if p == leaving:
+                    n[0] = 0
+                    self.active[p] = False
+                    removed = True
+            if colT >= 0:
+                #The temperature is kept within the data of the mixtures
+                lo, hi = self.Tmin, self.Tmax
+                for p in mixtures:
+                    lo = max(lo, self.ranges[p][0])
+                    hi = min(hi, self.ranges[p][1])
+                self.T = min(max(self.T * exp(lam * dlnT), lo), hi)
+            if colP >= 0:
+                self.P *= exp(lam * dlnP)
+
+            if err < self.xtol and lam == 1.0 and not removed and residual < self.xtol * max(1.0, numpy.abs(rhs).max()):
+                #Converged with this set of phases, so check if any of
+                #the absent phases would be more stable
+                if not self.includePhase(pi):
+                    self.finish(pi)
+                    return
+        raise Exception("findEquilibrium error: the element potential method did not converge in "+str(maxiterations)+" iterations")
+
+    cdef double propertyValue(ElementPotentialFinder self, PhaseDerivatives d, str prop):
+        if prop == 'H':
+            return d.state.enthalpy
+        if prop == 'U':
+            return d.state.internalEnergy
+        if prop == 'V':
+            return d.state.volume
+        return d.state.entropy
+
+    cdef checkRanges(ElementPotentialFinder self):
+        '''Removes the phases whose data does not cover the current
+        temperature. The amount of a pure phase is passed to another
+        pure phase of the same species, where there is one.'''
+        cdef int p, q
+        for p in range(len(self.keys)):
+            lo, hi = self.ranges[p]
+            if not self.active[p] or lo <= self.T <= hi:
+                continue
+            self.active[p] = False
+            if self.pure[p]:
+                for q in range(len(self.keys)):
+                    if q != p and self.pure[q] and self.keys[q] == self.keys[p] and self.ranges[q][0] <= self.T <= self.ranges[q][1]:
+                        self.amounts[q][0] += self.amounts[p][0]
+                        self.active[q] = True
+                        break
+            self.amounts[p][:] = 0
+
+    cdef bint removeDependentPhase(ElementPotentialFinder self, list pures, A, mu, h, pv, bint freeT, bint freeP):
+        '''If the equations of the pure phases present are not
+        independent, reacts the phases (keeping the element balances
+        and lowering the Gibbs free energy) until one of them runs out,
+        and removes it. Returns False if they are independent. A, mu, h
+        and pv are as given by evaluatePures.'''
+        import numpy
+        if len(pures) < 2:
+            return False
+        rows = [A]
+        if freeT:
+            rows.append(h)
+        if freeP:
+            rows.append(- pv)
+        u, singular, vt = numpy.linalg.svd(numpy.vstack(rows))
+        if len(singular) == len(pures) and singular[-1] > 1e-9 * singular[0]:
+            return False
+        #The reaction between the phases
+        reaction = vt[-1]
+        if reaction.dot(mu) > 0:
+            reaction = - reaction
+        cdef int k, leaving = -1
+        cdef double extent = 0
+        for k in range(len(pures)):
+            if reaction[k] < -1e-12 and (leaving < 0 or self.amounts[pures[k]][0] < extent * - reaction[k]):
+                extent = self.amounts[pures[k]][0] / - reaction[k]
+                leaving = pures[k]
+        for k in range(len(pures)):
+            self.amounts[pures[k]][0] = max(self.amounts[pures[k]][0] + extent * reaction[k], 0.0)
+        self.amounts[leaving][0] = 0
+        self.active[leaving] = False
+        if self.debug:
+            print "Removing dependent phase", leaving, self.phaseIDs[leaving], self.keys[leaving]
+        return True
+
+    cdef standardPotentials(ElementPotentialFinder self, int p):
+        '''Returns the (dimensionless) standard chemical potentials of
+        the species of the absent mixture p'''
+        mask = self.allowed[p]
+        #Evaluated from an equimolar mixture
+        self.amounts[p][mask] = 1.0
+        d, mu, h, pv = self.evaluate(p)
+        self.amounts[p][:] = 0
+        return mu - log(1.0 / mask.sum())
+
+    cdef list absentPhases(ElementPotentialFinder self):
+        '''Returns the absent phases which could be added to the
+        solution'''
+        cdef int p
+        cdef list absent = []
+        for p in range(len(self.keys)):
+            lo, hi = self.ranges[p]
+            if not self.active[p] and self.allowed[p].any() and lo <= self.T <= hi:
+                absent.append(p)
+        return absent
+
+    cdef bint includeSpanningPhase(ElementPotentialFinder self, list present):
+        '''Adds a phase if the phases present cannot hold the conserved
+        elements in their proportions (e.g., if none of them hold one
+        of the elements), returning False if they can. Of the phases
+        supplying the missing combination of elements, the one with the
+        lowest standard chemical potential per unit supplied is
+        added.'''
+        import numpy
+        cdef int p, k, best = -1
+        cdef double bestScore = 0, score
+        b = self.constraintTargets
+        S = numpy.hstack([self.matrices[p][:, self.allowed[p]] for p in present])
+        u, singular, vt = numpy.linalg.svd(S)
+        rank = (singular > 1e-9 * singular[0]).sum()
+        #The combinations of the elements which the phases present
+        #do not hold, and which are needed
+        missing = None
+        for w in u[:, rank:].T:
+            if fabs(w.dot(b)) > 1e-9 * numpy.abs(b).max():
+                missing = w if w.dot(b) > 0 else - w
+                break
+        if missing is None:
+            return False
+        absent = self.absentPhases()
+        pures = [p for p in absent if self.pure[p]]
+        if pures:
+            A, mu, h, pv, props = self.evaluatePures(pures)
+            supplied = missing.dot(A)
+            for k in numpy.flatnonzero(supplied > 1e-9):
+                score = mu[k] / supplied[k]
+                if best < 0 or score < bestScore:
+                    best = pures[k]
+                    bestScore = score
+        for p in absent:
+            if self.pure[p]:
+                continue
+            supplied = missing.dot(self.matrices[p])
+            mask = self.allowed[p] & (supplied > 1e-9)
+            if not mask.any():
+                continue
+            score = (self.standardPotentials(p)[mask] / supplied[mask]).min()
+            if best < 0 or score < bestScore:
+                best = p
+                bestScore = score
+        if best < 0:
+            raise Exception("findEquilibrium error: the phases available cannot hold the conserved elements at "+str(self.T)+"K")
+        #A pure phase starts empty and grows to hold the elements, a
+        #mixture starts as a small equimolar amount
+        mask = self.allowed[best]
+        self.amounts[best][:] = 0
+        if not self.pure[best]:
+            Ntot = sum([self.amounts[p].sum() for p in present])
+            self.amounts[best][mask] = phaseInclusionFraction * max(Ntot, 1.0) / mask.sum()
+        self.active[best] = True
+        if self.debug:
+            print "Adding phase", best, self.phaseIDs[best], self.keys[best], "to hold the elements"
+        return True
+
+    cdef bint includePhase(ElementPotentialFinder self, pi):
+        '''Adds the absent phase which is furthest from being stable
+        with the element potentials pi, returning False if all absent
+        phases are stable.'''
+        import numpy
+        cdef int p, q, k, best = -1
+        cdef double bestScore = 1e-8, score
+        absent = self.absentPhases()
+        pures = [p for p in absent if self.pure[p]]
+        if pures:
+            A, mu, h, pv, props = self.evaluatePures(pures)
+            scores = A.T.dot(pi) - mu
+            k = scores.argmax()
+            if scores[k] > bestScore:
+                best = pures[k]
+                bestScore = scores[k]
+        for p in absent:
+            if self.pure[p]:
+                continue
+            mask = self.allowed[p]
+            mu0 = self.standardPotentials(p)[mask]
+            score = log(numpy.exp(self.matrices[p][:, mask].T.dot(pi) - mu0).sum())
+            if score > bestScore:
+                best = p
+                bestScore = score
+        if best < 0:
+            return False
+
+        mask = self.allowed[best]
+        if self.pure[best]:
+            self.amounts[best][0] = 0
+            #A pure species may only be in one of its phases at
+            #constant T and P
+            if self.constT and self.constP:
+                for q in range(len(self.keys)):
+                    if self.active[q] and self.pure[q] and self.keys[q] == self.keys[best]:
+                        self.amounts[best][0] = self.amounts[q][0]
+                        self.amounts[q][:] = 0
+                        self.active[q] = False
+        else:
+            #The mixture starts with the composition in equilibrium
+            #with the element potentials
+            mu0 = self.standardPotentials(best)[mask]
+            x = numpy.exp(self.matrices[best][:, mask].T.dot(pi) - mu0)
+            x /= x.sum()
+            Ntot = sum([self.amounts[p].sum() for p in range(len(self.keys)) if self.active[p]])
+            self.amounts[best][mask] = numpy.maximum(x, 1e-300) * phaseInclusionFraction * Ntot
+        self.active[best] = True
+        if self.debug:
+            print "Adding phase", best, self.phaseIDs[best], self.keys[best]
+        return True
+
+    cdef finish(ElementPotentialFinder self, pi):
+        '''Checks that the pure phases present are in equilibrium with
+        the element potentials, and stores the solution in the output
+        phases'''
+        import numpy
+        cdef int p, j, k, source, position
+        pures = [p for p in range(len(self.keys)) if self.active[p] and self.pure[p]]
+        if pures:
+            A, mu, h, pv, props = self.evaluatePures(pures)
+            for k in numpy.flatnonzero(numpy.abs(A.T.dot(pi) - mu) > 1e-6):
+                p = pures[k]
+                raise Exception("findEquilibrium error: the "+self.phaseIDs[p]+" phase of "+self.keys[p][0]+" is not in equilibrium with the element potentials")
+        for phase in self.outputPhases:
+            phase.T = self.T
+            phase.P = self.P
+        for p in range(len(self.keys)):
+            if not self.active[p]:
+                self.amounts[p][:] = 0
+            source, position = self.sources[p]
+            phase = self.outputPhases[source]
+            if position >= 0:
+                phase.amounts[position] = self.amounts[p][0]
+                continue
+            for j in range(len(self.keys[p])):
+                phase.components[self.keys[p][j]] = self.amounts[p][j]
+        self.elementPotentials = Components(dict(zip(self.constraintKeys, (pi * R * self.T).tolist())))
@@ -2,20 +2,55 @@
 # distutils: language = c++
 # cython: profile=True
 
-from chemeng.phase cimport Phase
-from chemeng.phase import IdealGasPhase
+from chemeng.phase cimport Phase, PhaseState, PhaseDerivatives
+from chemeng.phase import IdealGasPhase, CondensedSpeciesBlock
 from chemeng.components cimport Components
-import pyOpt
+from chemeng.components import formulaMatrix
+from chemeng.optimisers import optimiserBackend
 import math
 
 cpdef double R = 8.3144621
 
+#The amounts of the species of mixtures are bounded below by a trace
+#amount (the traceAmount argument of EquilibriumFinder, as a fraction
+#of the input moles) rather than by zero, where the derivatives of the
+#mixing entropy are infinite. The objective and constraints are then
+#smooth wherever the optimiser searches, so that their analytic
+#gradients are exact. Species which cannot form from the inputs, and
+#phases of a single species, are still bounded by zero.
+
 cpdef Components getTotalSpecies(list phaselist):
     cdef Components retval = Components({})
     for phase in phaselist:
         retval += phase.components
     return retval
 
+def loadInitialPhases(list outputPhases, list initialPhases, double scale, bint constT, bint constP):
+    '''Sets the amounts of the output phases (multiplied by scale)
+    from initialPhases, a list of phases matching outputPhases (or None
+    to leave an output phase as it is), along with their temperature
+    and pressure, unless these are held constant. This is used to
+    start a solver from a previous solution.'''
+    if len(initialPhases) != len(outputPhases):
+        raise Exception("The initial phases must match the input phases")
+    initialT = initialP = None
+    for phase, initial in zip(outputPhases, initialPhases):
+        if initial is None:
+            continue
+        if isinstance(phase, CondensedSpeciesBlock):
+            phase.amounts = initial.amounts * scale
+        else:
+            for key in phase.components.keys():
+                phase.components[key] = initial.components[key] * scale
+        if initialT is None:
+            initialT = initial.T
+            initialP = initial.P
+    for phase in outputPhases:
+        if not constT and initialT is not None:
+            phase.T = initialT
+        if not constP and initialP is not None:
+            phase.P = initialP
+
 cdef class EquilibriumFinder:
     cdef public list inputPhases
     cdef public list outputPhases
@@ -32,6 +67,13 @@ cdef class EquilibriumFinder:
     cdef public Components inputSpecies
     cdef public Components inputElements
     cdef public list constraintTargets
+    cdef public bint analyticGradients
+    #The error raised while evaluating the gradients, if they failed
+    cdef public object evaluationError
+    #The number of calls made by the optimiser to obj_func and grad_func
+    cdef public int objEvaluations
+    cdef public int gradEvaluations
+    cdef list linearEntries
 
     cpdef restoreStateVector(EquilibriumFinder self, statevec):
         '''This loads the optimisation variables (stored in a
@@ -60,10 +102,29 @@ cdef class EquilibriumFinder:
                 phase.P = statevec[var_count] * self.inputPhases[0].P
             var_count +=1
 
+    cpdef bint canForm(EquilibriumFinder self, str key):
+        '''Returns True if the species key can be formed from the
+        inputs (while satisfying the constraints)'''
+        if not self.elemental:
+            return self.inputSpecies[key] > 0
+        cdef Components formula = Components({key:1}).elementalComposition()
+        for element in formula.keys():
+            if self.inputElements[element] <= 0:
+                return False
+        return True
+
+    cpdef list phaseStates(EquilibriumFinder self):
+        '''Returns the state (see Phase.state) of each of the output
+        phases, from which the objective and constraints are found'''
+        cdef Phase phase
+        return [phase.state() for phase in self.outputPhases]
+
     #Create the constraints
-    cpdef list constraint_func(EquilibriumFinder self):
+    cpdef list constraint_func(EquilibriumFinder self, list states=None):
         '''This function returns a list of the constrained values of
-        the system, depending on what is held constant'''
+        the system, depending on what is held constant. states are
+        the phaseStates() of the current state, if already
+        calculated.'''
         cdef Components currentSpecies = getTotalSpecies(self.outputPhases)
         cdef Components currentElements = currentSpecies.elementalComposition()
         constraintvals=[]
@@ -74,91 +135,275 @@ cdef class EquilibriumFinder:
             for key in self.inputSpecies.keys():
                 constraintvals.append(currentSpecies[key])
 
+        if not (self.constH or self.constU or self.constV or self.constS):
+            return constraintvals
+        if states is None:
+            states = self.phaseStates()
         cdef double sumX
-        cdef Phase phase
+        cdef PhaseState state
         if self.constH:
             sumX = 0
-            for phase in self.outputPhases:
-                sumX += phase.enthalpy()
+            for state in states:
+                sumX += state.enthalpy
             constraintvals.append(sumX)
         if self.constU:
             sumX = 0
-            for phase in self.outputPhases:
-                sumX += phase.internalEnergy()
+            for state in states:
+                sumX += state.internalEnergy
             constraintvals.append(sumX)
         if self.constV:
             sumX = 0
-            for phase in self.outputPhases:
-                sumX += phase.volume()
+            for state in states:
+                sumX += state.volume
             constraintvals.append(sumX)
         if self.constS:
             sumX = 0
-            for phase in self.outputPhases:
-                sumX += phase.entropy()
+            for state in states:
+                sumX += state.entropy
             constraintvals.append(sumX)
         #Constant temperature and pressure are handled in
         #restoreStateVector, where we decided wheter to use them as
         #optimisation variables or not
         return constraintvals
 
-    cpdef double optimisation_func(EquilibriumFinder self) except +:
+    cpdef double optimisation_func(EquilibriumFinder self, list states=None) except +:
         '''This function returns the required thermodynamic potential
-        to be minimised depending on the process studied (what is held constant).'''
+        to be minimised depending on the process studied (what is held
+        constant). states are the phaseStates() of the current state,
+        if already calculated.'''
         cdef double total = 0
-        cdef Phase phase
+        cdef PhaseState state
+        if states is None:
+            states = self.phaseStates()
         if (self.constT and self.constP):
-            for phase in self.outputPhases:
-                total += phase.gibbsFreeEnergy()
+            for state in states:
+                total += state.gibbsFreeEnergy
             #Using the dimensionless form, G / (R * T)
             total /= R * self.inputPhases[0].T
         elif (self.constT and self.constV):
-            for phase in self.outputPhases:
-                total += phase.helmholtzFreeEnergy()
+            for state in states:
+                total += state.helmholtzFreeEnergy
             #Using the dimensionless form, A / (R * T)
             total /= R * self.inputPhases[0].T
         elif (self.constH and self.constP) or (self.constU and self.constV):
-            for phase in self.outputPhases:
-                total -= phase.entropy()
+            for state in states:
+                total -= state.entropy
             #Using the dimensionless form, S / R
             total /= R
         elif (self.constS and self.constV):
-            for phase in self.outputPhases:
-                total += phase.internalEnergy()
+            for state in states:
+                total += state.internalEnergy
+            #Using the dimensionless form, U / (R * T)
+            total /= R * self.inputPhases[0].T
         elif (self.constS and self.constP):
-            for phase in self.outputPhases:
-                total += phase.enthalpy()
+            for state in states:
+                total += state.enthalpy
+            #Using the dimensionless form, H / (R * T)
+            total /= R * self.inputPhases[0].T
         else:
             raise Exception("Error, unanticipated combination of constant state variables")
         return total
 
+    cpdef list phaseDerivatives(EquilibriumFinder self):
+        '''Returns the derivatives of each of the output phases'''
+        cdef Phase phase
+        return [phase.derivatives() for phase in self.outputPhases]
+
+    cpdef list propertyGradient(EquilibriumFinder self, str prop, list derivatives=None):
+        '''Returns the derivatives of the total of a property of the
+        output phases (one of 'G', 'A', 'S', 'U', 'H' or 'V') with
+        respect to each of the optimisation variables. derivatives
+        are the phaseDerivatives() of the current state, if already
+        calculated.'''
+        cdef list gradient = []
+        cdef double dT = 0, dP = 0, phasedT, phasedP
+        cdef Phase phase
+        cdef PhaseDerivatives d
+        cdef Components partial
+        cdef Py_ssize_t p
+        if derivatives is None:
+            derivatives = self.phaseDerivatives()
+        for p in range(len(self.outputPhases)):
+            phase = self.outputPhases[p]
+            d = derivatives[p]
+            partial, phasedT, phasedP = d.propertyDerivatives(prop)
+            dT += phasedT
+            dP += phasedP
+            for key in phase.components.keys():
+                if self.logMolar:
+                    #The variables are the logarithms of the amounts
+                    gradient.append(partial[key] * phase.components[key])
+                else:
+                    gradient.append(partial[key])
+
+        #The temperature and pressure variables are scaled by their
+        #input values
+        if not self.constT:
+            gradient.append(dT * self.inputPhases[0].T)
+        if not self.constP:
+            gradient.append(dP * self.inputPhases[0].P)
+        return gradient
+
+    cpdef list objectiveGradient(EquilibriumFinder self, list derivatives=None):
+        '''Returns the derivatives of optimisation_func with respect
+        to each of the optimisation variables.'''
+        cdef list gradient
+        cdef double scale
+        if (self.constT and self.constP):
+            gradient = self.propertyGradient('G', derivatives)
+            scale = 1.0 / (R * self.inputPhases[0].T)
+        elif (self.constT and self.constV):
+            gradient = self.propertyGradient('A', derivatives)
+            scale = 1.0 / (R * self.inputPhases[0].T)
+        elif (self.constH and self.constP) or (self.constU and self.constV):
+            gradient = self.propertyGradient('S', derivatives)
+            scale = -1.0 / R
+        elif (self.constS and self.constV):
+            gradient = self.propertyGradient('U', derivatives)
+            scale = 1.0 / (R * self.inputPhases[0].T)
+        elif (self.constS and self.constP):
+            gradient = self.propertyGradient('H', derivatives)
+            scale = 1.0 / (R * self.inputPhases[0].T)
+        else:
+            raise Exception("Error, unanticipated combination of constant state variables")
+        return [value * scale for value in gradient]
+
+    cpdef list linearConstraintEntries(EquilibriumFinder self):
+        '''Returns the nonzero entries, as (constraint, variable,
+        coefficient) tuples, of the derivatives of the element (or
+        species) balances with respect to the molar amounts. These
+        constraints are linear in the amounts, with the formula
+        matrix as their coefficients, so the entries are only found
+        once.'''
+        if self.linearEntries is not None:
+            return self.linearEntries
+        cdef list keys
+        if self.elemental:
+            keys = self.inputElements.keys()
+        else:
+            keys = self.inputSpecies.keys()
+        cdef dict rows = {}
+        cdef list entries = []
+        cdef int column = 0, i, j
+        for i in range(len(keys)):
+            rows[keys[i]] = i
+        cdef Phase phase
+        for phase in self.outputPhases:
+            keys = phase.components.keys()
+            if self.elemental:
+                matrix = formulaMatrix(keys)
+                coefficients = matrix.matrixArray()
+                for i, element in enumerate(matrix.elements):
+                    if element in rows:
+                        for j in range(len(keys)):
+                            if coefficients[i, j] != 0:
+                                entries.append((rows[element], column + j, float(coefficients[i, j])))
+            else:
+                for j, key in enumerate(keys):
+                    if key in rows:
+                        entries.append((rows[key], column + j, 1.0))
+            column += len(keys)
+        self.linearEntries = entries
+        return entries
+
+    cpdef list constraintJacobian(EquilibriumFinder self, list derivatives=None):
+        '''Returns the derivatives of each constraint (in the order
+        of constraint_func) with respect to each of the optimisation
+        variables.'''
+        cdef list amounts = []
+        cdef Phase phase
+        for phase in self.outputPhases:
+            amounts.extend(phase.components.values())
+        cdef int nvars = len(amounts) + (not self.constT) + (not self.constP)
+        cdef int nlinear
+        if self.elemental:
+            nlinear = len(self.inputElements)
+        else:
+            nlinear = len(self.inputSpecies)
+        cdef list jacobian = []
+        cdef int row, column
+        for row in range(nlinear):
+            jacobian.append([0.0] * nvars)
+        cdef double coefficient
+        for row, column, coefficient in self.linearConstraintEntries():
+            if self.logMolar:
+                #The variables are the logarithms of the amounts
+                jacobian[row][column] = coefficient * amounts[column]
+            else:
+                jacobian[row][column] = coefficient
+
+        if derivatives is None and (self.constH or self.constU or self.constV or self.constS):
+            derivatives = self.phaseDerivatives()
+        if self.constH:
+            jacobian.append(self.propertyGradient('H', derivatives))
+        if self.constU:
+            jacobian.append(self.propertyGradient('U', derivatives))
+        if self.constV:
+            jacobian.append(self.propertyGradient('V', derivatives))
+        if self.constS:
+            jacobian.append(self.propertyGradient('S', derivatives))
+        return jacobian
+
+    cpdef grad_func(EquilibriumFinder self, variables, f, g):
+        '''Returns the gradient of the objective function, the
+        Jacobian of the constraints, and a success(0)/fail(-1)
+        parameter.'''
+        import numpy
+        self.gradEvaluations += 1
+        try:
+            self.restoreStateVector(variables)
+            derivatives = self.phaseDerivatives()
+            return numpy.array(self.objectiveGradient(derivatives)), numpy.array(self.constraintJacobian(derivatives)), 0
+        except (ArithmeticError, ValueError) as e:
+            #A state the properties cannot be evaluated at (e.g., a
+            #zero temperature or pressure)
+            self.evaluationError = e
+            return numpy.zeros(len(variables)), numpy.zeros((len(self.constraintTargets), len(variables))), -1
+
     cpdef obj_func(EquilibriumFinder self, variables):
         '''Returns the objective function to be minimised, a list of
         constraint values which must be zero, and a
         success(0)/fail(-1) parameter.'''
         cdef double f
-        cdef list constraints
+        cdef list constraints, states
         cdef int i
+        self.objEvaluations += 1
         try:
             self.restoreStateVector(variables)
+            #The properties of each phase are found in a single pass
+            states = self.phaseStates()
             #Remove any constant offset of the objective function
-            f = self.optimisation_func() - self.initialObjVal
+            f = self.optimisation_func(states) - self.initialObjVal
             #Take the current constraint values and subtract the
             #target values, as the optimizer expects constraints to
             #have a value of zero when they are satisfied.
-            constraints = self.constraint_func()
+            constraints = self.constraint_func(states)
             for i in range(len(constraints)):
                 constraints[i] -= self.constraintTargets[i]
             return f, constraints, 0
         except:
             return 0, self.constraintTargets, -1
 
-    def __init__(EquilibriumFinder self, list inputPhases, bint constT = False, bint constP = False, bint constH = False, bint constV = False, bint constU = False, bint constS = False, bint elemental = False, double Tmax = 20000, double Pmax = 500, double xtol=1e-5, bint logMolar = False, bint debug=False, double Tmin = 200.00001, iterations=50):
-        '''Sets up and runs the optimisation process to find equilibrium'''
+    def __init__(EquilibriumFinder self, list inputPhases, bint constT = False, bint constP = False, bint constH = False, bint constV = False, bint constU = False, bint constS = False, bint elemental = False, double Tmax = 20000, double Pmax = 500, double xtol=1e-5, bint logMolar = False, bint debug=False, double Tmin = 200.00001, iterations=50, bint analyticGradients = True, backend=None, initialPhases=None, double Pmin = 1.0, double traceAmount = 1e-8):
+        '''Sets up and runs the optimisation process to find
+        equilibrium. backend is the optimiser backend or its name
+        (see chemeng.optimisers). The optimisation starts from the
+        input phases, or from initialPhases if given (see
+        loadInitialPhases). The gradients are found analytically,
+        or by finite differences if analyticGradients is unset (which
+        takes around ten times the evaluations to reach the same
+        equilibrium). Pmin is the lowest pressure (Pa) searched when
+        the pressure is free, and traceAmount the lowest amount of
+        the species of mixtures (see above).'''
 
         #Sanity checks
         if (constT + constP + constH + constV + constU + constS) != 2:
             raise Exception("EquilibriumFinder requires exactly 2 constant state variables from T, P, H, V, U, and S.")
 
+        for inputPhase in inputPhases:
+            if isinstance(inputPhase, CondensedSpeciesBlock):
+                raise Exception("findEquilibrium error: a CondensedSpeciesBlock may only be solved with method='ElementPotential'")
+
         #Data member initialisation
         self.constT = constT
         self.constP = constP
@@ -167,6 +412,7 @@ cdef class EquilibriumFinder:
         self.constU = constU
         self.constS = constS
         self.logMolar = logMolar
+        self.analyticGradients = analyticGradients
         self.elemental = elemental
         self.inputPhases = inputPhases
         self.outputPhases = []
@@ -203,82 +449,200 @@ cdef class EquilibriumFinder:
         
         #Determine the initial value of the optimisation function, so
         #that we can remove the constant offset of its value.
-        self.initialObjVal = self.optimisation_func()
+        cdef list states = self.phaseStates()
+        self.initialObjVal = self.optimisation_func(states)
 
         #Grab the current values of the constrained variables. These
         #are the target values the optimisation must satisfy.
-        self.constraintTargets = self.constraint_func()
-        
-        #########  Create Optimisation System
-        opt_prob = pyOpt.Optimization('Entropy maximisation', self.obj_func)
-        opt_prob.addObj('ThermoPotential')
-        opt = pyOpt.pySLSQP.SLSQP()
+        self.constraintTargets = self.constraint_func(states)
 
-        ######### Step size
-        cdef double stepsize = xtol
-        opt.setOption('ACC', stepsize)
-        opt.setOption('MAXIT', iterations)
-
-        #########  Load optimisation variables and their bounds        
+        #Start from the initial phases instead, if given
+        if initialPhases is not None:
+            loadInitialPhases(self.outputPhases, initialPhases, 1.0 / self.inputMoles, self.constT, self.constP)
+        
+        #########  Load optimisation variables and their bounds
         #Here, we also name the variables within the optimiser to
         #enable debugging later on.
+        cdef list variables = []
         cdef int phase_count = 0
         for phase in self.outputPhases:
             phase_count += 1
             for key, moles in phase.components.iteritems():
                 if self.logMolar:
                     if moles == 0.0:
-                        opt_prob.addVar(str(phase_count)+':ln('+key+')', type='c', value=math.log(xtol))
+                        variables.append((str(phase_count)+':ln('+key+')', math.log(xtol), None, None))
                     else:
-                        opt_prob.addVar(str(phase_count)+':ln('+key+')', type='c', value=math.log(moles))
+                        variables.append((str(phase_count)+':ln('+key+')', math.log(moles), None, None))
                 else:
-                    opt_prob.addVar(str(phase_count)+':'+key, type='c', value=moles, lower=0.0)
-             
+                    lower = 0.0
+                    if len(phase.components) > 1 and self.canForm(key):
+                        lower = traceAmount
+                    variables.append((str(phase_count)+':'+key, max(moles, lower), lower, None))
+
         if not self.constT:
-            opt_prob.addVar('T/Tinitial', type='c', value=1.0, lower= Tmin / self.inputPhases[0].T)
-            
+            variables.append(('T/Tinitial', self.outputPhases[0].T / self.inputPhases[0].T, Tmin / self.inputPhases[0].T, None))
+
         if not self.constP:
-            opt_prob.addVar('P/Pinitial', type='c', value=1.0, lower=0)
-        
+            variables.append(('P/Pinitial', self.outputPhases[0].P / self.inputPhases[0].P, Pmin / self.inputPhases[0].P, None))
 
         #########  Load optimisation constraints
+        cdef list constraints = []
         if self.elemental:
             for key in self.inputElements.keys():
-                opt_prob.addCon('Element:'+key, type='e')
+                constraints.append('Element:'+key)
         else: #not elemental
             for key in self.inputSpecies.keys():
-                opt_prob.addCon('Species:'+key, type='e')
+                constraints.append('Species:'+key)
 
         if self.constH:
-            opt_prob.addCon('Enthalpy', type='e')
+            constraints.append('Enthalpy')
         if self.constU:
-            opt_prob.addCon('InternalE', type='e')
+            constraints.append('InternalE')
         if self.constV:
-            opt_prob.addCon('Volume', type='e')
+            constraints.append('Volume')
         if self.constS:
-            opt_prob.addCon('Entropy', type='e')
+            constraints.append('Entropy')
 
         ######### Run optimisation
-        if debug:
-            print opt_prob
-            opt.setOption('IPRINT', 0)
-
-        [fstr, xstr, inform] = opt(opt_prob, sens_type='FD', disp_opts=debug)
-    
-        if inform['value'] != 0:
-            raise Exception("findEquilibrium error:"+str(inform['value'])+": "+inform['text'])
-
-        if debug:
-            print fstr #The optimial minimum value of the objective function
-            print xstr #The final state vector
-            print inform #dictionary of 
-            print opt_prob._solutions[0]
+        #The gradients are found by finite differences, or
+        #analytically from the derivatives of the phases if requested
+        self.objEvaluations = 0
+        self.gradEvaluations = 0
+        self.evaluationError = None
+        xstr = optimiserBackend(backend).minimise(self, variables, constraints, xtol, iterations, self.analyticGradients, debug)
 
         #recreate the output system, ready for output
         self.restoreStateVector(xstr)
         for phase in self.outputPhases:
             phase.components *= self.inputMoles
 
+def equilibriumSolver(*args, **kwrdargs):
+    '''Returns the solver of an equilibrium problem, see
+    findEquilibrium.'''
+    method = kwrdargs.pop('method', 'SLSQP')
+    if method == 'SLSQP':
+        return EquilibriumFinder(*args, **kwrdargs)
+    elif method == 'ElementPotential':
+        from chemeng.elementpotential import ElementPotentialFinder
+        return ElementPotentialFinder(*args, **kwrdargs)
+    raise Exception("Unknown equilibrium method "+str(method))
+
 def findEquilibrium(*args, **kwrdargs):
-    solver = EquilibriumFinder(*args, **kwrdargs)
-    return solver.outputPhases
+    '''Returns the phases at equilibrium. The method keyword selects
+    the solver, either 'SLSQP' (the default, EquilibriumFinder) or
+    'ElementPotential' (the Newton solver of
+    chemeng.elementpotential). The other arguments are passed to the
+    solver.'''
+    return equilibriumSolver(*args, **kwrdargs).outputPhases
+
+####################################################################
+# Equilibrium sweeps
+####################################################################
+#equilibriumSweep solves a series of equilibrium problems along a
+#path in temperature, pressure or feed, starting each solve from the
+#solution of the previous point (matching the phases by their type,
+#phase and species, so the list of phases may change along a feed
+#path). With predictor=True, the starting point is instead
+#extrapolated from the last two solutions. The results are yielded as
+#each point is solved, e.g.
+#
+#  for point in equilibriumSweep(phases, numpy.linspace(1273.15, 1623.15, 36), 'T', constT=True, constP=True, elemental=True):
+#      print point.value, point.phases
+#
+#A point which fails to solve is yielded with its error, and the next
+#point starts from its own feed.
+
+class SweepPoint(object):
+    """The equilibrium at one point of an equilibriumSweep. value is
+    the point of the path, phases are the output phases and solver is
+    the solver used. If the solve failed, phases is None and error
+    holds the exception message."""
+    def __init__(self, value):
+        self.value = value
+        self.phases = None
+        self.solver = None
+        self.error = None
+
+cdef tuple phaseKey(phase):
+    if isinstance(phase, CondensedSpeciesBlock):
+        return (phase.__class__, tuple(phase.phaseIDs), tuple(phase.species))
+    return (phase.__class__, phase.phase, tuple(phase.components.keys()))
+
+def matchPhases(list phases, list previous):
+    '''Returns, for each of phases, the phase of previous with the same
+    type, phase and species (or None if there is none)'''
+    cdef dict lookup = {}
+    for phase in previous:
+        lookup.setdefault(phaseKey(phase), phase)
+    return [lookup.get(phaseKey(phase)) for phase in phases]
+
+def extrapolatePhase(older, last, double ratio):
+    '''Returns a copy of last extrapolated (to first order in the
+    logarithms of the amounts, temperature and pressure) by ratio times
+    the step from older to last'''
+    phase = last.copy()
+    if isinstance(last, CondensedSpeciesBlock):
+        growing = (last.amounts > 0) & (older.amounts > 0)
+        phase.amounts[growing] = last.amounts[growing] * (last.amounts[growing] / older.amounts[growing]) ** ratio
+    else:
+        for key, amount in last.components.iteritems():
+            oldamount = older.components[key]
+            if amount > 0 and oldamount > 0:
+                phase.components[key] = amount * (amount / oldamount) ** ratio
+    phase.T = last.T * (last.T / older.T) ** ratio
+    phase.P = last.P * (last.P / older.P) ** ratio
+    return phase
+
+def equilibriumSweep(list inputPhases, path, variable='T', bint predictor=False, positions=None, **kwrdargs):
+    '''Solves for the equilibrium at each point of path, yielding a
+    SweepPoint for each. variable is 'T' or 'P', where the path is the
+    temperature or pressure of the input phases, or 'feed', where each
+    point of the path is a list of input phases (and inputPhases is
+    unused). The predictor extrapolates in proportion to the spacing
+    of the points, so for a feed path, positions gives the position of
+    each point along the path (e.g., the fraction of one of the feeds);
+    by default, the feeds are taken to be equally spaced. The other
+    arguments are passed to the solver (see findEquilibrium).'''
+    if variable not in ['T', 'P', 'feed']:
+        raise Exception("Unknown sweep variable "+str(variable))
+    if positions is not None and variable != 'feed':
+        raise Exception("The positions of the points are only given for a feed path")
+    if positions is not None:
+        positions = iter(positions)
+    last = older = None
+    lastPosition = olderPosition = None
+    cdef int count = 0
+    for value in path:
+        if variable == 'feed':
+            phases = list(value)
+            if positions is None:
+                position = count
+            else:
+                position = next(positions)
+        else:
+            phases = [phase.copy() for phase in inputPhases]
+            for phase in phases:
+                setattr(phase, variable, value)
+            position = value
+        count += 1
+
+        initial = None
+        if last is not None:
+            initial = matchPhases(phases, last)
+            if predictor and older is not None:
+                if lastPosition != olderPosition:
+                    ratio = (position - lastPosition) / float(lastPosition - olderPosition)
+                else:
+                    ratio = 0.0
+                initial = [extrapolatePhase(old, new, ratio) if (old is not None and new is not None) else new for old, new in zip(matchPhases(phases, older), initial)]
+
+        point = SweepPoint(value)
+        try:
+            point.solver = equilibriumSolver(phases, initialPhases=initial, **kwrdargs)
+            point.phases = point.solver.outputPhases
+            older, olderPosition = last, lastPosition
+            last, lastPosition = point.phases, position
+        except Exception as e:
+            point.error = str(e)
+            last = older = None
+        yield point
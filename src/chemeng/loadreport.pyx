@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+import os
+import time
+import json
+
+####################################################################
+# Database load instrumentation
+####################################################################
+#The data modules record what loading each of their source files
+#cost in loadReport, e.g.
+#
+#  print chemeng.loadreport.loadReport
+#  loadReport.find(database='NASA')[0].parseTime
+#  loadReport.writeJSON('load.json')
+#
+#If chemeng.config.loadReportFile is set, the report is also written
+#there as JSON when the interpreter exits.
+
+def memoryUsage():
+    """Returns the resident memory of this process in bytes. This is
+    read from /proc where available, otherwise the peak resident
+    memory is returned."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class LoadStage(object):
+    """A context manager adding the time (and memory) taken by a stage
+    of loading a source to its SourceLoad"""
+    def __init__(self, source, stage):
+        self.source = source
+        self.stage = stage
+
+    def __enter__(self):
+        from chemeng.speciesdata import speciesData
+        self.memory = memoryUsage()
+        if self.stage == 'register':
+            self.species = len(speciesData)
+            self.phases = speciesData.phaseCount()
+        self.start = time.time()
+        return self.source
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        from chemeng.speciesdata import speciesData
+        elapsed = time.time() - self.start
+        if self.stage == 'parse':
+            self.source.parseTime += elapsed
+        elif self.stage == 'validation':
+            self.source.validationTime += elapsed
+        else:
+            self.source.registerTime += elapsed
+            self.source.species += len(speciesData) - self.species
+            self.source.phases += speciesData.phaseCount() - self.phases
+        self.source.memory += memoryUsage() - self.memory
+        return False
+
+class SourceLoad(object):
+    """The cost of loading one source file of a database. The times
+    are in seconds, and species and phases count those added to
+    speciesData (including those not yet materialised). memory is the
+    change in resident memory in bytes, of the process which did the
+    work (for chemeng.dataloader, the parsing in the worker processes
+    is not counted). cached is set if the records came from the
+    compiled cache, in which case the file was neither parsed nor
+    validated."""
+    fields = ['database', 'filename', 'cached', 'records', 'parseTime', 'validationTime', 'registerTime', 'species', 'phases', 'memory']
+
+    def __init__(self, database, filename):
+        self.database = database
+        self.filename = filename
+        self.cached = False
+        self.records = 0
+        self.parseTime = 0.0
+        self.validationTime = 0.0
+        self.registerTime = 0.0
+        self.species = 0
+        self.phases = 0
+        self.memory = 0
+
+    def parsing(self):
+        return LoadStage(self, 'parse')
+
+    def validating(self):
+        return LoadStage(self, 'validation')
+
+    def registering(self):
+        return LoadStage(self, 'register')
+
+    def merge(self, other):
+        """Adds the parsing and validation of other (e.g., done in a
+        worker process) to this source"""
+        self.cached = self.cached or other.cached
+        self.records += other.records
+        self.parseTime += other.parseTime
+        self.validationTime += other.validationTime
+
+    def asDict(self):
+        return dict((field, getattr(self, field)) for field in self.fields)
+
+    def __str__(self):
+        return "SourceLoad{"+", ".join(field+"="+repr(getattr(self, field)) for field in self.fields)+"}"
+
+    def __repr__(self):
+        return self.__str__()
+
+class LoadReport(object):
+    """The SourceLoad of each source file loaded, in load order"""
+    def __init__(self):
+        self.sources = []
+
+    def source(self, database, filename):
+        """Returns the SourceLoad of a file, creating it if needed"""
+        filename = os.path.basename(filename)
+        for entry in self.sources:
+            if entry.database == database and entry.filename == filename:
+                return entry
+        entry = SourceLoad(database, filename)
+        self.sources.append(entry)
+        return entry
+
+    def find(self, database=None, filename=None):
+        """Returns the SourceLoads of a database and/or file"""
+        return [entry for entry in self.sources if (database is None or entry.database == database) and (filename is None or entry.filename == os.path.basename(filename))]
+
+    def total(self, field):
+        """The sum of a numeric field over all sources"""
+        return sum(getattr(entry, field) for entry in self.sources)
+
+    def __iter__(self):
+        return iter(self.sources)
+
+    def __len__(self):
+        return len(self.sources)
+
+    def asDict(self):
+        return {'sources' : [entry.asDict() for entry in self.sources],
+                'totals' : dict((field, self.total(field)) for field in ['records', 'parseTime', 'validationTime', 'registerTime', 'species', 'phases', 'memory'])}
+
+    def toJSON(self):
+        return json.dumps(self.asDict(), indent=2, sort_keys=True)
+
+    def writeJSON(self, filename):
+        with open(filename, 'w') as f:
+            f.write(self.toJSON())
+
+    def __str__(self):
+        output = "%-10s %-24s %8s %9s %9s %9s %8s %8s %10s\n" % ("Database", "File", "Records", "Parse ms", "Valid ms", "Reg ms", "Species", "Phases", "Memory kB")
+        for entry in self.sources:
+            output += "%-10s %-24s %8d %9.1f %9.1f %9.1f %8d %8d %10d%s\n" % (entry.database, entry.filename, entry.records, entry.parseTime * 1000, entry.validationTime * 1000, entry.registerTime * 1000, entry.species, entry.phases, entry.memory // 1024, " (cached)" if entry.cached else "")
+        return output
+
+loadReport = LoadReport()
+
+import chemeng.config
+if chemeng.config.loadReportFile is not None:
+    import atexit
+    atexit.register(loadReport.writeJSON, chemeng.config.loadReportFile)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# distutils: language = c++
+# cython: profile=True
+
+import time
+
+####################################################################
+# Optimiser backends
+####################################################################
+#EquilibriumFinder describes its problem as a list of variables (name,
+#initial value, lower and upper bound, with None for no bound) and a
+#list of named equality constraints, and passes it to an optimiser
+#backend along with a problem object providing
+#
+#  problem.obj_func(x) -> (objective, constraint values, fail flag)
+#  problem.grad_func(x, f, g) -> (objective gradient, constraint Jacobian, fail flag)
+#
+#in the form used by pyOpt. A backend is any object with a
+#minimise(problem, variables, constraints, xtol, iterations,
+#analyticGradients, debug) method returning the optimal variables,
+#which raises an exception if the optimiser fails. The backends are
+#selected by name through optimiserBackend, e.g.
+#
+#  findEquilibrium(phases, constT=True, constP=True, backend='scipy-SLSQP')
+#
+#and compareBackends times each of them on the same problem.
+#
+#The trust-constr optimiser of scipy does not converge on these
+#problems. It exhausts its iterations whenever the temperature or
+#pressure is free (e.g., HP, UV, SP or TV) and stops short of the
+#minimum at constant T and P, so it is only kept for experiments and
+#is not compared by default.
+
+class PyOptBackend(object):
+    """The SLSQP optimiser of pyOpt (imported when first used)"""
+    name = 'pyOpt'
+
+    def minimise(self, problem, variables, constraints, double xtol, iterations, bint analyticGradients, bint debug):
+        import pyOpt
+        opt_prob = pyOpt.Optimization('Entropy maximisation', problem.obj_func)
+        opt_prob.addObj('ThermoPotential')
+        opt = pyOpt.pySLSQP.SLSQP()
+        opt.setOption('ACC', xtol)
+        opt.setOption('MAXIT', iterations)
+        for name, value, lower, upper in variables:
+            bounds = {}
+            if lower is not None:
+                bounds['lower'] = lower
+            if upper is not None:
+                bounds['upper'] = upper
+            opt_prob.addVar(name, type='c', value=value, **bounds)
+        for name in constraints:
+            opt_prob.addCon(name, type='e')
+
+        if debug:
+            print opt_prob
+            opt.setOption('IPRINT', 0)
+
+        if analyticGradients:
+            [fstr, xstr, inform] = opt(opt_prob, sens_type=problem.grad_func, disp_opts=debug)
+        else:
+            [fstr, xstr, inform] = opt(opt_prob, sens_type='FD', disp_opts=debug)
+
+        if inform['value'] != 0:
+            raise Exception("findEquilibrium error:"+str(inform['value'])+": "+inform['text'])
+
+        if debug:
+            print fstr #The optimial minimum value of the objective function
+            print xstr #The final state vector
+            print inform #dictionary of
+            print opt_prob._solutions[0]
+        return list(xstr)
+
+#The step of the finite difference gradients, as used by pyOpt
+finiteDifferenceStep = 1e-6
+
+class ScipyBackend(object):
+    """The SLSQP or trust-constr optimisers of scipy.optimize.minimize"""
+    def __init__(self, method='SLSQP'):
+        if method not in ['SLSQP', 'trust-constr']:
+            raise Exception("Unsupported scipy optimiser "+str(method))
+        self.method = method
+        self.name = 'scipy-'+method
+
+    def minimise(self, problem, variables, constraints, double xtol, iterations, bint analyticGradients, bint debug):
+        import numpy
+        import scipy.optimize
+        #scipy asks for the objective and the constraints separately,
+        #so the last evaluation of each is kept
+        cache = {}
+        def evaluate(x):
+            key = x.tobytes()
+            if cache.get('obj', (None,))[0] != key:
+                f, g, fail = problem.obj_func(x)
+                if fail:
+                    raise Exception("findEquilibrium error: the objective could not be evaluated")
+                cache['obj'] = (key, f, numpy.array(g, dtype=numpy.float64))
+            return cache['obj'][1:]
+        def gradients(x):
+            key = x.tobytes()
+            if cache.get('grad', (None,))[0] != key:
+                g_obj, g_con, fail = problem.grad_func(x, None, None)
+                if fail:
+                    raise Exception("findEquilibrium error: the gradients could not be evaluated: "+repr(problem.evaluationError))
+                cache['grad'] = (key, numpy.array(g_obj, dtype=numpy.float64), numpy.array(g_con, dtype=numpy.float64))
+            return cache['grad'][1:]
+
+        fun = lambda x: evaluate(x)[0]
+        con = lambda x: evaluate(x)[1]
+        jac = (lambda x: gradients(x)[0]) if analyticGradients else None
+        conjac = (lambda x: gradients(x)[1]) if analyticGradients else '2-point'
+
+        x0 = numpy.array([value for name, value, lower, upper in variables], dtype=numpy.float64)
+        lower = [-numpy.inf if lo is None else lo for name, value, lo, up in variables]
+        upper = [numpy.inf if up is None else up for name, value, lo, up in variables]
+        if self.method == 'SLSQP':
+            conspec = [{'type':'eq', 'fun':con}]
+            options = {'ftol':xtol, 'maxiter':iterations, 'disp':debug}
+            if analyticGradients:
+                conspec[0]['jac'] = conjac
+            else:
+                #The finite difference step of pyOpt. The default of
+                #scipy (1.5e-8) is swamped by the rounding of the
+                #objective, and SLSQP stops at false equilibria.
+                options['eps'] = finiteDifferenceStep
+            result = scipy.optimize.minimize(fun, x0, method='SLSQP', jac=jac,
+                                             bounds=zip(lower, upper), constraints=conspec,
+                                             options=options)
+        else:
+            conspec = scipy.optimize.NonlinearConstraint(con, 0.0, 0.0, jac=conjac, hess=scipy.optimize.BFGS())
+            result = scipy.optimize.minimize(fun, x0, method='trust-constr', jac=jac if analyticGradients else '2-point',
+                                             hess=scipy.optimize.BFGS(), bounds=scipy.optimize.Bounds(lower, upper),
+                                             constraints=[conspec],
+                                             options={'xtol':xtol, 'gtol':xtol, 'maxiter':iterations, 'verbose':2 if debug else 0})
+        if not result.success:
+            raise Exception("findEquilibrium error:"+str(result.status)+": "+str(result.message))
+        if debug:
+            print result
+        return list(result.x)
+
+#The backends available by name
+optimiserBackends = {
+    'pyOpt' : PyOptBackend,
+    'scipy-SLSQP' : lambda: ScipyBackend('SLSQP'),
+    'scipy-trust-constr' : lambda: ScipyBackend('trust-constr'),
+}
+
+def pyOptAvailable():
+    """Returns True if pyOpt can be imported"""
+    try:
+        import pyOpt
+    except ImportError:
+        return False
+    return True
+
+def optimiserBackend(backend=None):
+    """Returns the optimiser backend named backend (or backend itself
+    if it is already a backend). By default, pyOpt is used if it is
+    installed, otherwise the scipy SLSQP optimiser."""
+    if backend is None:
+        backend = 'pyOpt' if pyOptAvailable() else 'scipy-SLSQP'
+    if not isinstance(backend, str):
+        return backend
+    if backend not in optimiserBackends:
+        raise Exception("Unknown optimiser backend "+backend)
+    return optimiserBackends[backend]()
+
+class BackendTiming(object):
+    """The cost and result of solving a problem with a backend. time
+    is the mean wall clock time of a solve in seconds, and
+    objEvaluations and gradEvaluations are the calls made to the
+    objective and gradient functions per solve. error holds the
+    exception message if the backend failed."""
+    def __init__(self, backend):
+        self.backend = backend
+        self.time = 0.0
+        self.objEvaluations = 0
+        self.gradEvaluations = 0
+        self.objective = None
+        self.error = None
+
+    def __str__(self):
+        if self.error is not None:
+            return "%-20s failed: %s" % (self.backend, self.error)
+        return "%-20s %10.2f ms %8d obj %8d grad  objective %.10g" % (self.backend, self.time * 1000, self.objEvaluations, self.gradEvaluations, self.objective)
+
+    def __repr__(self):
+        return self.__str__()
+
+def compareBackends(inputPhases, backends=None, int repeat=1, **kwrdargs):
+    """Solves the same equilibrium problem (the arguments of
+    EquilibriumFinder) with each of the listed backends (by default,
+    all of those available except scipy-trust-constr, see above) and
+    returns a BackendTiming for each. The
+    solves are timed after a first untimed solve, so that importing
+    the optimiser is not counted, e.g.
+
+      for timing in compareBackends([gas], constT=True, constP=True, elemental=True):
+          print timing
+    """
+    from chemeng.entropymaximiser import EquilibriumFinder
+    if backends is None:
+        backends = [name for name in sorted(optimiserBackends) if (name != 'pyOpt' or pyOptAvailable()) and name != 'scipy-trust-constr']
+    results = []
+    for backend in backends:
+        timing = BackendTiming(backend if isinstance(backend, str) else backend.name)
+        try:
+            EquilibriumFinder(inputPhases, backend=backend, **kwrdargs)
+            start = time.time()
+            for i in range(repeat):
+                solver = EquilibriumFinder(inputPhases, backend=backend, **kwrdargs)
+            timing.time = (time.time() - start) / repeat
+            timing.objEvaluations = solver.objEvaluations
+            timing.gradEvaluations = solver.gradEvaluations
+            timing.objective = solver.optimisation_func()
+        except Exception as e:
+            timing.error = str(e)
+        results.append(timing)
+    return results
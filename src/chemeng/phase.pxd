@@ -1,8 +1,33 @@
 #!/usr/bin/env python
 #distutils: language = c++
 
+from libcpp.vector cimport vector
 from chemeng.components cimport Components
 
+cdef class PhaseState:
+    cdef public double T
+    cdef public double P
+    cdef public double Cp
+    cdef public double enthalpy
+    cdef public double entropy
+    cdef public double gibbsFreeEnergy
+    cdef public double internalEnergy
+    cdef public double helmholtzFreeEnergy
+    cdef public double volume
+    cdef public Components chemicalPotentials
+
+cdef class PhaseDerivatives:
+    cdef public PhaseState state
+    cdef public Components chemicalPotentials
+    cdef public Components partialEnthalpies
+    cdef public Components partialEntropies
+    cdef public Components partialVolumes
+    cdef public double dVdT
+    cdef public double dVdP
+    cdef public double dHdP
+    cdef public double dSdP
+    cpdef tuple propertyDerivatives(PhaseDerivatives, str prop)
+
 cdef class Phase:
     """A base class which holds fundamental methods and members of a single phase which may contain multiple components"""
     cdef public double T
@@ -10,6 +35,23 @@ cdef class Phase:
     cdef public str phase
     cdef public Components components
 
+    #Property cache
+    cdef readonly unsigned long version
+    cdef double stateT
+    cdef double stateP
+    cdef str statePhase
+    cdef unsigned long stateComponents
+    cdef int mixtureValid
+    cdef double mixtureCp
+    cdef double mixtureEnthalpy
+    cdef double mixtureEntropy
+    cdef double standardT
+    cdef str standardPhase
+    cdef vector[Py_ssize_t] standardIds
+    cdef vector[double] standardState
+    cdef int refresh(Phase) except -1
+    cdef int updateStandardStates(Phase) except -1
+
     cpdef double Cp(Phase) except +
     cpdef double enthalpy(Phase) except +
     cpdef Components chemicalPotentials(Phase)
@@ -18,10 +60,19 @@ cdef class Phase:
     cpdef double internalEnergy(Phase)
     cpdef double volume(Phase)
     cpdef double helmholtzFreeEnergy(Phase)
+    cpdef double Cv(Phase)
+    cdef int validRange(Phase, double* Tmin, double* Tmax) except -1
+    cdef int solveT(Phase, double target, bint internal) except -1
+    cpdef PhaseState state(Phase)
+    cdef int correctState(Phase, PhaseState) except -1
+    cpdef PhaseDerivatives derivatives(Phase)
+    cdef int correctDerivatives(Phase, PhaseDerivatives) except -1
 
 cdef class IdealGasPhase(Phase):
     cpdef IdealGasPhase copy(IdealGasPhase)
     cpdef double entropy(IdealGasPhase)
+    cdef int correctState(IdealGasPhase, PhaseState) except -1
+    cdef int correctDerivatives(IdealGasPhase, PhaseDerivatives) except -1
     cpdef double volume(IdealGasPhase)
     cpdef double Cv(IdealGasPhase)
 
@@ -29,6 +80,32 @@ cdef class IncompressiblePhase(Phase):
     cdef public double molarvolume
     cpdef IncompressiblePhase copy(IncompressiblePhase)
     cpdef double enthalpy(IncompressiblePhase)
+    cdef int correctState(IncompressiblePhase, PhaseState) except -1
+    cdef int correctDerivatives(IncompressiblePhase, PhaseDerivatives) except -1
     cpdef double volume(IncompressiblePhase)
     cpdef double Cv(IncompressiblePhase)
 
+
+cdef class PureCondensedPhase(IncompressiblePhase):
+    cdef double amount(PureCondensedPhase) except? -1
+    cpdef double Cp(PureCondensedPhase) except +
+    cpdef double enthalpy(PureCondensedPhase) except +
+    cpdef double entropy(PureCondensedPhase) except +
+    cpdef Components chemicalPotentials(PureCondensedPhase)
+    cpdef PhaseState state(PureCondensedPhase)
+    cdef int correctDerivatives(PureCondensedPhase, PhaseDerivatives) except -1
+
+cdef class CondensedSpeciesBlock:
+    cdef public double T
+    cdef public double P
+    cdef public list species
+    cdef public list phaseIDs
+    cdef object amountArray
+    cdef object molarvolumeArray
+    cdef list speciesdata
+    cdef list phasedata
+    cdef vector[double] standardState
+    cdef double standardT
+    cdef object vector(CondensedSpeciesBlock, values)
+    cdef int updateStandardStates(CondensedSpeciesBlock) except -1
+    cdef double total(CondensedSpeciesBlock, Py_ssize_t) except? -1
@@ -2,12 +2,11 @@
 # distutils: language = c++
 # cython: profile=True
 
-from chemeng.components cimport Components
-from chemeng.speciesdata cimport SpeciesDataType
-from libcpp.pair cimport pair
+from chemeng.components cimport Components, SpeciesRegistry
+from chemeng.speciesdata cimport SpeciesDataType, ThermoConstantsType, PhaseData
 from libcpp.string cimport string
-from chemeng.speciesdata import speciesData
-from libc.math cimport log
+from chemeng.components import speciesRegistry
+from libc.math cimport log, fabs, HUGE_VAL
 
 cdef public double R = 8.31451
 cdef public double T0 = 273.15 + 25.0
@@ -19,6 +18,61 @@ cdef double fmin(double a, double b):
     else:
         return b
 
+cdef double fmax(double a, double b):
+    if a > b:
+        return a
+    else:
+        return b
+
+#The temperature solver (setEnthalpy/setInternalEnergy) stops once the
+#Newton step is below this fraction of the temperature
+cdef double newtonTolerance = 1e-10
+cdef int maxNewtonIterations = 100
+
+#The species data of the components are fetched by their id
+cdef SpeciesRegistry registry = speciesRegistry
+
+####################################################################
+# Phase state
+####################################################################
+cdef class PhaseState:
+    """The properties of a phase at a single state, as returned by
+    Phase.state()"""
+    def __str__(PhaseState self):
+        return "<PhaseState, %g K, %g bar, Cp=%g, H=%g, S=%g, G=%g, U=%g, A=%g, V=%g, mu=%s>" % (self.T, self.P / 1e5, self.Cp, self.enthalpy, self.entropy, self.gibbsFreeEnergy, self.internalEnergy, self.helmholtzFreeEnergy, self.volume, str(self.chemicalPotentials))
+
+cdef class PhaseDerivatives:
+    """The derivatives of the properties of a phase, as returned by
+    Phase.derivatives(). The partial molar enthalpy, entropy and
+    volume (and the chemical potential) of each species are the
+    derivatives with respect to its amount at constant T and P; dVdT
+    is at constant P and amounts, while dVdP, dHdP and dSdP are at
+    constant T and amounts. The derivatives of H and S with respect to
+    T are state.Cp and state.Cp / T."""
+    cpdef tuple propertyDerivatives(PhaseDerivatives self, str prop):
+        """Returns the derivatives of a property of the phase (one of
+        'G', 'A', 'S', 'U', 'H' or 'V') as a tuple of its partial
+        molar values (a Components) and its derivatives with respect
+        to T and P."""
+        cdef double T = self.state.T, P = self.state.P
+        if prop == 'G':
+            return self.chemicalPotentials, - self.state.entropy, self.dHdP - T * self.dSdP
+        elif prop == 'A':
+            return (self.chemicalPotentials - self.partialVolumes * P,
+                    - self.state.entropy - P * self.dVdT,
+                    self.dHdP - T * self.dSdP - self.state.volume - P * self.dVdP)
+        elif prop == 'S':
+            return self.partialEntropies, self.state.Cp / T, self.dSdP
+        elif prop == 'U':
+            return (self.partialEnthalpies - self.partialVolumes * P,
+                    self.state.Cp - P * self.dVdT,
+                    self.dHdP - self.state.volume - P * self.dVdP)
+        elif prop == 'H':
+            return self.partialEnthalpies, self.state.Cp, self.dHdP
+        elif prop == 'V':
+            return self.partialVolumes, self.dVdT, self.dVdP
+        raise Exception("Unknown property "+prop)
+
 ####################################################################
 # Phase base class
 ####################################################################
@@ -49,6 +103,66 @@ cdef class Phase:
     def __contains__(Phase self, str key):
         return key in self.components
 
+    def __reduce__(Phase self):
+        return (restorePhase, (self.__class__, self.T, self.P, self.phase, self.components))
+
+#The properties of the phase are cached. The standard state
+#properties of each species are kept while the temperature, phase and
+#species present are unchanged (e.g., while only the amounts vary, as
+#they do in the equilibrium solvers), and the mixture properties while
+#the version of the phase is unchanged. The version is bumped
+#whenever T, P, the phase or the components have changed since the
+#last property calculation.
+    cdef int refresh(Phase self) except -1:
+        cdef Components components = self.components
+        if (self.T != self.stateT or self.P != self.stateP
+            or components.version != self.stateComponents
+            or (self.phase is not self.statePhase and self.phase != self.statePhase)):
+            self.version += 1
+            self.stateT = self.T
+            self.stateP = self.P
+            self.statePhase = self.phase
+            self.stateComponents = components.version
+            self.mixtureValid = 0
+        return 0
+
+    cdef int updateStandardStates(Phase self) except -1:
+        """Ensures standardState holds [Cp0, Hf0, S0, Gibbs0] of each
+        component (in the order of the components) at T"""
+        cdef Components components = self.components
+        cdef size_t i, n = components.ids.size()
+        cdef bint valid = (self.standardT == self.T and self.standardPhase is not None
+                           and (self.phase is self.standardPhase or self.phase == self.standardPhase)
+                           and self.standardIds.size() == n)
+        i = 0
+        while valid and i < n:
+            valid = self.standardIds[i] == components.ids[i]
+            i += 1
+        if valid:
+            return 0
+
+        cdef SpeciesDataType sp
+        cdef string phase = self.phase
+        cdef double T = self.T
+        cdef double* out
+        self.standardIds = components.ids
+        self.standardState.resize(4 * n)
+        for i in range(n):
+            sp = registry.lookup(components.ids[i])
+            out = &self.standardState[4 * i]
+            try:
+                sp.evaluate0(T, sp.phases[self.phase], out)
+            except Exception:
+                #The individual functions report the missing data and
+                #return zero
+                out[0] = sp.Cp0(T, phase)
+                out[1] = sp.Hf0(T, phase)
+                out[2] = sp.S0(T, phase)
+                out[3] = sp.Gibbs0(T, phase)
+        self.standardT = T
+        self.standardPhase = self.phase
+        return 0
+
 #The thermodynamic functions below do not include any effect of
 #pressure (they assume the phase is at the reference pressure P0), and
 #assumes that the phase is an ideal mixture. Classes which derive from
@@ -56,55 +170,69 @@ cdef class Phase:
 #assumptions.
     cpdef double Cp(Phase self) except + : # Units are J
         """A calculation of the isobaric heat capacity (Cp) of the phase"""
+        self.refresh()
+        if self.mixtureValid & 1:
+            return self.mixtureCp
+        self.updateStandardStates()
         cdef double sum = 0.0
-        cdef SpeciesDataType sp
-        cdef pair[string, double] entry
-        for entry in self.components._list:
-            sp = speciesData[entry.first]
-            sum += entry.second * sp.Cp0(self.T, phase=self.phase)
+        cdef Components components = self.components
+        cdef size_t i
+        for i in range(components.amounts.size()):
+            sum += components.amounts[i] * self.standardState[4 * i]
+        self.mixtureCp = sum
+        self.mixtureValid |= 1
         return sum
 
     cpdef double enthalpy(self) except + : # J
         """A calculation of the enthalpy (H) of the Phase"""
+        self.refresh()
+        if self.mixtureValid & 2:
+            return self.mixtureEnthalpy
+        self.updateStandardStates()
         cdef double sum = 0.0
-        cdef SpeciesDataType sp
-        cdef pair[string, double] entry
-        for entry in self.components._list:
-            sp = speciesData[entry.first]
-            sum += entry.second * sp.Hf0(self.T, phase=self.phase)
+        cdef Components components = self.components
+        cdef size_t i
+        for i in range(components.amounts.size()):
+            sum += components.amounts[i] * self.standardState[4 * i + 1]
+        self.mixtureEnthalpy = sum
+        self.mixtureValid |= 2
         return sum
 
     cpdef double entropy(Phase self) except + : # J / K
         """A calculation of the entropy S of the phase."""
-        cdef double total = self.components.total()
-        #Individual component entropy
-        cdef double sumEntropy = 0.0
-        cdef SpeciesDataType sp
-        cdef pair[string, double] entry
-        for entry in self.components._list:
-            sp = speciesData[entry.first]
-            sumEntropy += entry.second * sp.S0(self.T, phase=self.phase)
-
-        #Mixing entropy
-        for entry in self.components._list:
-            if entry.second > 0.0:
-                sumEntropy -= R * entry.second * log(entry.second / total)
+        self.refresh()
+        if self.mixtureValid & 4:
+            return self.mixtureEntropy
+        self.updateStandardStates()
+        cdef Components components = self.components
+        cdef double total = components.total()
+        #Individual component entropy and the mixing entropy
+        cdef double sumEntropy = 0.0, mixing = 0.0
+        cdef double amount
+        cdef size_t i
+        for i in range(components.amounts.size()):
+            amount = components.amounts[i]
+            sumEntropy += amount * self.standardState[4 * i + 2]
+            if amount > 0.0:
+                mixing += amount * log(amount / total)
+        sumEntropy -= R * mixing
+        self.mixtureEntropy = sumEntropy
+        self.mixtureValid |= 4
         return sumEntropy
 
     cpdef Components chemicalPotentials(Phase self):
-        cdef Components retval = Components({})
-        cdef pair[string, double] entry
-        cdef SpeciesDataType sp
-        cdef double G0 
-        cdef double total = self.components.total()
+        cdef Components components = self.components
+        cdef double total = components.total()
         if total == 0:
-            return retval
+            return Components({})
+        self.updateStandardStates()
+        cdef Components retval = components.copy()
         cdef double mixing
-        for entry in self.components._list:
-            sp = speciesData[entry.first]
-            G0 = sp.Hf0(self.T, phase=self.phase) - self.T * sp.S0(self.T, phase=self.phase)
-            mixing = R * self.T * log(max(1e-300, entry.second / total))
-            retval[entry.first] = G0 + mixing
+        cdef size_t i
+        for i in range(components.amounts.size()):
+            mixing = R * self.T * log(max(1e-300, components.amounts[i] / total))
+            retval.amounts[i] = self.standardState[4 * i + 3] + mixing
+        retval.touch()
         return retval
 
     cpdef double gibbsFreeEnergy(Phase self): #J
@@ -118,27 +246,186 @@ cdef class Phase:
         """A calculation of the Gibbs free energy (G) of the Stream at a temperature T. If T is not given, then it uses the stream temperature"""
         return self.gibbsFreeEnergy() - self.P * self.volume()
 
+    cpdef PhaseState state(Phase self):
+        """Calculates all of the properties of the phase (Cp, enthalpy,
+        entropy, gibbsFreeEnergy, internalEnergy, helmholtzFreeEnergy,
+        volume and chemicalPotentials) in a single pass over the
+        species. The values are identical to those of the individual
+        methods."""
+        self.refresh()
+        self.updateStandardStates()
+        cdef Components components = self.components
+        cdef double total = components.total()
+        cdef PhaseState state = PhaseState.__new__(PhaseState)
+        state.T = self.T
+        state.P = self.P
+        cdef double sumCp = 0.0, sumEnthalpy = 0.0, sumEntropy = 0.0, mixing = 0.0
+        cdef double amount
+        cdef double* standard
+        cdef size_t i
+        if total == 0:
+            state.chemicalPotentials = Components({})
+        else:
+            state.chemicalPotentials = components.copy()
+        for i in range(components.amounts.size()):
+            amount = components.amounts[i]
+            standard = &self.standardState[4 * i]
+            sumCp += amount * standard[0]
+            sumEnthalpy += amount * standard[1]
+            sumEntropy += amount * standard[2]
+            if amount > 0.0:
+                mixing += amount * log(amount / total)
+            if total != 0:
+                state.chemicalPotentials.amounts[i] = standard[3] + R * self.T * log(max(1e-300, amount / total))
+        sumEntropy -= R * mixing
+        self.mixtureCp = sumCp
+        self.mixtureEnthalpy = sumEnthalpy
+        self.mixtureEntropy = sumEntropy
+        self.mixtureValid = 7
+
+        state.Cp = sumCp
+        state.enthalpy = sumEnthalpy
+        state.entropy = sumEntropy
+        state.volume = self.volume()
+        self.correctState(state)
+        state.chemicalPotentials.touch()
+        state.gibbsFreeEnergy = state.enthalpy - self.T * state.entropy
+        state.internalEnergy = state.enthalpy - self.P * state.volume
+        state.helmholtzFreeEnergy = state.gibbsFreeEnergy - self.P * state.volume
+        return state
+
+    cdef int correctState(Phase self, PhaseState state) except -1:
+        """Adds the corrections of a derived class to the ideal mixture
+        properties of state"""
+        return 0
+
+    cpdef PhaseDerivatives derivatives(Phase self):
+        """Calculates the state of the phase along with the
+        derivatives of its properties (see PhaseDerivatives), as used
+        for the gradients of the equilibrium solvers"""
+        cdef PhaseDerivatives d = PhaseDerivatives.__new__(PhaseDerivatives)
+        d.state = self.state()
+        cdef Components components = self.components
+        cdef double total = components.total()
+        d.partialEnthalpies = components.copy()
+        d.partialEntropies = components.copy()
+        d.partialVolumes = components.copy()
+        cdef double x
+        cdef size_t i
+        for i in range(components.amounts.size()):
+            if total > 0:
+                x = components.amounts[i] / total
+            else:
+                #A phase of a single species is pure at any amount
+                x = 1.0 if components.amounts.size() == 1 else 0.0
+            d.partialEnthalpies.amounts[i] = self.standardState[4 * i + 1]
+            d.partialEntropies.amounts[i] = self.standardState[4 * i + 2] - R * log(max(1e-300, x))
+            d.partialVolumes.amounts[i] = 0.0
+        d.dVdT = 0.0
+        d.dVdP = 0.0
+        d.dHdP = 0.0
+        d.dSdP = 0.0
+        self.correctDerivatives(d)
+        d.chemicalPotentials = components.copy()
+        for i in range(components.amounts.size()):
+            d.chemicalPotentials.amounts[i] = d.partialEnthalpies.amounts[i] - self.T * d.partialEntropies.amounts[i]
+        d.partialEnthalpies.touch()
+        d.partialEntropies.touch()
+        d.partialVolumes.touch()
+        d.chemicalPotentials.touch()
+        return d
+
+    cdef int correctDerivatives(Phase self, PhaseDerivatives d) except -1:
+        """Adds the corrections of a derived class to the derivatives
+        of the ideal mixture"""
+        return 0
+
 #Helper functions to manipulate the thermodynamic properties of a phase
     def setInternalEnergy(Phase self, double U):
-        import scipy
-        import scipy.optimize
-        def worker(double T):
-            self.T = T
-            return self.internalEnergy() - U
-        self.T = scipy.optimize.fsolve(worker, self.T+0.0)[0]
+        """Sets the temperature of the phase (at constant pressure) so
+        that its internal energy is U. Returns the number of Newton
+        iterations taken."""
+        return self.solveT(U, True)
 
     def setEnthalpy(Phase self, double enthalpy):
-        import scipy
-        import scipy.optimize
-        def worker(double T):
+        """Sets the temperature of the phase (at constant pressure) so
+        that its enthalpy is H. Returns the number of Newton iterations
+        taken."""
+        return self.solveT(enthalpy, False)
+
+    cdef int validRange(Phase self, double* Tmin, double* Tmax) except -1:
+        """The temperature range over which every species has data"""
+        cdef Components components = self.components
+        cdef SpeciesDataType sp
+        cdef ThermoConstantsType datum
+        cdef double lo, hi
+        cdef size_t i
+        Tmin[0] = 0
+        Tmax[0] = HUGE_VAL
+        for i in range(components.ids.size()):
+            sp = registry.lookup(components.ids[i])
+            lo = HUGE_VAL
+            hi = 0
+            for datum in sp.phases[self.phase].constants:
+                lo = fmin(lo, datum.Tmin)
+                hi = fmax(hi, datum.Tmax)
+            Tmin[0] = fmax(Tmin[0], lo)
+            Tmax[0] = fmin(Tmax[0], hi)
+        if Tmin[0] > Tmax[0]:
+            raise Exception("The species of the phase have no common temperature range")
+        return 0
+
+    cdef int solveT(Phase self, double target, bint internal) except -1:
+        """Solves for the temperature at which the enthalpy (or the
+        internal energy) is target, using Newton's method with Cp (or
+        Cv) as the derivative. The steps are kept within a bracket on
+        the solution, starting from the valid temperature range of the
+        species, and fall back to bisection if Newton's method would
+        leave it."""
+        if self.components.ids.size() == 0:
+            return 0
+        cdef double Tmin, Tmax, lo, hi, T, f, dfdT, newT
+        cdef bint lowerFound = False, upperFound = False
+        self.validRange(&Tmin, &Tmax)
+        lo = Tmin
+        hi = Tmax
+        T = fmin(fmax(self.T, lo), hi)
+        cdef int iteration
+        for iteration in range(1, maxNewtonIterations + 1):
             self.T = T
-            return self.enthalpy() - enthalpy
-        self.T = scipy.optimize.fsolve(worker, self.T)[0]
+            if internal:
+                f = self.internalEnergy() - target
+                dfdT = self.Cv()
+            else:
+                f = self.enthalpy() - target
+                dfdT = self.Cp()
+            if f == 0:
+                return iteration
+            #The enthalpy and internal energy increase with T
+            if f > 0:
+                hi = T
+                upperFound = True
+            else:
+                lo = T
+                lowerFound = True
+            newT = T - f / dfdT if dfdT > 0 else lo
+            if not (newT > lo and newT < hi):
+                newT = 0.5 * (lo + hi)
+            if fabs(newT - T) <= newtonTolerance * T:
+                if (not upperFound and hi - newT <= newtonTolerance * T) or (not lowerFound and newT - lo <= newtonTolerance * T):
+                    raise Exception("The requested "+("internal energy" if internal else "enthalpy")+" of the "+self.__class__.__name__+" is outside its data range of "+str(Tmin)+"-"+str(Tmax)+"K")
+                self.T = newT
+                return iteration
+            T = newT
+        raise Exception("Temperature solver failed to converge after "+str(maxNewtonIterations)+" iterations")
 
 #Functions which must be overridden by derived classes
     cpdef double volume(Phase self):
         raise Exception("Function missing from "+self.__class__.__name__+"!")
 
+    cpdef double Cv(Phase self):
+        raise Exception("Function missing from "+self.__class__.__name__+"!")
+
 ####################################################################
 # Ideal gas class
 ####################################################################
@@ -161,26 +448,42 @@ cdef class IdealGasPhase(Phase):
         cdef double pressureEntropy =  - R * self.components.total() * log(self.P / P0)
         return Phase.entropy(self) + pressureEntropy
 
+    cdef int correctDerivatives(IdealGasPhase self, PhaseDerivatives d) except -1:
+        cdef double pressureEntropy = R * log(self.P / P0)
+        cdef size_t i
+        for i in range(d.partialEntropies.amounts.size()):
+            d.partialEntropies.amounts[i] -= pressureEntropy
+            d.partialVolumes.amounts[i] = R * self.T / self.P
+        d.dVdT = R * self.components.total() / self.P
+        d.dVdP = - d.state.volume / self.P
+        d.dSdP = - R * self.components.total() / self.P
+        return 0
+
+    cdef int correctState(IdealGasPhase self, PhaseState state) except -1:
+        state.entropy += - R * self.components.total() * log(self.P / P0)
+        cdef double vdp = R * self.T * log(self.P / P0)
+        cdef size_t i
+        for i in range(state.chemicalPotentials.amounts.size()):
+            state.chemicalPotentials.amounts[i] += vdp
+        return 0
+
     cpdef Components chemicalPotentials(IdealGasPhase self):
         cdef double vdp = R * self.T * log(self.P / P0)
-        cdef pair[string, double] entry
         cdef Components retval = Phase.chemicalPotentials(self)
-        for entry in self.components._list:
-            retval[entry.first] += vdp 
+        cdef size_t i
+        for i in range(retval.amounts.size()):
+            retval.amounts[i] += vdp
+        retval.touch()
         return retval
 
     cpdef double volume(self):
         return self.components.total() * R * self.T / self.P
 
     cpdef double Cv(self) except + :
-        return self.Cp() - R * self.total()
+        return self.Cp() - R * self.components.total()
 
     def __add__(self, IdealGasPhase other):
-        cdef IdealGasPhase output = self.copy()
-        output.P = fmin(self.P, other.P)
-        output.components += other.components
-        output.setEnthalpy(self.enthalpy() + other.enthalpy())
-        return output
+        return mixPhases([self, other])
 
 ####################################################################
 # Incompressible Phase
@@ -202,25 +505,347 @@ cdef class IncompressiblePhase(Phase):
     #Entropy is constant with pressure for incompressible phases, so keep Phase definition
 
     cpdef double enthalpy(IncompressiblePhase self) except +:
-        cdef double base = Phase.enthalpy(self)
         return Phase.enthalpy(self) + self.volume() * (self.P - P0)
+
+    cdef int correctDerivatives(IncompressiblePhase self, PhaseDerivatives d) except -1:
+        cdef size_t i
+        for i in range(d.partialEnthalpies.amounts.size()):
+            d.partialEnthalpies.amounts[i] += self.molarvolume * (self.P - P0)
+            d.partialVolumes.amounts[i] = self.molarvolume
+        d.dHdP = d.state.volume
+        return 0
+
+    cdef int correctState(IncompressiblePhase self, PhaseState state) except -1:
+        state.enthalpy += state.volume * (self.P - P0)
+        cdef double vdp = self.molarvolume * (self.P - P0)
+        cdef size_t i
+        for i in range(state.chemicalPotentials.amounts.size()):
+            state.chemicalPotentials.amounts[i] += vdp
+        return 0
     
     cpdef double volume(IncompressiblePhase self):
         return self.components.total()  * self.molarvolume
 
     cpdef Components chemicalPotentials(IncompressiblePhase self):
         cdef double vdp = self.molarvolume * (self.P - P0)
-        cdef pair[string, double] entry
         cdef Components retval = Phase.chemicalPotentials(self)
-        for entry in self.components._list:
-            retval[entry.first] += vdp
+        cdef size_t i
+        for i in range(retval.amounts.size()):
+            retval.amounts[i] += vdp
+        retval.touch()
         return retval
 
     cpdef double Cv(self) except + :
         return self.Cp()
 
+    def __reduce__(IncompressiblePhase self):
+        return (restorePhase, (self.__class__, self.T, self.P, self.phase, self.components, self.molarvolume))
+
     def __add__(self, IncompressiblePhase other):
-        cdef IncompressiblePhase output = self.copy()
-        output.components = output.components + other.components
-        output.setEnthalpy(self.enthalpy() + other.enthalpy())
-        return output
+        return mixPhases([self, other])
+
+####################################################################
+# Pure condensed phase
+####################################################################
+cdef class PureCondensedPhase(IncompressiblePhase):
+    """An incompressible phase holding a single species (e.g., one of
+    the candidate solids of an equilibrium calculation). There is no
+    mixing, so its properties are those of the pure species,
+    e.g. G = n g0(T) + V (P - P0), and are calculated directly."""
+    def __init__(self, components, phaseID, T, P, molarvolume=0.0):
+        IncompressiblePhase.__init__(self, components, phaseID, T, P, molarvolume)
+        if len(self.components) != 1:
+            raise Exception("A PureCondensedPhase must hold exactly one species")
+
+    cpdef IncompressiblePhase copy(PureCondensedPhase self):
+        cdef PureCondensedPhase retval = PureCondensedPhase.__new__(PureCondensedPhase)
+        retval.T = self.T
+        retval.P = self.P
+        retval.phase = self.phase
+        retval.components = self.components.copy()
+        retval.molarvolume = self.molarvolume
+        return retval
+
+    cdef double amount(PureCondensedPhase self) except? -1:
+        if self.components.amounts.size() != 1:
+            raise Exception("A PureCondensedPhase must hold exactly one species")
+        return self.components.amounts[0]
+
+    cpdef double Cp(PureCondensedPhase self) except + :
+        cdef double amount = self.amount()
+        self.updateStandardStates()
+        return amount * self.standardState[0]
+
+    cpdef double enthalpy(PureCondensedPhase self) except + :
+        cdef double amount = self.amount()
+        self.updateStandardStates()
+        return amount * self.standardState[1] + amount * self.molarvolume * (self.P - P0)
+
+    cpdef double entropy(PureCondensedPhase self) except + :
+        cdef double amount = self.amount()
+        self.updateStandardStates()
+        return amount * self.standardState[2]
+
+    cpdef Components chemicalPotentials(PureCondensedPhase self):
+        #The chemical potential of a pure species does not depend on
+        #its amount, so it is also returned when the amount is zero
+        self.amount()
+        self.updateStandardStates()
+        cdef Components retval = self.components.copy()
+        retval.amounts[0] = self.standardState[3] + self.molarvolume * (self.P - P0)
+        retval.touch()
+        return retval
+
+    cdef int correctDerivatives(PureCondensedPhase self, PhaseDerivatives d) except -1:
+        IncompressiblePhase.correctDerivatives(self, d)
+        #There is no mixing entropy, even when the amount is zero
+        d.partialEntropies.amounts[0] = self.standardState[2]
+        return 0
+
+    cpdef PhaseState state(PureCondensedPhase self):
+        cdef PhaseState state = IncompressiblePhase.state(self)
+        if self.amount() == 0:
+            state.chemicalPotentials = self.chemicalPotentials()
+        return state
+
+####################################################################
+# Condensed species block
+####################################################################
+#A block of pure condensed species, such as the hundreds of candidate
+#solids of a clinker calculation, held as contiguous vectors (numpy
+#arrays) of amounts and molar volumes at a common T and P rather than
+#as a phase object for each. Solvers can work on the amounts vector
+#directly, e.g.
+#
+#  block = CondensedSpeciesBlock([('CaO', 'Lime', 0.0), ('SiO2', 'Quartz', 0.0)], T=1500, P=1e5)
+#  block.amounts[:] = x
+#  block.gibbsFreeEnergy(), block.chemicalPotentials()
+#
+#The element potential solver (chemeng.elementpotential) accepts a
+#block in place of a list of PureCondensedPhase, and evaluates all of
+#its species at once.
+#The standard state of a species of a block without data at T
+cdef double notANumber = float('nan')
+
+cdef class CondensedSpeciesBlock:
+    """Pure condensed species at a common T and P. entries is a list
+    of (species, phaseID, amount) or (species, phaseID, amount,
+    molarvolume)."""
+    def __init__(self, entries, double T, double P):
+        self.T = T
+        self.P = P
+        self.species = [entry[0] for entry in entries]
+        self.phaseIDs = [entry[1] for entry in entries]
+        self.amounts = [entry[2] for entry in entries]
+        self.molarvolumes = [entry[3] if len(entry) > 3 else 0.0 for entry in entries]
+        self.speciesdata = [speciesRegistry.speciesData(name) for name in self.species]
+        self.phasedata = []
+        cdef SpeciesDataType sp
+        for sp, phaseID in zip(self.speciesdata, self.phaseIDs):
+            if phaseID not in sp.phases:
+                raise Exception("Species "+sp.name+" has no "+phaseID+" phase data")
+            self.phasedata.append(sp.phases[phaseID])
+        self.standardT = -1
+
+    def __len__(self):
+        return len(self.species)
+
+    cdef object vector(CondensedSpeciesBlock self, values):
+        """values as a contiguous float64 array with an entry for
+        each species"""
+        import numpy
+        array = numpy.ascontiguousarray(values, dtype=numpy.float64)
+        if array.shape != (len(self.species),):
+            raise Exception("A CondensedSpeciesBlock of "+str(len(self.species))+" species requires "+str(len(self.species))+" values, not "+str(array.shape))
+        return array
+
+    property amounts:
+        """The amount of each species (mol)"""
+        def __get__(self):
+            return self.amountArray
+        def __set__(self, values):
+            self.amountArray = self.vector(values)
+
+    property molarvolumes:
+        """The molar volume of each species (m^3/mol)"""
+        def __get__(self):
+            return self.molarvolumeArray
+        def __set__(self, values):
+            self.molarvolumeArray = self.vector(values)
+
+    def copy(self):
+        cdef CondensedSpeciesBlock retval = CondensedSpeciesBlock.__new__(CondensedSpeciesBlock)
+        retval.T = self.T
+        retval.P = self.P
+        retval.species = list(self.species)
+        retval.phaseIDs = list(self.phaseIDs)
+        retval.amountArray = self.amountArray.copy()
+        retval.molarvolumeArray = self.molarvolumeArray.copy()
+        retval.speciesdata = self.speciesdata
+        retval.phasedata = self.phasedata
+        retval.standardT = -1
+        return retval
+
+    def __str__(self):
+        return "<CondensedSpeciesBlock, %d species, %g K, %g bar, " % (len(self.species), self.T, self.P / 1e5) + str(dict([(name+':'+phaseID, amount) for name, phaseID, amount in zip(self.species, self.phaseIDs, self.amountArray.tolist()) if amount != 0]))+">"
+
+    cdef int updateStandardStates(CondensedSpeciesBlock self) except -1:
+        """Ensures standardState holds [Cp0, Hf0, S0, Gibbs0] of each
+        species at T (NaN for the species without data at T)"""
+        if self.standardT == self.T and self.standardState.size() == 4 * len(self.species):
+            return 0
+        cdef SpeciesDataType sp
+        cdef Py_ssize_t i, j
+        self.standardState.resize(4 * len(self.species))
+        for i in range(len(self.species)):
+            sp = self.speciesdata[i]
+            try:
+                sp.evaluate0(self.T, self.phasedata[i], &self.standardState[4 * i])
+            except Exception:
+                for j in range(4):
+                    self.standardState[4 * i + j] = notANumber
+        self.standardT = self.T
+        return 0
+
+    def standardStates(self):
+        """The standard state [Cp0, Hf0, S0, Gibbs0] of each species
+        at T, as an array with a row for each species. The species
+        without data at T (see validRanges) have NaN values."""
+        import numpy
+        self.updateStandardStates()
+        cdef Py_ssize_t i, n = len(self.species)
+        return numpy.array([self.standardState[i] for i in range(4 * n)]).reshape((n, 4))
+
+    def standardGibbs(self):
+        """The standard Gibbs free energy of each species at T"""
+        return self.standardStates()[:, 3]
+
+    def chemicalPotentials(self):
+        """The chemical potential of each species, g0(T) + v (P - P0)"""
+        return self.standardGibbs() + self.molarvolumeArray * (self.P - P0)
+
+    def propertyDerivatives(self, str prop):
+        """Returns the derivatives of a property of the block (one of
+        'G', 'A', 'S', 'U', 'H' or 'V') as in
+        PhaseDerivatives.propertyDerivatives, but as arrays of the
+        partial molar values and the derivatives with respect to T and
+        P per mole of each species. As the species are pure, the
+        partial molar values are also the molar values."""
+        import numpy
+        standard = self.standardStates()
+        v = self.molarvolumeArray
+        zero = numpy.zeros(len(self.species))
+        h = standard[:, 1] + v * (self.P - P0)
+        if prop == 'G':
+            return standard[:, 3] + v * (self.P - P0), - standard[:, 2], v
+        elif prop == 'A':
+            return standard[:, 3] - v * P0, - standard[:, 2], zero
+        elif prop == 'S':
+            return standard[:, 2], standard[:, 0] / self.T, zero
+        elif prop == 'U':
+            return h - v * self.P, standard[:, 0], zero
+        elif prop == 'H':
+            return h, standard[:, 0], v
+        elif prop == 'V':
+            return v.copy(), zero, zero
+        raise Exception("Unknown property "+prop)
+
+    def validRanges(self):
+        """The temperature range of the data of each species, as a
+        list of (Tmin, Tmax)"""
+        cdef PhaseData data
+        cdef ThermoConstantsType datum
+        ranges = []
+        for data in self.phasedata:
+            lo = HUGE_VAL
+            hi = 0
+            for datum in data.constants:
+                lo = fmin(lo, datum.Tmin)
+                hi = fmax(hi, datum.Tmax)
+            ranges.append((lo, hi))
+        return ranges
+
+    cdef double total(CondensedSpeciesBlock self, Py_ssize_t column) except? -1:
+        self.updateStandardStates()
+        cdef double[:] amounts = self.amountArray
+        cdef double sum = 0.0
+        cdef Py_ssize_t i
+        for i in range(amounts.shape[0]):
+            #Absent species need not have data at T
+            if amounts[i] != 0:
+                sum += amounts[i] * self.standardState[4 * i + column]
+        return sum
+
+    def Cp(self):
+        return self.total(0)
+
+    def volume(self):
+        return float(self.amountArray.dot(self.molarvolumeArray))
+
+    def enthalpy(self):
+        return self.total(1) + self.volume() * (self.P - P0)
+
+    def entropy(self):
+        return self.total(2)
+
+    def gibbsFreeEnergy(self):
+        return self.enthalpy() - self.T * self.entropy()
+
+    def internalEnergy(self):
+        return self.enthalpy() - self.P * self.volume()
+
+    def helmholtzFreeEnergy(self):
+        return self.gibbsFreeEnergy() - self.P * self.volume()
+
+    def totalSpecies(self):
+        """The total amount of each species, as a Components"""
+        cdef Components retval = Components({})
+        for name, amount in zip(self.species, self.amountArray.tolist()):
+            retval += Components({name:amount})
+        return retval
+
+    def phases(self):
+        """The species as a list of PureCondensedPhase"""
+        return [PureCondensedPhase({name:amount}, phaseID, self.T, self.P, molarvolume) for name, phaseID, amount, molarvolume in zip(self.species, self.phaseIDs, self.amountArray.tolist(), self.molarvolumeArray.tolist())]
+
+def restorePhase(cls, double T, double P, str phase, Components components, molarvolume=None):
+    """Recreates a pickled phase"""
+    cdef Phase retval = cls.__new__(cls)
+    retval.T = T
+    retval.P = P
+    retval.phase = phase
+    retval.components = components
+    if molarvolume is not None:
+        retval.molarvolume = molarvolume
+    return retval
+
+####################################################################
+# Mixing
+####################################################################
+def mixPhases(phases):
+    """Mixes a list of phases of the same type into one, as adding
+    them together (a + b + c + ...) would, but with a single energy
+    balance rather than one for each addition. Ideal gases mix at the
+    lowest of their pressures, and incompressible phases take the
+    pressure (and molar volume) of the first phase. Pure condensed
+    phases may only be mixed with the same phase of the same
+    species."""
+    if len(phases) == 0:
+        raise Exception("Require at least one phase to mix")
+    cdef Phase first = phases[0]
+    cdef Phase output = first.copy()
+    cdef Phase phase
+    cdef double enthalpy = first.enthalpy()
+    cdef bint idealGas = type(first) is IdealGasPhase
+    cdef bint pure = type(first) is PureCondensedPhase
+    for phase in phases[1:]:
+        if type(phase) is not type(first):
+            raise Exception("Cannot mix a "+phase.__class__.__name__+" into a "+first.__class__.__name__)
+        if pure and (phase.phase != first.phase or phase.components.keys() != first.components.keys()):
+            raise Exception("Cannot mix the "+phase.phase+" phase of "+phase.components.keys()[0]+" into the "+first.phase+" phase of "+first.components.keys()[0]+", as a PureCondensedPhase holds a single species")
+        output.components.mix(phase.components)
+        if idealGas:
+            output.P = fmin(output.P, phase.P)
+        enthalpy += phase.enthalpy()
+    output.setEnthalpy(enthalpy)
+    return output
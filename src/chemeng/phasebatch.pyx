@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# distutils: language = c++
+# cython: profile=True
+
+from libc.math cimport log
+from chemeng.components cimport SpeciesRegistry
+from chemeng.speciesdata cimport SpeciesDataType, PhaseData
+from chemeng.components import speciesRegistry
+
+cdef double R = 8.31451
+cdef double P0 = 1.0e5
+cdef double NaN = float('nan')
+
+cdef SpeciesRegistry registry = speciesRegistry
+
+####################################################################
+# Batch phase evaluation
+####################################################################
+#A PhaseBatch evaluates the properties of many states (temperature,
+#pressure and composition) of a phase of a fixed list of species at
+#once, without creating a Phase for each. The standard state
+#properties come from the same polynomial evaluation as Phase, and the
+#mixture properties are summed in the same order, so the results are
+#identical to those of the equivalent Phase, e.g.
+#
+#  batch = IdealGasPhaseBatch(['N2', 'O2'])
+#  state = batch.evaluate(composition, T, P)
+#  state.enthalpy[i] == IdealGasPhase({'N2':composition[i,0], 'O2':composition[i,1]}, T=T[i], P=P[i]).enthalpy()
+#
+#Unlike Phase, a species without data at one of the temperatures
+#raises an exception.
+
+class PhaseBatchState(object):
+    """The properties of each of the N states of a PhaseBatch. Cp,
+    enthalpy, entropy, gibbsFreeEnergy, internalEnergy,
+    helmholtzFreeEnergy and volume are arrays of length N, and
+    chemicalPotentials is an N x species array (NaN for states holding
+    no material, where Phase has no chemical potentials)."""
+    def __init__(self, species, T, P):
+        import numpy
+        N = len(T)
+        self.species = species
+        self.T = T
+        self.P = P
+        self.Cp = numpy.zeros(N)
+        self.enthalpy = numpy.zeros(N)
+        self.entropy = numpy.zeros(N)
+        self.gibbsFreeEnergy = numpy.zeros(N)
+        self.internalEnergy = numpy.zeros(N)
+        self.helmholtzFreeEnergy = numpy.zeros(N)
+        self.volume = numpy.zeros(N)
+        self.chemicalPotentials = numpy.zeros((N, len(species)))
+
+    def __len__(self):
+        return len(self.T)
+
+cdef class PhaseBatch:
+    """Evaluates a phase of the listed species at many states. As for
+    Phase, the base class is an ideal mixture without any pressure
+    correction, and derived classes must provide the volume."""
+    cdef public list species
+    cdef public str phase
+    #The species data and the phase data of each species, and the
+    #order in which Phase sums over them (the order of their ids)
+    cdef list speciesdata
+    cdef list phasedata
+    cdef list order
+
+    def __init__(PhaseBatch self, species, str phase):
+        self.species = list(species)
+        self.phase = phase
+        if len(set(self.species)) != len(self.species):
+            raise Exception("The species of a PhaseBatch must be unique")
+        self.speciesdata = [registry.speciesData(name) for name in self.species]
+        self.phasedata = []
+        cdef SpeciesDataType sp
+        for sp in self.speciesdata:
+            if phase not in sp.phases:
+                raise Exception("Species "+sp.name+" has no "+phase+" phase data")
+            self.phasedata.append(sp.phases[phase])
+        self.order = sorted(range(len(self.species)), key=lambda j: registry.id(self.species[j]))
+
+    def evaluate(PhaseBatch self, composition, T, P):
+        """Returns a PhaseBatchState holding the properties of each
+        state. composition is an N x species array of the amount of
+        each species (mol), and T (K) and P (Pa) are arrays of length
+        N (or single values shared by all states)."""
+        import numpy
+        composition = numpy.ascontiguousarray(composition, dtype=numpy.float64)
+        if composition.ndim != 2 or composition.shape[1] != len(self.species):
+            raise Exception("The composition must be an N x "+str(len(self.species))+" array")
+        cdef Py_ssize_t N = composition.shape[0]
+        Tarray = numpy.empty(N)
+        Tarray[...] = T
+        Parray = numpy.empty(N)
+        Parray[...] = P
+        state = PhaseBatchState(self.species, Tarray, Parray)
+
+        cdef double[:, :] amounts = composition
+        cdef double[:] Tv = Tarray, Pv = Parray
+        cdef double[:] Cp = state.Cp, H = state.enthalpy, S = state.entropy
+        cdef double[:] G = state.gibbsFreeEnergy, U = state.internalEnergy
+        cdef double[:] A = state.helmholtzFreeEnergy, V = state.volume
+        cdef double[:, :] mu = state.chemicalPotentials
+        cdef Py_ssize_t nspecies = len(self.species)
+        cdef Py_ssize_t n, k, j
+        cdef double temperature, total, amount, mixing
+        cdef double standard[4]
+        cdef double correction[3]
+        cdef SpeciesDataType sp
+        cdef PhaseData data
+        cdef Py_ssize_t[:] order = numpy.array(self.order, dtype=numpy.intp)
+        for n in range(N):
+            temperature = Tv[n]
+            total = 0
+            for k in range(nspecies):
+                total += amounts[n, order[k]]
+            mixing = 0.0
+            for k in range(nspecies):
+                j = order[k]
+                sp = self.speciesdata[j]
+                data = self.phasedata[j]
+                sp.evaluate0(temperature, data, standard)
+                amount = amounts[n, j]
+                Cp[n] += amount * standard[0]
+                H[n] += amount * standard[1]
+                S[n] += amount * standard[2]
+                if amount > 0.0:
+                    mixing += amount * log(amount / total)
+                if total != 0:
+                    mu[n, j] = standard[3] + R * temperature * log(max(1e-300, amount / total))
+            S[n] -= R * mixing
+
+            V[n] = self.volume(total, temperature, Pv[n])
+            self.corrections(total, temperature, Pv[n], V[n], correction)
+            H[n] += correction[0]
+            S[n] += correction[1]
+            for j in range(nspecies):
+                if total == 0:
+                    mu[n, j] = NaN
+                else:
+                    mu[n, j] += correction[2]
+            G[n] = H[n] - temperature * S[n]
+            U[n] = H[n] - Pv[n] * V[n]
+            A[n] = G[n] - Pv[n] * V[n]
+        return state
+
+    cdef double volume(PhaseBatch self, double total, double T, double P) except? -1:
+        raise Exception("Function missing from "+self.__class__.__name__+"!")
+
+    cdef int corrections(PhaseBatch self, double total, double T, double P, double V, double* out) except -1:
+        """The corrections added to the enthalpy, entropy and chemical
+        potentials of the ideal mixture"""
+        out[0] = 0.0
+        out[1] = 0.0
+        out[2] = 0.0
+        return 0
+
+cdef class IdealGasPhaseBatch(PhaseBatch):
+    """The batch equivalent of IdealGasPhase"""
+    def __init__(IdealGasPhaseBatch self, species):
+        PhaseBatch.__init__(self, species, "Gas")
+
+    cdef double volume(IdealGasPhaseBatch self, double total, double T, double P) except? -1:
+        return total * R * T / P
+
+    cdef int corrections(IdealGasPhaseBatch self, double total, double T, double P, double V, double* out) except -1:
+        out[0] = 0.0
+        out[1] = - R * total * log(P / P0)
+        out[2] = R * T * log(P / P0)
+        return 0
+
+cdef class IncompressiblePhaseBatch(PhaseBatch):
+    """The batch equivalent of IncompressiblePhase"""
+    cdef public double molarvolume
+
+    def __init__(IncompressiblePhaseBatch self, species, phaseID, molarvolume=0.0):
+        PhaseBatch.__init__(self, species, phaseID)
+        self.molarvolume = molarvolume
+
+    cdef double volume(IncompressiblePhaseBatch self, double total, double T, double P) except? -1:
+        return total * self.molarvolume
+
+    cdef int corrections(IncompressiblePhaseBatch self, double total, double T, double P, double V, double* out) except -1:
+        out[0] = V * (P - P0)
+        out[1] = 0.0
+        out[2] = self.molarvolume * (P - P0)
+        return 0
+
+####################################################################
+# Phase arrays
+####################################################################
+#A PhaseArray stores N phases of one type, over a fixed list of
+#species, as the rows [T, P, amount of each species] of a float64
+#array. The array may be placed over any writable buffer; placed over
+#shared memory (see sharedPhaseArray) before the worker processes of a
+#multiprocessing.Pool are started, the phases written into it by the
+#workers are read by the parent without pickling or copying, e.g.
+#
+#  results = sharedPhaseArray(IdealGasPhase({}, T=298.15, P=1e5), species, N)
+#  def work(i):
+#      results[i] = findEquilibrium(...)[0]
+#  multiprocessing.Pool().map(work, range(N))
+#  print results[0], results.array[:, 0]
+
+class PhaseArray(object):
+    """N phases stored as the rows of a float64 array. The phases are
+    copies of prototype (giving their type, phase and molar volume)
+    with the temperature, pressure and amounts of each row. Phases
+    read back hold every species of the list, including those with no
+    amount."""
+    def __init__(self, prototype, species, N, buffer=None):
+        import numpy
+        self.prototype = prototype
+        self.species = list(species)
+        self.positions = dict((name, j) for j, name in enumerate(self.species))
+        shape = (N, 2 + len(self.species))
+        if buffer is None:
+            self.array = numpy.zeros(shape)
+        else:
+            self.array = numpy.frombuffer(buffer, dtype=numpy.float64, count=shape[0] * shape[1]).reshape(shape)
+
+    def __len__(self):
+        return self.array.shape[0]
+
+    def __setitem__(self, Py_ssize_t i, phase):
+        row = self.array[i]
+        row[0] = phase.T
+        row[1] = phase.P
+        row[2:] = 0.0
+        for name, amount in phase.components.iteritems():
+            if name not in self.positions:
+                raise Exception("Species "+name+" is not stored in this PhaseArray")
+            row[2 + self.positions[name]] = amount
+
+    def __getitem__(self, Py_ssize_t i):
+        from chemeng.components import Components
+        row = self.array[i]
+        phase = self.prototype.copy()
+        phase.T = row[0]
+        phase.P = row[1]
+        phase.components = Components(dict(zip(self.species, row[2:].tolist())))
+        return phase
+
+def sharedPhaseArray(prototype, species, N):
+    """Returns a PhaseArray placed in shared memory, to be shared with
+    worker processes forked after it is created"""
+    import multiprocessing
+    return PhaseArray(prototype, species, N, multiprocessing.RawArray('d', N * (2 + len(species))))
@@ -3,6 +3,7 @@
 
 from libcpp.string cimport string
 from chemeng.components cimport Components
+from cpython cimport array as c_array
 
 cdef class ThermoConstantsType:
     cdef public double Tmin
@@ -11,6 +12,18 @@ cdef class ThermoConstantsType:
     cpdef double Cp0(ThermoConstantsType, double T)
     cpdef double S0(ThermoConstantsType, double T)
     cpdef double Hf0(ThermoConstantsType, double T)
+    cdef int thermo0(ThermoConstantsType, double T, double* out) except -1
+
+cdef class CoefficientStore:
+    cdef public c_array.array coeffs
+    cdef public c_array.array Tmin
+    cdef public c_array.array Tmax
+    cpdef Py_ssize_t append(CoefficientStore self, double Tmin, double Tmax, a, b) except -1
+    cdef double* row(CoefficientStore self, Py_ssize_t slot)
+
+cdef class StoredThermoConstants(ThermoConstantsType):
+    cdef readonly CoefficientStore store
+    cdef readonly Py_ssize_t slot
 
 cdef class AntioneConstants:
     cdef public double Tmin
@@ -18,6 +31,17 @@ cdef class AntioneConstants:
     cdef public string comments
     cpdef double Pvap(AntioneConstants, double T)
 
+cdef class PhaseData:
+    cdef public string name
+    cdef public list constants
+    cdef public list antioneconstants
+    cdef c_array.array Tmins
+    cdef c_array.array Tmaxs
+    cdef Py_ssize_t indexed
+    cdef bint ordered
+    cdef int updateIndex(PhaseData self) except -1
+    cdef ThermoConstantsType findInterval(PhaseData self, double T)
+
 cdef class SpeciesDataType:
     cdef public string name
     cdef public double mass
@@ -29,5 +53,7 @@ cdef class SpeciesDataType:
     cpdef double Hf0(SpeciesDataType self, double T, string phase)
     cpdef double S0(SpeciesDataType self, double T, string phase)
     cpdef double Gibbs0(SpeciesDataType self, double T, string phase)
+    cpdef tuple thermo0(SpeciesDataType self, double T, string phase)
+    cdef int evaluate0(SpeciesDataType self, double T, PhaseData data, double* out) except -1
     cpdef double Pvap(SpeciesDataType self, double T, string phase)
     cpdef str validRanges(self, phase)
@@ -4,6 +4,13 @@
 
 from chemeng.components cimport Components
 from chemeng.elementdata import elements
+from cpython cimport array as c_array
+from array import array
+from libc.math cimport log
+
+#The gas constant used by the NASA and CHEMKIN polynomials (if
+#changed, the data will need rescaling)
+cdef double R = 8.31451
 
 cdef class ThermoConstantsType:
     def __init__(ThermoConstantsType self, double Tmin, double Tmax, str comments):
@@ -20,6 +27,174 @@ cdef class ThermoConstantsType:
     cpdef double Hf0(self, double T):
         return 0.0
 
+    cdef int thermo0(self, double T, double* out) except -1:
+        """Evaluates [Cp0, Hf0, S0] at T into out. Derived classes
+        may override this to share work between the three functions."""
+        out[0] = self.Cp0(T)
+        out[1] = self.Hf0(T)
+        out[2] = self.S0(T)
+        return 0
+
+    #Array versions of the functions above, which take a numpy array
+    #of temperatures (all within [Tmin, Tmax]) and return an array of
+    #the same shape. Derived classes should override these with a
+    #vectorised evaluation; this fallback calls the scalar version
+    #for each temperature.
+    def Cp0Array(self, T):
+        return scalarToArray(self.Cp0, T)
+
+    def S0Array(self, T):
+        return scalarToArray(self.S0, T)
+
+    def Hf0Array(self, T):
+        return scalarToArray(self.Hf0, T)
+
+cdef scalarToArray(func, T):
+    import numpy
+    T = numpy.asarray(T, dtype=numpy.float64)
+    cdef double[:] Tv = T.ravel()
+    out = numpy.empty(Tv.shape[0])
+    cdef double[:] outv = out
+    cdef Py_ssize_t i
+    for i in range(Tv.shape[0]):
+        outv[i] = func(Tv[i])
+    return out.reshape(T.shape)
+
+####################################################################
+# Coefficient store
+####################################################################
+#The polynomial coefficients of every temperature interval of every
+#species and phase are held in a single contiguous block, rather than
+#in separate objects for each interval. The intervals use the 9 term
+#form of the NASA Glenn database (the other polynomial forms of the
+#same family, such as CHEMKIN, are converted into it). Each interval
+#is a "slot" in the store, holding
+
+#  coeffs[9*slot:9*slot+9] = [a0, a1, ..., a6, b0, b1]
+
+#along with its range in the parallel Tmin and Tmax arrays. All slots
+#of one data record are contiguous.
+cdef Py_ssize_t NCOEFFS = 9
+
+cdef class CoefficientStore:
+    """A contiguous store of NASA 9 term polynomial coefficients"""
+    def __init__(self):
+        self.coeffs = array('d')
+        self.Tmin = array('d')
+        self.Tmax = array('d')
+
+    def __len__(self):
+        return len(self.Tmin)
+
+    cpdef Py_ssize_t append(CoefficientStore self, double Tmin, double Tmax, a, b) except -1:
+        """Adds a temperature interval with coefficients a (7 values)
+        and integration constants b (2 values), returning its slot"""
+        cdef double row[9]
+        cdef int i
+        for i in range(7):
+            row[i] = a[i]
+        row[7] = b[0]
+        row[8] = b[1]
+        c_array.extend_buffer(self.coeffs, <char*>row, NCOEFFS)
+        c_array.extend_buffer(self.Tmin, <char*>&Tmin, 1)
+        c_array.extend_buffer(self.Tmax, <char*>&Tmax, 1)
+        return len(self.Tmin) - 1
+
+    cdef double* row(CoefficientStore self, Py_ssize_t slot):
+        #The store may be reallocated as it grows, so this pointer
+        #must not be held across calls to append
+        return self.coeffs.data.as_doubles + NCOEFFS * slot
+
+#The store used by all of the species databases
+coefficientStore = CoefficientStore()
+
+cdef class StoredThermoConstants(ThermoConstantsType):
+    """A temperature interval whose NASA 9 term polynomial is held in
+    a CoefficientStore. This is a light-weight view of one slot of the
+    store."""
+    def __init__(StoredThermoConstants self, double Tmin, double Tmax, a, b, str comments, CoefficientStore store=None):
+        ThermoConstantsType.__init__(self, Tmin, Tmax, comments)
+        if store is None:
+            store = coefficientStore
+        self.store = store
+        self.slot = store.append(Tmin, Tmax, a, b)
+
+    property a:
+        """A copy of the 7 polynomial coefficients"""
+        def __get__(self):
+            cdef double* c = self.store.row(self.slot)
+            return array('d', [c[i] for i in range(7)])
+        def __set__(self, a):
+            cdef double* c = self.store.row(self.slot)
+            cdef int i
+            for i in range(7):
+                c[i] = a[i]
+
+    property b:
+        """A copy of the 2 integration constants (for H and S)"""
+        def __get__(self):
+            cdef double* c = self.store.row(self.slot)
+            return array('d', [c[7], c[8]])
+        def __set__(self, b):
+            cdef double* c = self.store.row(self.slot)
+            c[7] = b[0]
+            c[8] = b[1]
+
+    cpdef double Cp0(self, double T):
+        return nasaCp0(self.store.row(self.slot), T)
+
+    cpdef double Hf0(self, double T):
+        return nasaHf0(self.store.row(self.slot), T)
+
+    cpdef double S0(self, double T):
+        return nasaS0(self.store.row(self.slot), T)
+
+    cdef int thermo0(self, double T, double* out) except -1:
+        #A single pass over the polynomial, sharing the powers and
+        #logarithm of T between Cp0, Hf0 and S0
+        cdef double* a = self.store.row(self.slot)
+        cdef double invT = 1.0 / T
+        cdef double lnT = log(T)
+        cdef double T2 = T * T
+        cdef double T3 = T2 * T
+        cdef double T4 = T3 * T
+        out[0] = R * (a[0] * invT * invT + a[1] * invT + a[2] + a[3] * T + a[4] * T2 + a[5] * T3 + a[6] * T4)
+        out[1] = R * (-a[0] * invT + a[1] * lnT + a[2] * T + a[3] * T2 / 2 + a[4] * T3 / 3 + a[5] * T4 / 4 + a[6] * T4 * T / 5 + a[7])
+        out[2] = R * (-a[0] * invT * invT / 2 - a[1] * invT + a[2] * lnT + a[3] * T + a[4] * T2 / 2 + a[5] * T3 / 3 + a[6] * T4 / 4 + a[8])
+        return 0
+
+    def Cp0Array(self, T):
+        return nasaArray(self, T, nasaCp0)
+
+    def Hf0Array(self, T):
+        return nasaArray(self, T, nasaHf0)
+
+    def S0Array(self, T):
+        return nasaArray(self, T, nasaS0)
+
+ctypedef double (*nasaFunction)(double*, double)
+
+cdef inline double nasaCp0(double* a, double T):
+    return R * (a[0] / (T * T) + a[1] / T + a[2] + T * (a[3] + T * (a[4] + T * (a[5] + T * a[6]))))
+
+cdef inline double nasaHf0(double* a, double T):
+    return R * (-a[0] / T + a[1] * log(T) + T * (a[2] + T * (a[3] / 2 + T * (a[4] / 3 + T * (a[5] / 4 + T * a[6] / 5)))) + a[7])
+
+cdef inline double nasaS0(double* a, double T):
+    return R * (-a[0] / (2 * T * T) - a[1] / T + a[2] * log(T) + T * (a[3] + T * (a[4] / 2 + T * (a[5] / 3 + T * a[6] / 4))) + a[8])
+
+cdef nasaArray(StoredThermoConstants self, T, nasaFunction func):
+    import numpy
+    T = numpy.asarray(T, dtype=numpy.float64)
+    cdef double[:] Tv = T.ravel()
+    out = numpy.empty(Tv.shape[0])
+    cdef double[:] outv = out
+    cdef double* a = self.store.row(self.slot)
+    cdef Py_ssize_t i
+    for i in range(Tv.shape[0]):
+        outv[i] = func(a, Tv[i])
+    return out.reshape(T.shape)
+
 cdef class AntioneConstants:
     def __init__(AntioneConstants self, double Tmin, double Tmax, str comments):
         self.Tmin = Tmin
@@ -31,14 +206,61 @@ cdef class AntioneConstants:
 
     
 cdef class PhaseData:
-    cdef public string name
-    cdef public list constants
-    cdef public list antioneconstants
+    """The thermodynamic constants of a single phase of a species,
+    split into temperature intervals.
+
+    The temperature ranges of the constants are mirrored in the Tmins
+    and Tmaxs arrays, which are rebuilt whenever constants changes
+    length. If the intervals are sorted and do not overlap, findInterval
+    locates the interval for a temperature by bisection, otherwise
+    the intervals are scanned in order. Either way, the first interval
+    holding the temperature is returned."""
 
     def __init__(self, name):
         self.name = name
         self.constants = []
         self.antioneconstants = []
+        self.Tmins = array('d')
+        self.Tmaxs = array('d')
+        self.indexed = 0
+        self.ordered = True
+
+    cdef int updateIndex(PhaseData self) except -1:
+        cdef ThermoConstantsType datum
+        cdef Py_ssize_t i
+        self.Tmins = array('d', [datum.Tmin for datum in self.constants])
+        self.Tmaxs = array('d', [datum.Tmax for datum in self.constants])
+        self.indexed = len(self.constants)
+        self.ordered = True
+        for i in range(self.indexed):
+            if self.Tmins.data.as_doubles[i] > self.Tmaxs.data.as_doubles[i]:
+                self.ordered = False
+            if i > 0 and self.Tmins.data.as_doubles[i] < self.Tmaxs.data.as_doubles[i-1]:
+                self.ordered = False
+        return 0
+
+    cdef ThermoConstantsType findInterval(PhaseData self, double T):
+        """Returns the first constants valid at T, or None"""
+        if self.indexed != len(self.constants):
+            self.updateIndex()
+        cdef double* Tmins = self.Tmins.data.as_doubles
+        cdef double* Tmaxs = self.Tmaxs.data.as_doubles
+        cdef Py_ssize_t lo = 0, hi = self.indexed, mid
+        if self.ordered:
+            #Find the first interval ending at or above T
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if Tmaxs[mid] < T:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo < self.indexed and T >= Tmins[lo]:
+                return self.constants[lo]
+            return None
+        for lo in range(self.indexed):
+            if T >= Tmins[lo] and T <= Tmaxs[lo]:
+                return self.constants[lo]
+        return None
         
     def __str__(self):
         output = "Phase{'"+self.name+"', T=["
@@ -76,9 +298,11 @@ cdef class SpeciesDataType:
     def registerPhase(self, phasename):
         if phasename not in self.phases:
             self.phases[phasename] = PhaseData(phasename)
+            speciesData.indexText(self.name, phasename)
         
     def registerPhaseCoeffs(self, coeffs, string phasename):
         self.phases[phasename].constants.append(coeffs)
+        speciesData.indexText(self.name, coeffs.comments)
 
     def registerAntoineCoeffs(self, coeffs, string phasename):
         if not str(phasename) in self.phases.keys():
@@ -87,19 +311,14 @@ cdef class SpeciesDataType:
         
     cpdef bint inDataRange(SpeciesDataType self, double T, string phase):
         cdef PhaseData data = self.phases[phase]
-        cdef ThermoConstantsType datum
-        for datum in data.constants:
-            if T >= datum.Tmin and T <= datum.Tmax:
-                return True
-        return False
+        return data.findInterval(T) is not None
         
     cpdef double Cp0(SpeciesDataType self, double T, string phase):
         cdef PhaseData data = self.phases[phase]
-        cdef ThermoConstantsType datum
-        for datum in data.constants:
-            if T >= datum.Tmin and T <= datum.Tmax:
-                return datum.Cp0(T)
-        raise Exception("Cannot find valid Cp0 expression for "+self.name+" at "+str(T)+"K\n"+self.validRanges(phase))
+        cdef ThermoConstantsType datum = data.findInterval(T)
+        if datum is None:
+            raise Exception("Cannot find valid Cp0 expression for "+self.name+" at "+str(T)+"K\n"+self.validRanges(phase))
+        return datum.Cp0(T)
 
     cpdef double Pvap(SpeciesDataType self, double T, string phase):
         cdef PhaseData data = self.phases[phase]
@@ -111,27 +330,77 @@ cdef class SpeciesDataType:
 
     cpdef double Hf0(SpeciesDataType self, double T, string phase):
         cdef PhaseData data = self.phases[phase]
-        cdef ThermoConstantsType datum
-        for datum in data.constants:
-            if T >= datum.Tmin and T <= datum.Tmax:
-                return datum.Hf0(T)
-        raise Exception("Cannot find valid Hf0 expression for "+self.name+" at "+str(T)+"K\n"+self.validRanges(phase))
+        cdef ThermoConstantsType datum = data.findInterval(T)
+        if datum is None:
+            raise Exception("Cannot find valid Hf0 expression for "+self.name+" at "+str(T)+"K\n"+self.validRanges(phase))
+        return datum.Hf0(T)
 
     cpdef double S0(SpeciesDataType self, double T, string phase):
         cdef PhaseData data = self.phases[phase]
-        cdef ThermoConstantsType datum
-        for datum in data.constants:
-            if T >= datum.Tmin and T <= datum.Tmax:
-                return datum.S0(T)
-        raise Exception("Cannot find valid S0 expression for "+self.name+" at "+str(T)+"K\n"+self.validRanges(phase))
+        cdef ThermoConstantsType datum = data.findInterval(T)
+        if datum is None:
+            raise Exception("Cannot find valid S0 expression for "+self.name+" at "+str(T)+"K\n"+self.validRanges(phase))
+        return datum.S0(T)
 
     cpdef double Gibbs0(self, double T, string phase):
+        cdef double out[4]
+        self.evaluate0(T, self.phases[phase], out)
+        return out[3]
+
+    cpdef tuple thermo0(SpeciesDataType self, double T, string phase):
+        """Returns (Cp0, Hf0, S0, Gibbs0) at T from a single interval
+        lookup and polynomial evaluation"""
+        cdef double out[4]
+        self.evaluate0(T, self.phases[phase], out)
+        return (out[0], out[1], out[2], out[3])
+
+    cdef int evaluate0(SpeciesDataType self, double T, PhaseData data, double* out) except -1:
+        """Evaluates [Cp0, Hf0, S0, Gibbs0] at T for the phase data
+        into out"""
+        cdef ThermoConstantsType datum = data.findInterval(T)
+        if datum is None:
+            raise Exception("Cannot find valid thermodynamic data for "+self.name+" at "+str(T)+"K\n"+self.validRanges(data.name))
+        datum.thermo0(T, out)
+        out[3] = out[1] - T * out[2]
+        return 0
+
+    def Cp0Array(self, T, phase):
+        """Returns Cp0 at each of the temperatures in the array T"""
+        return self.intervalArray(T, phase, 'Cp0')
+
+    def Hf0Array(self, T, phase):
+        """Returns Hf0 at each of the temperatures in the array T"""
+        return self.intervalArray(T, phase, 'Hf0')
+
+    def S0Array(self, T, phase):
+        """Returns S0 at each of the temperatures in the array T"""
+        return self.intervalArray(T, phase, 'S0')
+
+    def Gibbs0Array(self, T, phase):
+        """Returns Gibbs0 at each of the temperatures in the array T"""
+        import numpy
+        T = numpy.asarray(T, dtype=numpy.float64)
+        return self.intervalArray(T, phase, 'Hf0') - T * self.intervalArray(T, phase, 'S0')
+
+    def intervalArray(self, T, phase, str function):
+        """Evaluates the named function of the constants over an
+        array of temperatures. Each temperature uses the first
+        interval containing it (as the scalar functions do), and each
+        interval is evaluated once for all of its temperatures."""
+        import numpy
+        T = numpy.asarray(T, dtype=numpy.float64)
+        out = numpy.empty(T.shape)
+        unassigned = numpy.ones(T.shape, dtype=bool)
         cdef PhaseData data = self.phases[phase]
         cdef ThermoConstantsType datum
         for datum in data.constants:
-            if T >= datum.Tmin and T <= datum.Tmax:
-                return datum.Hf0(T) - T * datum.S0(T) 
-        raise Exception("Cannot find valid Gibbs0 expression for "+self.name+" at "+str(T)+"K\n"+self.validRanges(phase))
+            mask = unassigned & (T >= datum.Tmin) & (T <= datum.Tmax)
+            if mask.any():
+                out[mask] = getattr(datum, function+'Array')(T[mask])
+                unassigned &= ~mask
+        if unassigned.any():
+            raise Exception("Cannot find valid "+function+" expression for "+self.name+" at "+str(T[unassigned].flat[0])+"K\n"+self.validRanges(phase))
+        return out
 
     cpdef str validRanges(self, phase):
         cdef str msg = "Valid ranges:\n"
@@ -158,50 +427,307 @@ def relativeError(val, ref):
 from libcpp.string cimport string
 from libcpp.map cimport map
 
-speciesData = {}
+#The length of the substrings held in the text index of
+#SpeciesDatabase
+cdef Py_ssize_t textGramLength = 3
+
+class SpeciesDatabase(dict):
+    """A dictionary of SpeciesDataType, indexed by species name, whose
+    entries are created on first access.
+
+    Data sources register the name, elemental composition and phases
+    of each of their records up front (see registerLazySpecies), along
+    with where the record can be fetched from (e.g., a slot of a
+    compiled cache). The record is only turned into SpeciesDataType,
+    PhaseData and polynomial objects when the species is looked up, so
+    the cost of a database scales with the species actually used.
+
+    Looking up a species through [] (or get) materialises it, while
+    the name based queries (in, len, keys, elementalComposition and
+    descriptions) do not. Iterating over the values or items
+    materialises every species.
+
+    The database also keeps the inverted indices used by
+    findSpeciesData: the species holding each element, the species
+    holding each exact (element, amount) pair, and the species whose
+    name, phase names or comments contain each piece of text. The text
+    index is only split into substrings on the first keyword query."""
+
+    def __init__(self):
+        dict.__init__(self)
+        #Species which have not been materialised yet, as a map from
+        #the species name to [elementalComposition, loaders,
+        #descriptions]. Each loader is a tuple of (records, slot,
+        #function), and the species is materialised by calling
+        #function(species, records[slot]) for each loader in turn.
+        self.pending = {}
+        #element -> set of species names
+        self.elementIndex = {}
+        #(element, amount) -> set of species names
+        self.formulaIndex = {}
+        #text (a name, phase name or comment) -> set of species names
+        self.textIndex = {}
+        #substring (of up to textGramLength characters) -> set of the
+        #texts containing it, or None until the first keyword query
+        self.gramIndex = None
+        #Names of the species skipped by a LoadFilter
+        self.excluded = set()
+
+    def __setitem__(self, name, sp):
+        from chemeng.components import speciesRegistry
+        dict.__setitem__(self, name, sp)
+        #Components hold on to the species data they use
+        speciesRegistry.forget(name)
+        self.indexSpecies(name, dict(sp.elementalComposition.iteritems()))
+        for phasename, comments in self.descriptions(name):
+            self.indexText(name, phasename)
+            for comment in comments:
+                self.indexText(name, comment)
+
+    def isExcluded(self, name):
+        """True if the species was skipped by a LoadFilter and has not
+        been registered by any other source"""
+        return name in self.excluded and name not in self
+
+    def indexSpecies(self, name, elementalComposition):
+        """Adds the name and elements of a species to the indices"""
+        for element, amount in elementalComposition.iteritems():
+            self.elementIndex.setdefault(element, set()).add(name)
+            self.formulaIndex.setdefault((element, amount), set()).add(name)
+        self.indexText(name, name)
+
+    def indexText(self, name, text):
+        """Records that the species name has a name, phase name or
+        comment containing text"""
+        if name not in self:
+            return
+        if text not in self.textIndex:
+            self.textIndex[text] = set()
+            if self.gramIndex is not None:
+                self.indexGrams(text)
+        self.textIndex[text].add(name)
+
+    def indexGrams(self, text):
+        cdef Py_ssize_t start, length
+        for start in range(len(text)):
+            for length in range(1, min(textGramLength, len(text) - start) + 1):
+                self.gramIndex.setdefault(text[start:start + length], set()).add(text)
+
+    def textSearch(self, keyword):
+        """Returns the set of species with a name, phase name or
+        comment containing keyword"""
+        if self.gramIndex is None:
+            self.gramIndex = {}
+            for text in self.textIndex:
+                self.indexGrams(text)
+        cdef Py_ssize_t start
+        if len(keyword) <= textGramLength:
+            texts = self.gramIndex.get(keyword, ())
+        else:
+            #Every text holding the keyword holds each of its
+            #substrings, so the candidates are those of the rarest
+            #substring, which are then checked directly
+            texts = ()
+            for start in range(len(keyword) - textGramLength + 1):
+                candidates = self.gramIndex.get(keyword[start:start + textGramLength], ())
+                if start == 0 or len(candidates) < len(texts):
+                    texts = candidates
+            texts = [text for text in texts if keyword in text]
+        retval = set()
+        for text in texts:
+            retval.update(self.textIndex[text])
+        return retval
+
+    def __missing__(self, name):
+        if name not in self.pending:
+            raise KeyError(name)
+        formula, loaders, descriptions = self.pending.pop(name)
+        sp = SpeciesDataType(name, Components(formula))
+        dict.__setitem__(self, name, sp)
+        for records, slot, function in loaders:
+            function(sp, records[slot])
+        return sp
+
+    def __contains__(self, name):
+        return dict.__contains__(self, name) or (name in self.pending)
+
+    def has_key(self, name):
+        return name in self
+
+    def get(self, name, default=None):
+        if name in self:
+            return self[name]
+        return default
+
+    def __len__(self):
+        return dict.__len__(self) + len(self.pending)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def iterkeys(self):
+        return iter(self.keys())
+
+    def keys(self):
+        return dict.keys(self) + self.pending.keys()
+
+    def itervalues(self):
+        for name in self.keys():
+            yield self[name]
+
+    def values(self):
+        return list(self.itervalues())
+
+    def iteritems(self):
+        for name in self.keys():
+            yield name, self[name]
+
+    def items(self):
+        return list(self.iteritems())
+
+    def phaseCount(self):
+        """Returns the total number of phases of all species, without
+        materialising them."""
+        count = 0
+        for sp in dict.itervalues(self):
+            count += len(sp.phases)
+        for formula, loaders, descriptions in self.pending.itervalues():
+            count += len(set([phasename for phasename, comments in descriptions]))
+        return count
+
+    def elementalComposition(self, name):
+        """Returns the elemental composition of a species (as a dict)
+        without materialising it."""
+        if name in self.pending:
+            return self.pending[name][0]
+        return dict(dict.__getitem__(self, name).elementalComposition.iteritems())
+
+    def descriptions(self, name):
+        """Returns a list of (phasename, comments) for each phase of
+        a species, where comments is a list of the comments of each
+        set of thermodynamic constants, without materialising it."""
+        if name in self.pending:
+            return self.pending[name][2]
+        return [(phase.name, [constants.comments for constants in phase.constants]) for phase in dict.__getitem__(self, name).phases.itervalues()]
+
+speciesData = SpeciesDatabase()
 
 cpdef list findSpeciesData(str keyword = "", Components composition = Components({}), list elements = []):
-    cdef list retval = []
-
-    for key,species in speciesData.iteritems():
-        #Check that the requested elements are there
-        fail = False
-        for element in elements:
-            if element not in species.elementalComposition:
-                fail = True
-                break
-        for element, amount in composition.iteritems():
-            if element not in species.elementalComposition:
-                fail = True
-                break
-            if amount != species.elementalComposition[element]:
-                fail = True
-                break
-        if fail:
-            continue
-
-        fail = True
-        #Now check for keywords
-        if keyword in key:
-            fail = False
-        for phasekey, phase in species.phases.iteritems():
-            if keyword in phasekey or keyword in phase.name:
-                fail = False
+    """Returns the species holding all of the listed elements, exactly
+    the amounts of each element in composition, and with keyword in
+    their name, one of their phase names or comments. The species are
+    returned sorted by name."""
+    cdef list candidates = []
+    for element in elements:
+        candidates.append(speciesData.elementIndex.get(element, ()))
+    for element, amount in composition.iteritems():
+        candidates.append(speciesData.formulaIndex.get((element, amount), ()))
+    if keyword:
+        candidates.append(speciesData.textSearch(keyword))
+
+    if not candidates:
+        names = speciesData.keys()
+    else:
+        #Intersect the smallest sets first
+        candidates.sort(key=len)
+        names = set(candidates[0])
+        for other in candidates[1:]:
+            if not names:
                 break
-            for constants in phase.constants:
-                if keyword in constants.comments:
-                    fail = False
-                    break
-                
-        if not fail:
-            retval.append(species)
+            names.intersection_update(other)
+
+    return [speciesData[name] for name in sorted(names)]
 
-    return retval
+def speciesPropertyTable(str function, species, T, phase):
+    """Returns a (len(species) x len(T)) array of the named function
+    (one of 'Cp0', 'Hf0', 'S0' or 'Gibbs0') of each species over the
+    array of temperatures T. The species may be names or
+    SpeciesDataType objects, and phase is either a single phase name
+    or a list holding the phase of each species."""
+    import numpy
+    if function not in ('Cp0', 'Hf0', 'S0', 'Gibbs0'):
+        raise Exception("Unknown species property "+function)
+    T = numpy.asarray(T, dtype=numpy.float64).ravel()
+    if isinstance(phase, str):
+        phase = [phase] * len(species)
+    out = numpy.empty((len(species), T.shape[0]))
+    for i, (sp, phasename) in enumerate(zip(species, phase)):
+        if not isinstance(sp, SpeciesDataType):
+            sp = speciesData[sp]
+        out[i] = getattr(sp, function+'Array')(T, phasename)
+    return out
 
-cpdef registerSpecies(name, Components elementalComposition):
+cdef checkElements(name, elementalComposition):
     for element in elementalComposition.keys():
         if element not in elements:
             raise Exception("Species "+name+" with elemental composition "+str(elementalComposition)+" has an unknown element, "+element)
 
+class LoadFilter(object):
+    """Selects which species of a database are loaded. Only species
+    made up of the listed elements (electrons, for ions, are always
+    allowed) and named in the species list are accepted; either list
+    may be None to allow anything. The databases apply the filter to
+    their records before any SpeciesDataType or polynomial objects
+    are created, and the names of the skipped species are kept in
+    speciesData.excluded."""
+    def __init__(self, elements=None, species=None):
+        self.elements = None
+        if elements is not None:
+            self.elements = set(elements) | set(['e-'])
+        self.species = None
+        if species is not None:
+            self.species = set(species)
+
+    def allows(self, name, elementalComposition):
+        if self.species is not None and name not in self.species:
+            return False
+        if self.elements is not None:
+            for element in elementalComposition:
+                if element not in self.elements:
+                    return False
+        return True
+
+    def select(self, name, elementalComposition):
+        """Returns True if the species should be loaded, otherwise it
+        is recorded as excluded and False is returned."""
+        if self.allows(name, elementalComposition):
+            return True
+        speciesData.excluded.add(name)
+        return False
+
+def defaultLoadFilter():
+    """Returns the LoadFilter set up in chemeng.config, which is used
+    by the databases loaded on import."""
+    import chemeng.config
+    return LoadFilter(chemeng.config.loadElements, chemeng.config.loadSpecies)
+
+cpdef registerSpecies(name, Components elementalComposition, loadFilter=None):
+    checkElements(name, elementalComposition)
+
+    if loadFilter is not None and not loadFilter.select(name, elementalComposition.keys()):
+        return
+
     if name not in speciesData:
         speciesData[name] = SpeciesDataType(name, elementalComposition)
+
+cpdef registerLazySpecies(name, dict elementalComposition, phasename, comments, records, Py_ssize_t slot, function):
+    """Registers a record of a species without creating any objects
+    for it. The species data is later created by calling
+    function(species, records[slot]), where species is the
+    SpeciesDataType, when the species is first looked up in
+    speciesData. The phasename and the comments of the record are
+    used by findSpeciesData. If the species already exists, the record
+    is loaded immediately."""
+    checkElements(name, elementalComposition)
+
+    if dict.__contains__(speciesData, name):
+        function(speciesData[name], records[slot])
+    elif name in speciesData.pending:
+        entry = speciesData.pending[name]
+        entry[1].append((records, slot, function))
+        entry[2].append((phasename, [comments]))
+    else:
+        speciesData.pending[name] = [elementalComposition, [(records, slot, function)], [(phasename, [comments])]]
+        speciesData.indexSpecies(name, elementalComposition)
+    speciesData.indexText(name, phasename)
+    speciesData.indexText(name, comments)